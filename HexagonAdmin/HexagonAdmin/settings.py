@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     'corsheaders',
 
     'config',
@@ -191,6 +192,8 @@ MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY', os.getenv('MINIO_ROOT_USER', ''
 MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', os.getenv('MINIO_ROOT_PASSWORD', ''))
 MINIO_USE_HTTPS = os.getenv('MINIO_USE_HTTPS', 'False').lower() == 'true'
 MINIO_BUCKET_NAME = os.getenv('MINIO_BUCKET_NAME', 'hexagon-storage')
+# URL of MinIO as seen from the browser, for direct uploads from the admin
+MINIO_PUBLIC_URL = os.getenv('MINIO_PUBLIC_URL', '')
 
 # Custom settings
 SITE_NAME = os.getenv('ADMIN_SITE_NAME', 'Hexagon Education Admin')
@@ -5,13 +5,16 @@ from django.contrib.sites.models import Site as DjangoSite
 from django.urls import path
 from django.db import models
 from django.contrib.admin.widgets import AdminSplitDateTime
+from .exports import ExportMixin
 from .models import Site, SiteSettings, ContactInfo, FAQ, Banner, ContactInquiry
-from .views import site_config_view
+from .uploads import DirectUploadMixin
+from .views import site_config_view, upload_abort_view, upload_finish_view, upload_start_view
+from course.models import CourseClass
 
 class CustomDateTimeWidget(AdminSplitDateTime):
     template_name = 'admin/widgets/split_datetime.html'
 
-class BaseModelAdmin(admin.ModelAdmin):
+class BaseModelAdmin(DirectUploadMixin, admin.ModelAdmin):
     formfield_overrides = {
         models.DateTimeField: {'widget': CustomDateTimeWidget},
     }
@@ -72,6 +75,7 @@ class ContactInfoAdmin(BaseModelAdmin):
 @admin.register(FAQ)
 class FAQAdmin(BaseModelAdmin):
     list_display = ['question_preview', 'category', 'order', 'is_active', 'updated_at']
+    list_select_related = ['category']
     list_filter = ['category', 'is_active']
     search_fields = ['question', 'answer']
     readonly_fields = ['id', 'created_at', 'updated_at']
@@ -90,21 +94,42 @@ class BannerAdmin(BaseModelAdmin):
     ordering = ['position', 'order']
 
 @admin.register(ContactInquiry)
-class ContactInquiryAdmin(BaseModelAdmin):
+class ContactInquiryAdmin(ExportMixin, BaseModelAdmin):
     list_display = ['full_name', 'phone', 'email', 'inquiry_type', 'status', 'course', 'created_at']
+    list_select_related = ['course']
     list_filter = ['inquiry_type', 'status', 'created_at', 'course']
     search_fields = ['full_name', 'phone', 'email', 'message']
     readonly_fields = ['id', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    export_columns = [
+        ('Họ tên', 'full_name'),
+        ('Số điện thoại', 'phone'),
+        ('Email', 'email'),
+        ('Loại liên hệ', 'inquiry_type'),
+        ('Trạng thái', 'status'),
+        ('Khóa học quan tâm', 'course__title'),
+        ('Lớp học quan tâm', 'course_class__title'),
+        ('Tin nhắn', 'message'),
+        ('Ghi chú admin', 'notes'),
+        ('Ngày gửi', 'created_at'),
+    ]
     
     def has_add_permission(self, request):
         return False
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'course_class':
+            kwargs['queryset'] = CourseClass.objects.select_related('course')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 class CustomAdminSite(admin.AdminSite):
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
             path('config/', self.admin_view(site_config_view), name='site_config'),
+            path('upload/start/', self.admin_view(upload_start_view), name='upload_start'),
+            path('upload/finish/', self.admin_view(upload_finish_view), name='upload_finish'),
+            path('upload/abort/', self.admin_view(upload_abort_view), name='upload_abort'),
         ]
         return custom_urls + urls
 
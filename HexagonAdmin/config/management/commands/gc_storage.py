@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from config.storage_gc import GRACE_PERIOD, PREFIXES, collect_garbage
+
+
+def human_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete bucket objects that no *_key column references any more. "
+        "Objects younger than the grace period are kept; older unfinished "
+        "multipart uploads are aborted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prefix', action='append', dest='prefixes',
+            help=f"Bucket prefix to scan; repeatable (default: {', '.join(PREFIXES)})"
+        )
+        parser.add_argument(
+            '--grace-hours', type=float, default=GRACE_PERIOD.total_seconds() / 3600,
+            help="Keep unreferenced objects modified within this many hours"
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be deleted")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        report = collect_garbage(
+            prefixes=options['prefixes'] or PREFIXES,
+            grace_period=timedelta(hours=options['grace_hours']),
+            dry_run=dry_run,
+        )
+
+        self.stdout.write(
+            f"scanned   {report.scanned} objects, {human_size(report.scanned_bytes)}\n"
+            f"live      {report.live}\n"
+            f"recent    {report.recent} (within grace period)\n"
+            f"orphaned  {report.orphaned} objects, {human_size(report.orphaned_bytes)}\n"
+            f"stale     {report.stale_uploads} unfinished multipart uploads"
+        )
+        for key in report.samples:
+            self.stdout.write(f"  {key}")
+        if report.orphaned > len(report.samples):
+            self.stdout.write(f"  ... and {report.orphaned - len(report.samples)} more")
+
+        if dry_run:
+            self.stdout.write(f"Dry run: {human_size(report.orphaned_bytes)} would be reclaimed.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {report.deleted} objects, aborted {report.aborted_uploads} multipart uploads."
+        ))
+        for key, error in report.failed.items():
+            self.stderr.write(f"Failed to delete {key}: {error}")
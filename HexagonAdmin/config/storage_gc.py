@@ -0,0 +1,159 @@
+"""
+Dọn các object không còn được tham chiếu trong bucket MinIO.
+
+Ảnh/file bị thay trong trang quản trị và ảnh đại diện cũ mà API xóa không
+thành công vẫn nằm lại trong bucket. Tập key còn dùng được đọc từ mọi cột
+`*_key` (cùng các cột trong `EXTRA_KEY_FIELDS`) bằng một câu SQL duy nhất,
+sau đó bucket được liệt kê theo từng trang và các object không có trong tập
+đó, cũ hơn thời gian chờ, bị xóa theo lô 1000 key. Các lần tải theo phần
+(multipart) bị bỏ dở cũ hơn thời gian chờ cũng bị hủy, vì các phần đã nhận
+chiếm chỗ trong bucket mà không hiện ra khi liệt kê object.
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import timedelta
+from urllib.parse import urlparse
+
+from django.apps import apps
+from django.db import connection, models
+from django.utils import timezone
+
+from .utils import s3
+
+
+# Thư mục do ứng dụng quản lý; object ở nơi khác trong bucket không bị đụng tới
+PREFIXES = ('public/', 'private/', 'profile_pictures/')
+
+# Cột chứa key nhưng không có hậu tố `_key`: "app_label.model_name.field"
+EXTRA_KEY_FIELDS = (
+    'config.banner.image',
+    'user.userprofile.profile_picture',
+)
+
+# Object mới tải lên có thể chưa kịp được lưu vào form / chưa xử lý xong
+GRACE_PERIOD = timedelta(hours=24)
+BATCH_SIZE = 1000
+
+# Ảnh đại diện đã xử lý đi kèm ảnh thu nhỏ (xem profile_picture_variants trong API)
+PROCESSED_PICTURE = re.compile(r'^(profile_pictures/[^/]+/[0-9a-f]{32})_full\.jpg$')
+
+
+@dataclass
+class GCReport:
+    scanned: int = 0
+    scanned_bytes: int = 0
+    live: int = 0
+    recent: int = 0
+    orphaned: int = 0
+    orphaned_bytes: int = 0
+    deleted: int = 0
+    stale_uploads: int = 0  # lần tải theo phần bị bỏ dở
+    aborted_uploads: int = 0
+    failed: dict = field(default_factory=dict)  # key: lỗi
+    samples: list = field(default_factory=list)  # vài key mồ côi để xem trước
+
+
+def key_columns():
+    """(bảng, cột) của mọi trường lưu key object trong bucket."""
+    columns = []
+    for model in apps.get_models():
+        opts = model._meta
+        if opts.proxy or not opts.managed:
+            continue
+        for f in opts.concrete_fields:
+            target = f"{opts.app_label}.{opts.model_name}.{f.name}"
+            if isinstance(f, models.CharField) and (f.name.endswith('_key') or target in EXTRA_KEY_FIELDS):
+                columns.append((opts.db_table, f.column))
+    return columns
+
+
+def normalize_key(value, bucket):
+    """Key trong bucket của một giá trị đã lưu (key hoặc URL công khai của object)."""
+    if not value.startswith(('http://', 'https://')):
+        return value
+    path = urlparse(value).path.lstrip('/')
+    return path[len(bucket) + 1:] if path.startswith(f"{bucket}/") else path
+
+
+def live_keys(bucket=''):
+    """Tập key đang được tham chiếu, đọc bằng một câu UNION qua mọi cột key."""
+    quote = connection.ops.quote_name
+    sql = " UNION ".join(
+        f"SELECT {quote(column)} FROM {quote(table)} WHERE {quote(column)} <> ''"
+        for table, column in key_columns()
+    )
+    keys = set()
+    if not sql:
+        return keys
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        while rows := cursor.fetchmany(BATCH_SIZE):
+            for (value,) in rows:
+                if value is None:
+                    continue
+                key = normalize_key(value, bucket)
+                keys.add(key)
+                if match := PROCESSED_PICTURE.match(key):
+                    keys.add(f"{match[1]}_thumb.jpg")
+    return keys
+
+
+def collect_garbage(prefixes=PREFIXES, grace_period=GRACE_PERIOD, dry_run=True, sample_size=20):
+    """
+    Tìm (và xóa, nếu không phải chạy thử) các object mồ côi dưới `prefixes`.
+
+    Tập key còn dùng được đọc trước khi liệt kê bucket; object tải lên sau đó
+    vẫn an toàn nhờ thời gian chờ `grace_period`.
+    """
+    client = s3.get_s3_client()
+    live = live_keys(client.bucket_name)
+    cutoff = timezone.now() - grace_period
+    report = GCReport()
+    batch = []
+
+    def flush():
+        nonlocal batch
+        keys, batch = batch, []
+        result = client.delete_files(keys)
+        if result['success']:
+            report.deleted += len(keys)
+        else:
+            failed = result['errors'] or dict.fromkeys(keys, result.get('error', ''))
+            report.failed.update(failed)
+            report.deleted += len(keys) - len(failed)
+
+    for prefix in prefixes:
+        for obj in client.iter_files(prefix):
+            report.scanned += 1
+            report.scanned_bytes += obj['size']
+            if obj['key'] in live:
+                report.live += 1
+                continue
+            if obj['last_modified'] > cutoff:
+                report.recent += 1
+                continue
+
+            report.orphaned += 1
+            report.orphaned_bytes += obj['size']
+            if len(report.samples) < sample_size:
+                report.samples.append(obj['key'])
+            if not dry_run:
+                batch.append(obj['key'])
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+
+    if batch:
+        flush()
+
+    for prefix in prefixes:
+        for upload in client.iter_multipart_uploads(prefix):
+            if upload['initiated'] > cutoff:
+                continue
+            report.stale_uploads += 1
+            if not dry_run:
+                result = client.abort_multipart_upload(upload['key'], upload['upload_id'])
+                if result['success']:
+                    report.aborted_uploads += 1
+                else:
+                    report.failed[upload['key']] = result['error']
+    return report
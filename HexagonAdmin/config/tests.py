@@ -1,3 +1,416 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from config.models import Banner, ContactInfo, ContactInquiry, FAQ, Site, SiteSettings
+from config.storage_gc import collect_garbage, key_columns
+from config.uploads import EXPIRATION, KINDS, MULTIPART_THRESHOLD, PART_SIZE
+from course.models import Course, CourseCategory, CourseClass
+from enrollment.models import Student, StudentCourseEnrollment, StudentInquiry
+from news.models import News, NewsCategory
+from user.models import User, UserProfile
+
+
+class AdminQueryBudgetTests(TestCase):
+    """
+    Maximum number of queries per admin changelist and change form.
+
+    Every page lists more rows than its budget allows, so a per-row query
+    (a missing `list_select_related`, a related `__str__` in a choice field)
+    fails the test. Registering a new ModelAdmin requires adding its budget.
+    """
+
+    ROWS = 12
+
+    # model: (changelist, change form)
+    BUDGETS = {
+        Site: (5, 4),
+        SiteSettings: (5, 4),
+        ContactInfo: (5, 4),
+        FAQ: (6, 5),
+        Banner: (5, 4),
+        ContactInquiry: (6, 6),
+        CourseCategory: (5, 4),
+        Course: (6, 11),
+        NewsCategory: (6, 5),
+        News: (6, 6),
+        Student: (5, 5),
+        StudentCourseEnrollment: (6, 10),
+        StudentInquiry: (5, 6),
+        User: (6, 10),
+    }
+    # Export actions stream any number of rows with the same queries
+    EXPORT_BUDGET = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(
+            email='admin@example.com', username='admin', password='password'
+        )
+
+        categories = [CourseCategory.objects.create(name=f"Danh mục {i}") for i in range(3)]
+        courses = [
+            Course.objects.create(
+                category=categories[i % len(categories)],
+                title=f"Khóa học {i}",
+                short_description="Mô tả",
+            )
+            for i in range(cls.ROWS)
+        ]
+        classes = [
+            CourseClass.objects.create(
+                course=course,
+                title=f"Lớp {i}",
+                short_description="Mô tả",
+                address="Hà Nội",
+                schedule_description="T2, T4",
+                class_code=f"HX{i:04d}",
+            )
+            for i, course in enumerate(courses)
+        ]
+        classes += [
+            CourseClass.objects.create(
+                course=courses[0],
+                title=f"Lớp bổ sung {i}",
+                short_description="Mô tả",
+                address="Hà Nội",
+                schedule_description="T3, T5",
+                class_code=f"HXB{i:03d}",
+            )
+            for i in range(cls.ROWS)
+        ]
+
+        for i in range(cls.ROWS):
+            user = User.objects.create_user(
+                email=f"student{i}@example.com", username=f"student{i}", password='password'
+            )
+            if i % 2 == 0:
+                Student.objects.create(
+                    user=user,
+                    name=f"Học sinh {i}",
+                    date_of_birth=date(2010, 1, 1),
+                    student_id=f"HS{i:04d}",
+                    phone="0900000000",
+                    address="Hà Nội",
+                    parent_name="Phụ huynh",
+                    parent_phone="0900000001",
+                )
+            for course_class in (classes[i], classes[cls.ROWS + i]):
+                StudentCourseEnrollment.objects.create(
+                    user=user,
+                    course=course_class.course,
+                    course_class=course_class,
+                    tuition_fee=1000000,
+                )
+            inquiry = StudentInquiry.objects.create(
+                student_name=f"Học sinh {i}",
+                student_age=15,
+                contact_name="Phụ huynh",
+                email=f"parent{i}@example.com",
+                phone="0900000002",
+            )
+            inquiry.interested_courses.set(courses[:2])
+            ContactInquiry.objects.create(
+                full_name=f"Liên hệ {i}",
+                phone="0900000003",
+                course=classes[i].course,
+                course_class=classes[i],
+            )
+            FAQ.objects.create(question=f"Câu hỏi {i}", answer="Trả lời", category=categories[i % len(categories)])
+            Banner.objects.create(title=f"Banner {i}", image=f"banners/{i}.jpg")
+            SiteSettings.objects.create(key=f"setting_{i}", value="value")
+            ContactInfo.objects.create(address="Hà Nội", phone="0900000004", email=f"info{i}@example.com")
+
+        news_categories = [
+            NewsCategory.objects.create(name=f"Tin {i}", course=courses[i])
+            for i in range(cls.ROWS)
+        ]
+        for i in range(cls.ROWS):
+            News.objects.create(
+                category=news_categories[i],
+                title=f"Bản tin {i}",
+                short_description="Mô tả",
+            )
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def assertQueryBudget(self, url, budget):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertLessEqual(
+            len(queries), budget,
+            f"{url} ran {len(queries)} queries (budget {budget}):\n" +
+            "\n".join(query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_every_admin_has_budget(self):
+        self.assertEqual(set(admin.site._registry) - set(self.BUDGETS), set())
+
+    def test_changelist_query_budgets(self):
+        for model, (budget, _) in self.BUDGETS.items():
+            with self.subTest(model=model.__name__):
+                opts = model._meta
+                self.assertQueryBudget(reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'), budget)
+
+    def test_change_form_query_budgets(self):
+        for model, (_, budget) in self.BUDGETS.items():
+            with self.subTest(model=model.__name__):
+                opts = model._meta
+                obj = model._default_manager.order_by('pk').first()
+                self.assertQueryBudget(reverse(f'admin:{opts.app_label}_{opts.model_name}_change', args=[obj.pk]), budget)
+
+    def export(self, model, action):
+        opts = model._meta
+        url = reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+        data = {
+            'action': action, 'select_across': '1', 'index': '0',
+            ACTION_CHECKBOX_NAME: [str(model._default_manager.first().pk)],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data)
+            content = b''.join(response.streaming_content if response.streaming else [response.content])
+        return response, content, len(queries)
+
+    def test_csv_export_streams_rows_with_constant_queries(self):
+        response, content, queries = self.export(StudentCourseEnrollment, 'export_csv')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:2], ['Tên học sinh', 'Email'])
+        self.assertEqual(len(rows), 2 + 2 * self.ROWS)
+        self.assertIn(['Học sinh 0', 'student0@example.com'], [row[:2] for row in rows])
+        self.assertIn('Chờ xác nhận', [row[6] for row in rows])
+        self.assertEqual(rows[-1][0], 'Tổng cộng')
+        self.assertEqual(rows[-1][7:10], [str(2 * self.ROWS * 1000000), '0', str(2 * self.ROWS * 1000000)])
+        self.assertLessEqual(queries, self.EXPORT_BUDGET)
+
+    def test_every_export_action(self):
+        for model in (ContactInquiry, StudentCourseEnrollment, StudentInquiry):
+            for action in ('export_csv', 'export_xlsx'):
+                with self.subTest(model=model.__name__, action=action):
+                    response, content, queries = self.export(model, action)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertIn('attachment', response['Content-Disposition'])
+                    self.assertTrue(content)
+                    self.assertLessEqual(queries, self.EXPORT_BUDGET)
+
+
+@mock.patch('config.uploads.s3.get_s3_client')
+class DirectUploadTests(TestCase):
+    """The admin only signs uploads and checks the result; file bytes go straight to MinIO."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(
+            email='admin@example.com', username='admin', password='password'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def post(self, name, data):
+        return self.client.post(reverse(f'admin:{name}'), json.dumps(data), content_type='application/json')
+
+    def test_small_file_gets_presigned_post(self, get_client):
+        get_client.return_value.generate_presigned_post.return_value = {
+            'success': True, 'url': 'http://minio/bucket', 'fields': {'policy': 'p'}
+        }
+
+        response = self.post('upload_start', {
+            'target': 'course.course.image_key', 'filename': 'ảnh bìa.png', 'size': 1024, 'content_type': 'image/png'
+        })
+
+        self.assertEqual(response.status_code, 200)
+        key = response.json()['key']
+        self.assertRegex(key, r'^public/courses/[0-9a-f]{32}/.+\.png$')
+        self.assertEqual(response.json()['fields'], {'policy': 'p'})
+        get_client.return_value.generate_presigned_post.assert_called_once_with(
+            key, 'image/png', KINDS['image'].max_size, expiration=EXPIRATION
+        )
+
+    def test_large_file_is_uploaded_in_parts(self, get_client):
+        get_client.return_value.create_multipart_upload.return_value = {
+            'success': True, 'upload_id': 'u1', 'urls': ['http://minio/1', 'http://minio/2']
+        }
+
+        response = self.post('upload_start', {
+            'target': 'course.coursefile.file_key', 'filename': 'video.mp4',
+            'size': MULTIPART_THRESHOLD + 1, 'content_type': 'video/mp4'
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['upload_id'], 'u1')
+        self.assertEqual(response.json()['part_size'], PART_SIZE)
+        self.assertEqual(get_client.return_value.create_multipart_upload.call_args.args[1], 5)
+
+    def test_rejected_uploads(self, get_client):
+        for data in [
+            {'target': 'user.user.password', 'filename': 'a.png', 'size': 1, 'content_type': 'image/png'},
+            {'target': 'news.news.image_key', 'filename': 'a.pdf', 'size': 1, 'content_type': 'application/pdf'},
+            {'target': 'news.news.image_key', 'filename': 'a.png', 'size': 10 ** 9, 'content_type': 'image/png'},
+            {'target': 'news.news.image_key', 'filename': 'a.svg', 'size': 1, 'content_type': 'image/svg+xml'},
+            {'target': 'news.news.image_key', 'filename': 'a.svg', 'size': 1, 'content_type': 'Image/SVG+XML; charset=utf-8'},
+        ]:
+            with self.subTest(data=data):
+                response = self.post('upload_start', data)
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()['success'])
+        get_client.return_value.generate_presigned_post.assert_not_called()
+
+    def test_finish_completes_parts_and_checks_object(self, get_client):
+        client = get_client.return_value
+        client.complete_multipart_upload.return_value = {'success': True}
+        client.get_file_info.return_value = {'success': True, 'size': 2048, 'content_type': 'application/pdf'}
+        key = 'private/materials/0123456789abcdef0123456789abcdef/De_cuong.PDF'
+
+        response = self.post('upload_finish', {
+            'target': 'course.coursefile.file_key', 'key': key,
+            'upload_id': 'u1', 'parts': [{'PartNumber': 1, 'ETag': '"e1"'}],
+        })
+
+        self.assertEqual(response.json(), {
+            'success': True, 'key': key, 'size': 2048, 'content_type': 'application/pdf', 'file_type': 'pdf'
+        })
+        client.complete_multipart_upload.assert_called_once_with(key, 'u1', [{'PartNumber': 1, 'ETag': '"e1"'}])
+
+    def test_finish_rejects_foreign_key(self, get_client):
+        response = self.post('upload_finish', {'target': 'news.news.image_key', 'key': 'private/materials/x/a.pdf'})
+
+        self.assertEqual(response.status_code, 400)
+        get_client.return_value.get_file_info.assert_not_called()
+
+    def test_finish_deletes_svg_object(self, get_client):
+        client = get_client.return_value
+        client.get_file_info.return_value = {'success': True, 'size': 10, 'content_type': 'image/svg+xml'}
+        key = 'public/news/0123456789abcdef0123456789abcdef/a.png'
+
+        response = self.post('upload_finish', {'target': 'news.news.image_key', 'key': key})
+
+        self.assertEqual(response.status_code, 400)
+        client.delete_file.assert_called_once_with(key)
+
+    def test_abort_discards_parts(self, get_client):
+        client = get_client.return_value
+        client.abort_multipart_upload.return_value = {'success': True, 'key': 'k'}
+        key = 'private/materials/0123456789abcdef0123456789abcdef/video.mp4'
+
+        response = self.post('upload_abort', {'target': 'course.coursefile.file_key', 'key': key, 'upload_id': 'u1'})
+
+        self.assertEqual(response.json(), {'success': True})
+        client.abort_multipart_upload.assert_called_once_with(key, 'u1')
+
+    def test_abort_rejects_foreign_key(self, get_client):
+        for data in [
+            {'target': 'course.coursefile.file_key', 'key': 'public/news/x/a.png', 'upload_id': 'u1'},
+            {'target': 'course.coursefile.file_key', 'key': 'private/materials/x/a.pdf'},
+        ]:
+            with self.subTest(data=data):
+                self.assertEqual(self.post('upload_abort', data).status_code, 400)
+        get_client.return_value.abort_multipart_upload.assert_not_called()
+
+    def test_change_form_renders_upload_widget(self, get_client):
+        category = CourseCategory.objects.create(name="Danh mục")
+        course = Course.objects.create(category=category, title="Khóa học", short_description="Mô tả")
+
+        response = self.client.get(reverse('admin:course_course_change', args=[course.pk]))
+
+        self.assertContains(response, 'data-target="course.course.image_key"')
+        self.assertContains(response, 'data-target="course.coursefile.file_key"')
+        self.assertContains(response, 'js/direct-upload.js')
+        self.assertContains(response, f'data-abort-url="{reverse("admin:upload_abort")}"')
+        get_client.assert_not_called()
+
+
+@mock.patch('config.storage_gc.s3.get_s3_client')
+class StorageGCTests(TestCase):
+    """Objects no key column references are deleted once they are older than the grace period."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = CourseCategory.objects.create(name="Danh mục")
+        Course.objects.create(
+            category=category, title="Khóa học", short_description="Mô tả", image_key='public/courses/a/live.png'
+        )
+        Banner.objects.create(title="Banner", image='public/banners/b/banner.png')
+        user = User.objects.create_user(email='user@example.com', username='user', password='password')
+        UserProfile.objects.update_or_create(
+            user=user, defaults={'profile_picture': f'profile_pictures/{user.pk}/{"0" * 32}_full.jpg'}
+        )
+        cls.thumbnail = f'profile_pictures/{user.pk}/{"0" * 32}_thumb.jpg'
+
+    def listing(self, get_client, objects):
+        client = get_client.return_value
+        client.bucket_name = 'hexagon-storage'
+        old = timezone.now() - timedelta(days=7)
+        listed = [
+            {'key': key, 'size': size, 'last_modified': modified or old}
+            for key, size, modified in objects
+        ]
+        client.iter_files.side_effect = lambda prefix: [o for o in listed if o['key'].startswith(prefix)]
+        client.delete_files.side_effect = lambda keys: {'success': True, 'deleted': len(keys), 'errors': {}}
+        return client
+
+    def test_key_columns_cover_every_key_field(self, get_client):
+        columns = key_columns()
+
+        self.assertIn(('course', 'image_key'), columns)
+        self.assertIn(('course_file', 'file_key'), columns)
+        self.assertIn(('banner', 'image'), columns)
+        self.assertIn(('user_profile', 'profile_picture'), columns)
+
+    def test_dry_run_reports_orphans_without_deleting(self, get_client):
+        client = self.listing(get_client, [
+            ('public/courses/a/live.png', 10, None),
+            ('public/courses/c/replaced.png', 100, None),
+            ('public/banners/b/banner.png', 10, None),
+            (self.thumbnail, 5, None),
+            ('public/news/d/just-uploaded.png', 1000, timezone.now()),
+        ])
+
+        with self.assertNumQueries(1):
+            report = collect_garbage(dry_run=True)
+
+        self.assertEqual(report.scanned, 5)
+        self.assertEqual(report.live, 3)
+        self.assertEqual(report.recent, 1)
+        self.assertEqual((report.orphaned, report.orphaned_bytes), (1, 100))
+        self.assertEqual(report.samples, ['public/courses/c/replaced.png'])
+        client.delete_files.assert_not_called()
+
+    def test_orphans_are_deleted_in_batches(self, get_client):
+        orphans = [(f'private/materials/{i}/old.pdf', 1, None) for i in range(1500)]
+        client = self.listing(get_client, [('public/courses/a/live.png', 10, None)] + orphans)
+
+        report = collect_garbage(dry_run=False)
+
+        self.assertEqual(report.deleted, 1500)
+        self.assertEqual([len(c.args[0]) for c in client.delete_files.call_args_list], [1000, 500])
+        deleted = {key for c in client.delete_files.call_args_list for key in c.args[0]}
+        self.assertNotIn('public/courses/a/live.png', deleted)
+
+    def test_stale_multipart_uploads_are_aborted(self, get_client):
+        client = self.listing(get_client, [])
+        client.iter_multipart_uploads.side_effect = lambda prefix: [
+            {'key': f'{prefix}x/old.mp4', 'upload_id': 'old', 'initiated': timezone.now() - timedelta(days=2)},
+            {'key': f'{prefix}y/new.mp4', 'upload_id': 'new', 'initiated': timezone.now()},
+        ] if prefix == 'private/' else []
+        client.abort_multipart_upload.return_value = {'success': True}
+
+        dry = collect_garbage(dry_run=True)
+        client.abort_multipart_upload.assert_not_called()
+        report = collect_garbage(dry_run=False)
 
-# Create your tests here.
+        self.assertEqual((dry.stale_uploads, report.stale_uploads, report.aborted_uploads), (1, 1, 1))
+        client.abort_multipart_upload.assert_called_once_with('private/x/old.mp4', 'old')
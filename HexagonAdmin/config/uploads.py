@@ -0,0 +1,193 @@
+"""
+Tải file từ trình duyệt thẳng lên MinIO.
+
+Form quản trị chỉ xin Django một chính sách tải lên đã ký (presigned POST, hoặc
+các URL PUT cho từng phần khi file lớn), trình duyệt gửi file trực tiếp tới
+MinIO, rồi báo lại key để Django kiểm tra object trước khi điền vào ô key.
+Lần tải theo phần bị lỗi hoặc bị bỏ dở được hủy qua `abort_upload`; phần nào
+còn sót lại (trình duyệt bị tắt đột ngột) sẽ do lệnh gc_storage dọn.
+Worker của Django không phải nhận hay giữ nội dung file.
+"""
+import math
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from django import forms
+from django.urls import reverse
+from django.utils.text import get_valid_filename
+
+from .utils import s3
+
+
+@dataclass(frozen=True)
+class UploadKind:
+    max_size: int
+    content_type_prefix: str = ''
+    excluded_types: frozenset = frozenset()
+    multipart: bool = False
+
+    def accepts(self, content_type):
+        content_type = content_type.split(';')[0].strip().lower()
+        return content_type.startswith(self.content_type_prefix) and content_type not in self.excluded_types
+
+
+MB = 1024 * 1024
+
+KINDS = {
+    # SVG có thể chứa script, chạy được khi mở ảnh công khai trực tiếp trên domain MinIO
+    'image': UploadKind(max_size=20 * MB, content_type_prefix='image/', excluded_types=frozenset({'image/svg+xml'})),
+    'file': UploadKind(max_size=5 * 1024 * MB, multipart=True),
+}
+
+# Từ kích thước này file được chia phần; MinIO yêu cầu mỗi phần (trừ phần cuối) >= 5MB
+MULTIPART_THRESHOLD = 64 * MB
+PART_SIZE = 16 * MB
+EXPIRATION = 3600
+
+# "app_label.model_name.field": (loại file, thư mục trong bucket)
+UPLOAD_TARGETS = {
+    'about.aboutsection.image_key': ('image', 'public/about'),
+    'about.aboutcontentblock.image_key': ('image', 'public/about'),
+    'config.banner.image': ('image', 'public/banners'),
+    'course.course.image_key': ('image', 'public/courses'),
+    'course.courseclass.image_key': ('image', 'public/courses'),
+    'course.coursecontentblock.image_key': ('image', 'public/courses'),
+    'course.courseadditionalcontentblock.image_key': ('image', 'public/courses'),
+    'course.courseroadmap.image_key': ('image', 'public/roadmaps'),
+    'course.roadmapcontentblock.image_key': ('image', 'public/roadmaps'),
+    'course.outstandingstudent.image_key': ('image', 'public/students'),
+    'course.coursefile.file_key': ('file', 'private/materials'),
+    'news.news.image_key': ('image', 'public/news'),
+    'news.newscontentblock.image_key': ('image', 'public/news'),
+    'roadmap.generalroadmap.image_key': ('image', 'public/roadmaps'),
+    'roadmap.generalroadmapcontentblock.image_key': ('image', 'public/roadmaps'),
+}
+
+
+class UploadError(Exception):
+    pass
+
+
+def upload_target(target):
+    try:
+        kind, prefix = UPLOAD_TARGETS[target]
+    except KeyError:
+        raise UploadError("Trường không hỗ trợ tải file")
+    return KINDS[kind], prefix
+
+
+def check_key(target, key):
+    """Key phải nằm trong thư mục của trường, nếu không trình duyệt có thể đụng tới object khác."""
+    kind, prefix = upload_target(target)
+    if not key.startswith(f"{prefix}/") or '..' in key:
+        raise UploadError("Key không hợp lệ")
+    return kind
+
+
+def start_upload(target, filename, size, content_type):
+    """
+    Cấp key mới và quyền tải lên cho một file.
+
+    Returns:
+        {'key', 'url', 'fields'} cho presigned POST, hoặc
+        {'key', 'upload_id', 'part_size', 'urls'} khi tải theo từng phần.
+    """
+    kind, prefix = upload_target(target)
+    content_type = content_type or 'application/octet-stream'
+    if not isinstance(size, int) or size <= 0:
+        raise UploadError("Kích thước file không hợp lệ")
+    if size > kind.max_size:
+        raise UploadError(f"File vượt quá {kind.max_size // MB}MB")
+    if not kind.accepts(content_type):
+        raise UploadError("Định dạng file không được hỗ trợ")
+
+    name = get_valid_filename(Path(filename).name) if filename else ''
+    key = f"{prefix}/{uuid.uuid4().hex}/{name or 'file'}"
+
+    if kind.multipart and size > MULTIPART_THRESHOLD:
+        result = s3.get_s3_client().create_multipart_upload(
+            key, math.ceil(size / PART_SIZE), content_type, expiration=EXPIRATION
+        )
+        if not result['success']:
+            raise UploadError(result['error'])
+        return {'key': key, 'upload_id': result['upload_id'], 'part_size': PART_SIZE, 'urls': result['urls']}
+
+    result = s3.get_s3_client().generate_presigned_post(key, content_type, kind.max_size, expiration=EXPIRATION)
+    if not result['success']:
+        raise UploadError(result['error'])
+    return {'key': key, 'url': result['url'], 'fields': result['fields']}
+
+
+def finish_upload(target, key, upload_id=None, parts=None):
+    """
+    Ghép các phần (nếu có) và kiểm tra object đã nằm trên MinIO.
+
+    Returns:
+        {'key', 'size', 'content_type', 'file_type'}
+    """
+    kind = check_key(target, key)
+    client = s3.get_s3_client()
+    if upload_id:
+        result = client.complete_multipart_upload(key, upload_id, [
+            {'PartNumber': int(part['PartNumber']), 'ETag': str(part['ETag'])} for part in parts or []
+        ])
+        if not result['success']:
+            raise UploadError(result['error'])
+
+    info = client.get_file_info(key)
+    if not info['success']:
+        raise UploadError("Không tìm thấy file đã tải lên")
+    if info['size'] > kind.max_size or not kind.accepts(info['content_type']):
+        client.delete_file(key)
+        raise UploadError("File không hợp lệ")
+
+    return {
+        'key': key,
+        'size': info['size'],
+        'content_type': info['content_type'],
+        'file_type': Path(key).suffix.lstrip('.').lower()[:50],
+    }
+
+
+def abort_upload(target, key, upload_id):
+    """Hủy lần tải theo phần bị lỗi hoặc bị bỏ dở để MinIO xóa các phần đã nhận."""
+    check_key(target, key)
+    if not upload_id:
+        raise UploadError("Thiếu upload_id")
+    result = s3.get_s3_client().abort_multipart_upload(key, upload_id)
+    if not result['success']:
+        raise UploadError(result['error'])
+
+
+class DirectUploadWidget(forms.TextInput):
+    """Ô nhập key kèm nút chọn file tải thẳng lên MinIO"""
+    template_name = 'admin/widgets/direct_upload.html'
+
+    class Media:
+        js = ['js/direct-upload.js']
+
+    def __init__(self, target, attrs=None):
+        self.target = target
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget'].update({
+            'target': self.target,
+            'accept': 'image/*' if UPLOAD_TARGETS[self.target][0] == 'image' else '',
+            'start_url': reverse('admin:upload_start'),
+            'finish_url': reverse('admin:upload_finish'),
+            'abort_url': reverse('admin:upload_abort'),
+        })
+        return context
+
+
+class DirectUploadMixin:
+    """Dùng DirectUploadWidget cho các trường key có trong UPLOAD_TARGETS"""
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        target = f"{db_field.model._meta.app_label}.{db_field.model._meta.model_name}.{db_field.name}"
+        if target in UPLOAD_TARGETS:
+            kwargs['widget'] = DirectUploadWidget(target)
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
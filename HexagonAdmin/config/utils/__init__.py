@@ -5,9 +5,15 @@ from .s3 import (
     download_file,
     delete_file,
     list_files,
+    iter_files,
+    delete_files,
     file_exists,
     get_file_info,
     generate_presigned_url,
+    generate_presigned_post,
+    create_multipart_upload,
+    complete_multipart_upload,
+    abort_multipart_upload,
     copy_file,
     move_file
 )
@@ -19,9 +25,15 @@ __all__ = [
     'download_file',
     'delete_file',
     'list_files',
+    'iter_files',
+    'delete_files',
     'file_exists',
     'get_file_info',
     'generate_presigned_url',
+    'generate_presigned_post',
+    'create_multipart_upload',
+    'complete_multipart_upload',
+    'abort_multipart_upload',
     'copy_file',
     'move_file'
 ]
\ No newline at end of file
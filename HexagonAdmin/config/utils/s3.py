@@ -28,6 +28,10 @@ class S3Client:
         if self.use_https:
             self.endpoint_url = self.endpoint_url.replace('http://', 'https://')
 
+        # Browsers reach MinIO through a different host than the containers
+        self.public_endpoint_url = getattr(settings, 'MINIO_PUBLIC_URL', '') or self.endpoint_url
+        self._signer = None
+
         self.config = Config(
             region_name='us-east-1',
             retries={
@@ -62,6 +66,21 @@ class S3Client:
             logger.error(f"S3 connection test failed: {str(e)}")
             raise
 
+    @property
+    def signer(self):
+        """Client for URLs opened by the browser, signed for the public endpoint"""
+        if self.public_endpoint_url == self.endpoint_url:
+            return self.client
+        if self._signer is None:
+            self._signer = boto3.client(
+                's3',
+                endpoint_url=self.public_endpoint_url,
+                aws_access_key_id=self.access_key,
+                aws_secret_access_key=self.secret_key,
+                config=self.config
+            )
+        return self._signer
+
     def _get_content_type(self, file_path: str) -> str:
         """Get content type based on file extension"""
         content_type, _ = mimetypes.guess_type(file_path)
@@ -325,6 +344,94 @@ class S3Client:
                 'prefix': prefix
             }
 
+    def iter_files(self, prefix: str = '', page_size: int = 1000):
+        """
+        Stream objects under a prefix page by page (list_objects_v2).
+
+        Unlike list_files, nothing is accumulated: each page is fetched only
+        when the caller has consumed the previous one.
+
+        Args:
+            prefix: Key prefix to filter
+            page_size: Keys per list request (at most 1000)
+
+        Yields:
+            {'key', 'size', 'last_modified'} with last_modified as an aware datetime
+        """
+        paginator = self.client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=prefix,
+            PaginationConfig={'PageSize': page_size}
+        )
+        for page in pages:
+            for obj in page.get('Contents', []):
+                yield {
+                    'key': obj['Key'],
+                    'size': obj['Size'],
+                    'last_modified': obj['LastModified']
+                }
+
+    def iter_multipart_uploads(self, prefix: str = ''):
+        """
+        Stream multipart uploads under a prefix that were started but never completed or aborted
+
+        Args:
+            prefix: Key prefix to filter
+
+        Yields:
+            {'key', 'upload_id', 'initiated'} with initiated as an aware datetime
+        """
+        paginator = self.client.get_paginator('list_multipart_uploads')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for upload in page.get('Uploads', []):
+                yield {
+                    'key': upload['Key'],
+                    'upload_id': upload['UploadId'],
+                    'initiated': upload['Initiated']
+                }
+
+    def delete_files(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Delete many files with multi-object delete requests (1000 keys per request)
+
+        Args:
+            keys: S3 object keys
+
+        Returns:
+            Dictionary with delete result; 'errors' maps failed keys to messages
+        """
+        keys = list(dict.fromkeys(keys))
+        errors = {}
+        try:
+            for i in range(0, len(keys), 1000):
+                response = self.client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={
+                        'Objects': [{'Key': key} for key in keys[i:i + 1000]],
+                        'Quiet': True
+                    }
+                )
+                for error in response.get('Errors', []):
+                    errors[error['Key']] = error.get('Message', error.get('Code', ''))
+
+        except Exception as e:
+            logger.error(f"Failed to delete files: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'errors': errors
+            }
+
+        if errors:
+            logger.error(f"Failed to delete {len(errors)} of {len(keys)} files")
+        logger.info(f"Files deleted: {len(keys) - len(errors)}")
+        return {
+            'success': not errors,
+            'deleted': len(keys) - len(errors),
+            'errors': errors
+        }
+
     def file_exists(self, key: str) -> bool:
         """
         Check if file exists in S3/MinIO
@@ -446,6 +553,178 @@ class S3Client:
                 'key': key
             }
 
+    def generate_presigned_post(
+            self,
+            key: str,
+            content_type: str,
+            max_size: int,
+            expiration: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Generate presigned POST policy for a browser upload of a single object
+
+        Args:
+            key: S3 object key
+            content_type: MIME type the upload must be sent with
+            max_size: Maximum object size in bytes
+            expiration: Policy expiration in seconds
+
+        Returns:
+            Dictionary with the form URL and fields
+        """
+        try:
+            if not self._ensure_bucket_exists():
+                raise Exception(f"Bucket {self.bucket_name} not accessible")
+
+            post = self.signer.generate_presigned_post(
+                self.bucket_name,
+                key,
+                Fields={'Content-Type': content_type},
+                Conditions=[
+                    {'Content-Type': content_type},
+                    ['content-length-range', 0, max_size],
+                ],
+                ExpiresIn=expiration
+            )
+
+            return {
+                'success': True,
+                'key': key,
+                'url': post['url'],
+                'fields': post['fields'],
+                'expires_at': (datetime.now() + timedelta(seconds=expiration)).isoformat()
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to generate presigned POST for {key}: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'key': key
+            }
+
+    def create_multipart_upload(
+            self,
+            key: str,
+            part_count: int,
+            content_type: Optional[str] = None,
+            expiration: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Start a multipart upload and presign a PUT URL for each part
+
+        Args:
+            key: S3 object key
+            part_count: Number of parts the browser will upload
+            content_type: MIME type (auto-detected if None)
+            expiration: URL expiration in seconds
+
+        Returns:
+            Dictionary with the upload id and part URLs (part numbers start at 1)
+        """
+        try:
+            if not self._ensure_bucket_exists():
+                raise Exception(f"Bucket {self.bucket_name} not accessible")
+
+            upload = self.client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=key,
+                ContentType=content_type or self._get_content_type(key)
+            )
+            upload_id = upload['UploadId']
+
+            urls = [
+                self.signer.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': self.bucket_name,
+                        'Key': key,
+                        'UploadId': upload_id,
+                        'PartNumber': part_number
+                    },
+                    ExpiresIn=expiration
+                )
+                for part_number in range(1, part_count + 1)
+            ]
+
+            return {
+                'success': True,
+                'key': key,
+                'upload_id': upload_id,
+                'urls': urls,
+                'expires_at': (datetime.now() + timedelta(seconds=expiration)).isoformat()
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to create multipart upload for {key}: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'key': key
+            }
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Assemble the uploaded parts into the final object
+
+        Args:
+            key: S3 object key
+            upload_id: Id returned by create_multipart_upload
+            parts: [{'PartNumber': ..., 'ETag': ...}] in part order
+
+        Returns:
+            Dictionary with complete result
+        """
+        try:
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+
+            logger.info(f"Multipart upload completed: {key}")
+            return {
+                'success': True,
+                'key': key,
+                'uploaded_at': datetime.now().isoformat()
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to complete multipart upload {key}: {str(e)}")
+            self.abort_multipart_upload(key, upload_id)
+            return {
+                'success': False,
+                'error': str(e),
+                'key': key
+            }
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> Dict[str, Any]:
+        """
+        Abort a multipart upload and discard its uploaded parts
+
+        Args:
+            key: S3 object key
+            upload_id: Id returned by create_multipart_upload
+
+        Returns:
+            Dictionary with abort result
+        """
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            return {
+                'success': True,
+                'key': key
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload {key}: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'key': key
+            }
+
     def copy_file(self, source_key: str, dest_key: str) -> Dict[str, Any]:
         """
         Copy file within the same bucket
@@ -550,6 +829,14 @@ def list_files(*args, **kwargs):
     return get_s3_client().list_files(*args, **kwargs)
 
 
+def iter_files(*args, **kwargs):
+    return get_s3_client().iter_files(*args, **kwargs)
+
+
+def delete_files(*args, **kwargs):
+    return get_s3_client().delete_files(*args, **kwargs)
+
+
 def file_exists(*args, **kwargs):
     return get_s3_client().file_exists(*args, **kwargs)
 
@@ -562,6 +849,22 @@ def generate_presigned_url(*args, **kwargs):
     return get_s3_client().generate_presigned_url(*args, **kwargs)
 
 
+def generate_presigned_post(*args, **kwargs):
+    return get_s3_client().generate_presigned_post(*args, **kwargs)
+
+
+def create_multipart_upload(*args, **kwargs):
+    return get_s3_client().create_multipart_upload(*args, **kwargs)
+
+
+def complete_multipart_upload(*args, **kwargs):
+    return get_s3_client().complete_multipart_upload(*args, **kwargs)
+
+
+def abort_multipart_upload(*args, **kwargs):
+    return get_s3_client().abort_multipart_upload(*args, **kwargs)
+
+
 def copy_file(*args, **kwargs):
     return get_s3_client().copy_file(*args, **kwargs)
 
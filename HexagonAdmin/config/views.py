@@ -2,7 +2,9 @@ from django.shortcuts import render, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 from .models import Site, SiteSettings, ContactInfo, FAQ, Banner
+from .uploads import UploadError, abort_upload, finish_upload, start_upload
 import json
 from django.contrib.auth import logout
 # Create your views here.
@@ -92,4 +94,40 @@ def quick_settings_api(request):
 @staff_member_required
 def logout_view(request):
     logout(request)
-    return redirect('admin:login')
\ No newline at end of file
+    return redirect('admin:login')
+
+
+@staff_member_required
+@require_POST
+def upload_start_view(request):
+    """Cấp key và chính sách tải lên đã ký để trình duyệt gửi file thẳng tới MinIO"""
+    try:
+        data = json.loads(request.body)
+        upload = start_upload(data.get('target'), data.get('filename'), data.get('size'), data.get('content_type'))
+    except (ValueError, UploadError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, **upload})
+
+
+@staff_member_required
+@require_POST
+def upload_finish_view(request):
+    """Xác nhận file đã nằm trên MinIO (ghép các phần nếu tải theo phần) và trả về thông tin file"""
+    try:
+        data = json.loads(request.body)
+        info = finish_upload(data.get('target'), data.get('key') or '', data.get('upload_id'), data.get('parts'))
+    except (ValueError, KeyError, TypeError, UploadError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, **info})
+
+
+@staff_member_required
+@require_POST
+def upload_abort_view(request):
+    """Hủy lần tải theo phần bị lỗi hoặc bị bỏ dở, xóa các phần đã tải lên MinIO"""
+    try:
+        data = json.loads(request.body)
+        abort_upload(data.get('target'), data.get('key') or '', data.get('upload_id'))
+    except (ValueError, TypeError, UploadError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True})
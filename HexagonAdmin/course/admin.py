@@ -1,39 +1,52 @@
 from django.contrib import admin
 from .models import *
 from config.admin import BaseModelAdmin
+from config.uploads import DirectUploadMixin
 
-class CourseContentBlockInline(admin.TabularInline):
+class CourseContentBlockInline(DirectUploadMixin, admin.TabularInline):
     model = CourseContentBlock
     extra = 0
 
 
-class CourseClassInline(admin.StackedInline):
+class CourseClassInline(DirectUploadMixin, admin.StackedInline):
     model = CourseClass
     extra = 0
     inlines = [CourseContentBlockInline]
+    readonly_fields = ['seat_occupancy']
 
+    def get_queryset(self, request):
+        # Tiêu đề mỗi dòng (__str__) hiển thị tên khóa học
+        return super().get_queryset(request).select_related('course').with_seat_counts()
 
-class CourseFileInline(admin.TabularInline):
+    def seat_occupancy(self, obj):
+        # The blank form for a new class has no annotation and nothing to count.
+        if getattr(obj, 'occupied_seats', None) is None:
+            return '-'
+        return f"{obj.occupied_seats}/{obj.max_students}"
+    seat_occupancy.short_description = 'Sĩ số hiện tại'
+
+
+class CourseFileInline(DirectUploadMixin, admin.TabularInline):
     model = CourseFile
     extra = 0
 
 
-class OutstandingStudentInline(admin.TabularInline):
+class OutstandingStudentInline(DirectUploadMixin, admin.TabularInline):
     model = OutstandingStudent
     extra = 0
 
 
-class RoadmapContentBlockInline(admin.StackedInline):
+class RoadmapContentBlockInline(DirectUploadMixin, admin.StackedInline):
     model = RoadmapContentBlock
     extra = 0
 
 
-class CourseRoadmapInline(admin.StackedInline):
+class CourseRoadmapInline(DirectUploadMixin, admin.StackedInline):
     model = CourseRoadmap
     inlines = [RoadmapContentBlockInline]
 
 
-class CourseAdditionalContentBlockInline(admin.StackedInline):
+class CourseAdditionalContentBlockInline(DirectUploadMixin, admin.StackedInline):
     model = CourseAdditionalContentBlock
     extra = 0
 
@@ -53,6 +66,7 @@ class CourseCategoryAdmin(admin.ModelAdmin):
 @admin.register(Course)
 class CourseAdmin(BaseModelAdmin):
     list_display = ['title', 'category', 'order', 'is_active']
+    list_select_related = ['category']
     list_filter = ['category', 'is_active']
     inlines = [
         CourseClassInline,
@@ -1,8 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CourseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'course'
     verbose_name = "Quản lý khóa học"
-    icon = 'fas fa-book-open'
\ No newline at end of file
+    icon = 'fas fa-book-open'
+
+    def ready(self):
+        from course.search import install_search_triggers
+        post_migrate.connect(install_search_triggers, sender=self)
+        post_migrate.connect(recount_reserved_seats, sender=self)
+
+
+def recount_reserved_seats(sender=None, using='default', **kwargs):
+    """Bring every class's `reserved_seats` in line with its enrollments after migrating."""
+    from course.models import CourseClass
+    CourseClass.objects.using(using).recount_reserved_seats()
@@ -1,10 +1,50 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from config.models import BaseModel
 from course.utils import SlugMixin
 
 
-class CourseCategory(BaseModel, SlugMixin):
+# Enrollment statuses holding a seat in a class (same as OCCUPYING_STATUSES in HexagonApi/app/model/db.py)
+OCCUPYING_STATUSES = ('pending', 'enrolled', 'studying')
+
+
+class CourseClassQuerySet(models.QuerySet):
+    def with_seat_counts(self):
+        """Annotate `occupied_seats` for every class in one GROUP BY query."""
+        return self.annotate(
+            occupied_seats=models.Count(
+                'enrollments',
+                filter=models.Q(enrollments__is_active=True, enrollments__status__in=OCCUPYING_STATUSES)
+            )
+        )
+
+    def recount_reserved_seats(self):
+        """
+        Reset `reserved_seats` of the classes to their occupying enrollments.
+
+        The API reserves seats by incrementing the counter; everything else
+        (admin edits, status changes, deletions) recounts. The rows are locked
+        first so the count sees reservations committed while waiting.
+        """
+        from enrollment.models import StudentCourseEnrollment
+
+        occupied = StudentCourseEnrollment.objects.filter(
+            course_class=models.OuterRef('pk'),
+            is_active=True,
+            status__in=OCCUPYING_STATUSES,
+        ).order_by().values('course_class').annotate(count=models.Count('pk')).values('count')
+
+        with transaction.atomic(using=self.db):
+            class_ids = list(self.select_for_update().values_list('pk', flat=True))
+            return self.model.objects.using(self.db).filter(pk__in=class_ids).update(
+                reserved_seats=Coalesce(models.Subquery(occupied), 0)
+            )
+
+
+class CourseCategory(SlugMixin, BaseModel):
     """Danh mục khóa học"""
     name = models.CharField(max_length=100, verbose_name=_("Tên danh mục"))
     slug = models.SlugField(unique=True, blank=True)
@@ -21,19 +61,23 @@ class CourseCategory(BaseModel, SlugMixin):
         return self.name
 
 
-class Course(BaseModel, SlugMixin):
+class Course(SlugMixin, BaseModel):
     """Khóa học chính"""
+    slug_source_field = 'title'
+
     category = models.ForeignKey(CourseCategory, on_delete=models.CASCADE)
     title = models.CharField(max_length=200, verbose_name=_("Tiêu đề"))
     short_description = models.TextField(verbose_name=_("Mô tả ngắn"))
     image_key = models.CharField(max_length=255, blank=True, verbose_name=_("Key ảnh"))
     slug = models.SlugField(unique=True, blank=True)
     order = models.IntegerField(default=0, verbose_name=_("Thứ tự"))
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         db_table = 'course'
         verbose_name = _("Khóa học")
         verbose_name_plural = _("Khóa học")
+        indexes = [GinIndex(fields=['search_vector'], name='course_search_vector_gin')]
 
     def __str__(self):
         return self.title
@@ -69,6 +113,14 @@ class CourseClass(BaseModel):
         default=30,
         verbose_name=_("Sĩ số tối đa")
     )
+    reserved_seats = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_("Số chỗ đã giữ"),
+        help_text=_("Cập nhật tự động khi có đăng ký mới, đổi trạng thái hoặc xóa đăng ký")
+    )
+
+    objects = CourseClassQuerySet.as_manager()
 
     class Meta:
         db_table = 'course_class'
@@ -80,7 +132,10 @@ class CourseClass(BaseModel):
 
     @property
     def current_students_count(self):
-        return self.enrollments.filter(status__in=['enrolled', 'studying']).count()
+        occupied = getattr(self, 'occupied_seats', None)
+        if occupied is None:
+            occupied = self.enrollments.filter(is_active=True, status__in=OCCUPYING_STATUSES).count()
+        return occupied
 
     @property
     def available_slots(self):
@@ -0,0 +1,196 @@
+"""
+Full-text search index for courses and news.
+
+`course.search_vector` and `news.search_vector` are maintained by database
+triggers, so they stay current whether rows change through the admin, the API
+or bulk loads. Text is accent-folded by `hexagon_fold()`, a SQL function built
+from `SlugConverter.VIETNAMESE_CHAR_MAP`, and the API folds queries with the
+same function.
+
+Changes to the rows behind the API's search-as-you-type suggestions are
+announced on the `hexagon_search` notification channel so API processes can
+rebuild their in-memory index.
+
+The vectors are only recomputed when the indexed text changes: the row
+triggers fire on updates of `title` and `short_description`, and the block
+triggers refresh their parent by setting `search_vector`. Counter updates such
+as news views leave them alone.
+"""
+from django.db import connections
+
+from course.utils import SlugConverter
+
+
+def fold_function_sql():
+    source = ''.join(SlugConverter.VIETNAMESE_CHAR_MAP.keys())
+    target = ''.join(SlugConverter.VIETNAMESE_CHAR_MAP.values())
+    return f"""
+CREATE OR REPLACE FUNCTION hexagon_fold(value text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT lower(translate(coalesce(value, ''), '{source}', '{target}'))
+$$;
+"""
+
+
+JSON_TEXT_SQL = """
+CREATE OR REPLACE FUNCTION hexagon_json_text(value jsonb) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE jsonb_typeof(value)
+        WHEN 'array' THEN (SELECT string_agg(item, ' ') FROM jsonb_array_elements_text(value) AS item)
+        WHEN 'string' THEN value #>> '{}'
+        ELSE ''
+    END
+$$;
+"""
+
+COURSE_SQL = """
+CREATE OR REPLACE FUNCTION course_search_vector_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', hexagon_fold(NEW.title)), 'A') ||
+        setweight(to_tsvector('simple', hexagon_fold(NEW.short_description)), 'B') ||
+        setweight(to_tsvector('simple', hexagon_fold((
+            SELECT string_agg(concat_ws(' ', block.title, hexagon_json_text(block.descriptions)), ' ')
+            FROM course_content_block AS block
+            JOIN course_class AS cls ON cls.id = block.course_class_id
+            WHERE cls.course_id = NEW.id AND block.is_active
+        ))), 'C') ||
+        setweight(to_tsvector('simple', hexagon_fold((
+            SELECT string_agg(
+                concat_ws(' ', block.title, hexagon_json_text(block.descriptions), block.general_description), ' '
+            )
+            FROM course_additional_content_block AS block
+            JOIN course_additional_info AS info ON info.id = block.additional_info_id
+            WHERE info.course_id = NEW.id AND block.is_active
+        ))), 'C');
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS course_search_vector ON course;
+CREATE TRIGGER course_search_vector BEFORE INSERT OR UPDATE OF title, short_description, search_vector ON course
+    FOR EACH ROW EXECUTE FUNCTION course_search_vector_update();
+
+CREATE OR REPLACE FUNCTION course_content_block_search_touch() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE course SET search_vector = NULL
+    WHERE id IN (
+        SELECT course_id FROM course_class
+        WHERE id IN (NEW.course_class_id, OLD.course_class_id)
+    );
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS course_content_block_search ON course_content_block;
+CREATE TRIGGER course_content_block_search AFTER INSERT OR UPDATE OR DELETE ON course_content_block
+    FOR EACH ROW EXECUTE FUNCTION course_content_block_search_touch();
+
+CREATE OR REPLACE FUNCTION course_additional_block_search_touch() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE course SET search_vector = NULL
+    WHERE id IN (
+        SELECT course_id FROM course_additional_info
+        WHERE id IN (NEW.additional_info_id, OLD.additional_info_id)
+    );
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS course_additional_block_search ON course_additional_content_block;
+CREATE TRIGGER course_additional_block_search AFTER INSERT OR UPDATE OR DELETE ON course_additional_content_block
+    FOR EACH ROW EXECUTE FUNCTION course_additional_block_search_touch();
+"""
+
+NEWS_SQL = """
+CREATE OR REPLACE FUNCTION news_search_vector_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', hexagon_fold(NEW.title)), 'A') ||
+        setweight(to_tsvector('simple', hexagon_fold(NEW.short_description)), 'B') ||
+        setweight(to_tsvector('simple', hexagon_fold((
+            SELECT string_agg(
+                concat_ws(' ', block.title, hexagon_json_text(block.descriptions), block.general_description), ' '
+            )
+            FROM news_content_block AS block
+            WHERE block.news_id = NEW.id AND block.is_active
+        ))), 'C');
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS news_search_vector ON news;
+CREATE TRIGGER news_search_vector BEFORE INSERT OR UPDATE OF title, short_description, search_vector ON news
+    FOR EACH ROW EXECUTE FUNCTION news_search_vector_update();
+
+CREATE OR REPLACE FUNCTION news_content_block_search_touch() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE news SET search_vector = NULL WHERE id IN (NEW.news_id, OLD.news_id);
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS news_content_block_search ON news_content_block;
+CREATE TRIGGER news_content_block_search AFTER INSERT OR UPDATE OR DELETE ON news_content_block
+    FOR EACH ROW EXECUTE FUNCTION news_content_block_search_touch();
+"""
+
+SUGGEST_CHANNEL = 'hexagon_search'
+SUGGEST_TABLES = ('course', 'course_category', 'course_class', 'news')
+
+# Updates that only touch counters or derived columns (news views, reserved
+# seats, search vectors) do not change suggestions and are not announced. Notifications with
+# the same payload are merged per transaction, so bulk edits notify once.
+NOTIFY_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION search_suggest_notify() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND
+        (to_jsonb(NEW) - 'view_count' - 'reserved_seats' - 'updated_at' - 'search_vector') =
+        (to_jsonb(OLD) - 'view_count' - 'reserved_seats' - 'updated_at' - 'search_vector') THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('{SUGGEST_CHANNEL}', TG_TABLE_NAME);
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def notify_trigger_sql(table):
+    return f"""
+DROP TRIGGER IF EXISTS {table}_search_suggest ON {table};
+CREATE TRIGGER {table}_search_suggest AFTER INSERT OR UPDATE OR DELETE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION search_suggest_notify();
+"""
+
+
+BACKFILL_SQL = """
+UPDATE course SET search_vector = NULL WHERE search_vector IS NULL;
+UPDATE news SET search_vector = NULL WHERE search_vector IS NULL;
+"""
+
+
+def install_search_triggers(sender=None, using='default', **kwargs):
+    """
+    Create or replace the search functions and triggers, then index rows that
+    have no vector yet. Connected to `post_migrate`; safe to run repeatedly.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(fold_function_sql())
+        cursor.execute(JSON_TEXT_SQL)
+        cursor.execute(COURSE_SQL)
+        cursor.execute(NEWS_SQL)
+        cursor.execute(NOTIFY_FUNCTION_SQL)
+        for table in SUGGEST_TABLES:
+            cursor.execute(notify_trigger_sql(table))
+        cursor.execute(BACKFILL_SQL)
@@ -1,4 +1,95 @@
-from config.utils import SlugConverter
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+
+from course.models import Course, CourseCategory
+from course.utils import SlugConverter
+from news.models import News, NewsCategory, NewsContentBlock
+
+
+class NextFreeSlugTests(SimpleTestCase):
+    def setUp(self):
+        self.converter = SlugConverter()
+
+    def test_free_stem_is_used_as_is(self):
+        self.assertEqual(self.converter.next_free_slug('toan-lop-5', set()), 'toan-lop-5')
+        self.assertEqual(self.converter.next_free_slug('toan-lop-5', {'toan-lop-5-1'}), 'toan-lop-5')
+
+    def test_taken_stem_gets_lowest_free_number(self):
+        self.assertEqual(self.converter.next_free_slug('toan', {'toan'}), 'toan-1')
+        self.assertEqual(self.converter.next_free_slug('toan', {'toan', 'toan-1', 'toan-2'}), 'toan-3')
+
+    def test_gaps_are_reused(self):
+        self.assertEqual(self.converter.next_free_slug('toan', {'toan', 'toan-1', 'toan-3'}), 'toan-2')
+
+    def test_other_suffixes_are_ignored(self):
+        taken = {'toan', 'toan-lop-1', 'toan-1a', 'toan-²', 'toan-١'}
+        self.assertEqual(self.converter.next_free_slug('toan', taken), 'toan-1')
+
+    def test_separator_variant(self):
+        converter = SlugConverter(separator='_')
+        self.assertEqual(converter.next_free_slug('toan', {'toan', 'toan_1', 'toan-2'}), 'toan_2')
+
+
+class TakenSlugsTests(TestCase):
+    def test_only_stem_and_numbered_slugs_are_loaded(self):
+        for slug in ('thong-bao', 'thong-bao-2', 'thong-bao-lich-thi', 'thong-bao-lich-thi-1', 'thong-bao-2a'):
+            CourseCategory.objects.create(name=slug, slug=slug)
+        taken = SlugConverter().taken_slugs(CourseCategory, 'thong-bao')
+        self.assertEqual(taken, {'thong-bao', 'thong-bao-2'})
+
+
+class SearchVectorTriggerTests(TestCase):
+    """`search_vector` is recomputed when the indexed text changes, not on counter updates."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = CourseCategory.objects.create(name="Danh mục")
+        cls.course = Course.objects.create(category=category, title="Toán lớp năm", short_description="Mô tả")
+        cls.news = News.objects.create(
+            category=NewsCategory.objects.create(name="Tin tức"), title="Lịch thi", short_description="Mô tả"
+        )
+
+    def vector(self, table, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT search_vector::text FROM {table} WHERE id = %s", [pk])
+            return cursor.fetchone()[0]
+
+    def stale_title(self, table, pk):
+        """Change the title without the trigger, so a recomputed vector would differ."""
+        with connection.cursor() as cursor:
+            # Deferred foreign key checks of the fixtures would keep the table from being altered
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER {table}_search_vector")
+            cursor.execute(f"UPDATE {table} SET title = 'hoa hoc' WHERE id = %s", [pk])
+            cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER {table}_search_vector")
+
+    def test_view_count_update_keeps_news_vector(self):
+        self.stale_title('news', self.news.pk)
+        before = self.vector('news', self.news.pk)
+        self.assertIn("'thi'", before)
+
+        News.objects.filter(pk=self.news.pk).update(view_count=F('view_count') + 1)
+        self.assertEqual(self.vector('news', self.news.pk), before)
+
+        News.objects.filter(pk=self.news.pk).update(title="Lịch học")
+        self.assertIn("'hoc'", self.vector('news', self.news.pk))
+
+    def test_block_change_refreshes_news_vector(self):
+        NewsContentBlock.objects.create(news=self.news, title="Phòng thi", general_description="Tầng hai")
+        self.assertIn("'phong'", self.vector('news', self.news.pk))
+
+    def test_unindexed_update_keeps_course_vector(self):
+        self.stale_title('course', self.course.pk)
+        before = self.vector('course', self.course.pk)
+        self.assertIn("'toan'", before)
+
+        Course.objects.filter(pk=self.course.pk).update(order=F('order') + 1)
+        self.assertEqual(self.vector('course', self.course.pk), before)
+
+        Course.objects.filter(pk=self.course.pk).update(short_description="Đại số")
+        self.assertNotIn("'toan'", self.vector('course', self.course.pk))
+
 
 if __name__ == "__main__":
     converter = SlugConverter()
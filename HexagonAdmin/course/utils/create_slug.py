@@ -1,8 +1,13 @@
 import re
 import unicodedata
+from django.db import IntegrityError, models, transaction
 from django.utils.text import slugify
 
 
+_PUNCTUATION = re.compile(r'[^\w\s-]')
+_WHITESPACE = re.compile(r'\s+')
+
+
 class SlugConverter:
     """
     A utility class to convert strings into slugs, including handling Vietnamese characters.
@@ -35,19 +40,18 @@ class SlugConverter:
         'Ỳ': 'Y', 'Ý': 'Y', 'Ỵ': 'Y', 'Ỷ': 'Y', 'Ỹ': 'Y',
         'Đ': 'D'
     }
+    VIETNAMESE_TRANSLATION = str.maketrans(VIETNAMESE_CHAR_MAP)
 
     def __init__(self, separator='-', max_length=None):
         self.separator = separator
         self.max_length = max_length
+        self._separators = re.compile(f'{re.escape(separator)}+')
 
     def remove_vietnamese_accents(self, text):
         if not text:
             return ""
 
-        for vietnamese_char, latin_char in self.VIETNAMESE_CHAR_MAP.items():
-            text = text.replace(vietnamese_char, latin_char)
-
-        return text
+        return text.translate(self.VIETNAMESE_TRANSLATION)
 
     def clean_text(self, text):
         if not text:
@@ -55,10 +59,10 @@ class SlugConverter:
 
         text = text.strip()
         text = self.remove_vietnamese_accents(text)
-        text = re.sub(r'[^\w\s-]', '', text)
-        text = re.sub(r'\s+', self.separator, text)
+        text = _PUNCTUATION.sub('', text)
+        text = _WHITESPACE.sub(self.separator, text)
         text = text.lower()
-        text = re.sub(f'{re.escape(self.separator)}+', self.separator, text)
+        text = self._separators.sub(self.separator, text)
         text = text.strip(self.separator)
 
         if self.max_length and len(text) > self.max_length:
@@ -70,37 +74,80 @@ class SlugConverter:
         return self.clean_text(text)
 
     def create_unique_slug(self, model_class, title, slug_field='slug', instance=None):
-        base_slug = self.to_slug(title)
-        unique_slug = base_slug
-        counter = 1
+        """
+        Returns `slug`, or `slug-N` with the lowest free N.
+
+        Every taken `slug` and `slug-N` is fetched in one query, which only
+        matches those two forms: other slugs sharing the prefix
+        (`thong-bao-lich-thi`) are not transferred. If the suffixed slug would exceed the
+        field's max_length, the stem is shortened and the lookup repeated.
+        """
+        max_length = model_class._meta.get_field(slug_field).max_length
+        stem = self.to_slug(title)
+        if max_length:
+            stem = stem[:max_length].rstrip(self.separator)
 
         while True:
-            queryset = model_class.objects.filter(**{slug_field: unique_slug})
+            taken = self.taken_slugs(model_class, stem, slug_field, instance)
+            unique_slug = self.next_free_slug(stem, taken)
+            if not max_length or len(unique_slug) <= max_length:
+                return unique_slug
+            stem = stem[:max_length - (len(unique_slug) - len(stem))].rstrip(self.separator)
+
+    def taken_slugs(self, model_class, stem, slug_field='slug', instance=None):
+        # The prefix condition lets the slug index narrow the rows the regex checks
+        queryset = model_class._default_manager.filter(
+            models.Q(**{slug_field: stem}) |
+            models.Q(
+                **{f'{slug_field}__startswith': f'{stem}{self.separator}'},
+                **{f'{slug_field}__regex': rf'^{re.escape(stem + self.separator)}[0-9]+$'},
+            )
+        )
 
-            if instance:
-                queryset = queryset.exclude(pk=instance.pk)
+        if instance is not None and instance.pk is not None:
+            queryset = queryset.exclude(pk=instance.pk)
 
-            if not queryset.exists():
-                break
+        return set(queryset.values_list(slug_field, flat=True))
 
-            unique_slug = f"{base_slug}{self.separator}{counter}"
+    def next_free_slug(self, stem, taken):
+        if stem not in taken:
+            return stem
+
+        prefix = f"{stem}{self.separator}"
+        numbered = re.compile(rf'{re.escape(prefix)}([0-9]+)')
+        used = {
+            int(match.group(1))
+            for match in map(numbered.fullmatch, taken)
+            if match
+        }
+
+        counter = 1
+        while counter in used:
             counter += 1
 
-        return unique_slug
+        return f"{prefix}{counter}"
 
 
 class SlugMixin:
     """
     Mixin class to automatically generate slugs for Django models.
+
+    List it before the model base (`class News(SlugMixin, BaseModel)`) so its
+    `save` runs. When a concurrent save takes the allocated slug first, the
+    unique constraint rejects the insert and a new slug is allocated.
     """
 
     slug_converter = SlugConverter()
     slug_source_field = 'name'
     slug_field = 'slug'
+    slug_attempts = 5
 
     def save(self, *args, **kwargs):
-        if not getattr(self, self.slug_field):
-            source_text = getattr(self, self.slug_source_field, '')
+        if getattr(self, self.slug_field):
+            return super().save(*args, **kwargs)
+
+        source_text = getattr(self, self.slug_source_field, '')
+        for attempt in range(1, self.slug_attempts + 1):
             slug_value = self.slug_converter.create_unique_slug(
                 self.__class__,
                 source_text,
@@ -109,5 +156,16 @@ class SlugMixin:
             )
             setattr(self, self.slug_field, slug_value)
 
-        super().save(*args, **kwargs)
-
+            try:
+                with transaction.atomic(using=kwargs.get('using')):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == self.slug_attempts or not self._slug_taken(slug_value):
+                    raise
+                setattr(self, self.slug_field, '')
+
+    def _slug_taken(self, slug_value):
+        queryset = self.__class__._default_manager.filter(**{self.slug_field: slug_value})
+        if self.pk is not None:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset.exists()
@@ -1,11 +1,36 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.postgres.aggregates import StringAgg
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.template.response import TemplateResponse
+from django.urls import path
+from .importer import import_enrollments
 from .models import *
 from config.admin import BaseModelAdmin
+from config.exports import ExportMixin
+from course.models import CourseClass
+
+
+class EnrollmentImportForm(forms.Form):
+    file = forms.FileField(label="File CSV/XLSX")
+    tuition_fee = forms.DecimalField(
+        label="Học phí mặc định", required=False, min_value=0, max_digits=10, decimal_places=0,
+        help_text="Dùng cho các dòng không có cột tuition_fee"
+    )
+    status = forms.ChoiceField(
+        label="Trạng thái mặc định",
+        choices=StudentCourseEnrollment._meta.get_field('status').choices,
+        initial='enrolled',
+        help_text="Dùng cho các dòng không có cột status"
+    )
 
 
 @admin.register(Student)
 class StudentAdmin(BaseModelAdmin):
     list_display = ['name', 'student_id', 'user', 'parent_name', 'parent_phone', 'is_active']
+    list_select_related = ['user']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'student_id', 'parent_name', 'user__username']
 
@@ -17,22 +42,99 @@ class StudentAdmin(BaseModelAdmin):
 
 
 @admin.register(StudentCourseEnrollment)
-class StudentCourseEnrollmentAdmin(BaseModelAdmin):
+class StudentCourseEnrollmentAdmin(ExportMixin, BaseModelAdmin):
     list_display = ['get_student_name', 'user', 'course_class', 'status', 'payment_status', 'enrollment_date', 'enrollment_method']
+    list_select_related = ['user__student_profile', 'course_class__course']
     list_filter = ['status', 'payment_status', 'enrollment_method', 'course__category']
     search_fields = ['user__username', 'user__full_name', 'user__student_profile__name', 'course__title', 'course_class__title']
+    export_columns = [
+        ('Tên học sinh', Coalesce(
+            NullIf('user__student_profile__name', Value('')), NullIf('user__full_name', Value('')), 'user__username'
+        )),
+        ('Email', 'user__email'),
+        ('Khóa học', 'course__title'),
+        ('Lớp học', 'course_class__title'),
+        ('Mã lớp', 'course_class__class_code'),
+        ('Ngày đăng ký', 'enrollment_date'),
+        ('Trạng thái', 'status'),
+        ('Học phí', 'tuition_fee'),
+        ('Đã thanh toán', 'paid_amount'),
+        ('Còn lại', F('tuition_fee') - F('paid_amount')),
+        ('Trạng thái thanh toán', 'payment_status'),
+        ('Hình thức đăng ký', 'enrollment_method'),
+    ]
+    export_totals = {
+        'Học phí': Sum('tuition_fee'),
+        'Đã thanh toán': Sum('paid_amount'),
+        'Còn lại': Sum(F('tuition_fee') - F('paid_amount')),
+    }
 
     def get_student_name(self, obj):
         return obj.student_name
     get_student_name.short_description = 'Tên học sinh'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'course_class':
+            kwargs['queryset'] = CourseClass.objects.select_related('course')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
         return form
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='enrollment_studentcourseenrollment_import'
+            ),
+        ]
+        return custom_urls + urls
+
+    def import_view(self, request):
+        """Nhập hàng loạt đăng ký từ file CSV/XLSX và hiển thị báo cáo lỗi theo dòng"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        report = None
+        form = EnrollmentImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            try:
+                report = import_enrollments(
+                    form.cleaned_data['file'],
+                    default_fee=form.cleaned_data['tuition_fee'],
+                    default_status=form.cleaned_data['status'],
+                )
+            except ValidationError as e:
+                form.add_error('file', e)
+            else:
+                messages.success(request, f"Đã tạo {report.created}/{report.rows} đăng ký.")
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Nhập đăng ký từ file',
+            'opts': self.model._meta,
+            'form': form,
+            'report': report,
+        }
+        return TemplateResponse(request, 'admin/enrollment/import.html', context)
+
 
 @admin.register(StudentInquiry)
-class StudentInquiryAdmin(BaseModelAdmin):
+class StudentInquiryAdmin(ExportMixin, BaseModelAdmin):
     list_display = ['student_name', 'contact_name', 'phone', 'status', 'created_at']
     list_filter = ['status', 'created_at']
-    filter_horizontal = ['interested_courses']
\ No newline at end of file
+    filter_horizontal = ['interested_courses']
+    export_columns = [
+        ('Tên học sinh', 'student_name'),
+        ('Tuổi', 'student_age'),
+        ('Người liên hệ', 'contact_name'),
+        ('Email', 'email'),
+        ('Số điện thoại', 'phone'),
+        ('Khóa học quan tâm', StringAgg('interested_courses__title', ', ', distinct=True, default=Value(''))),
+        ('Tin nhắn', 'message'),
+        ('Trạng thái', 'status'),
+        ('Ngày gửi', 'created_at'),
+    ]
\ No newline at end of file
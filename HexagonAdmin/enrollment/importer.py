@@ -0,0 +1,283 @@
+"""
+Nhập hàng loạt đăng ký khóa học từ file CSV/XLSX.
+
+File được đọc theo luồng, từng dòng hợp lệ được ghi vào bảng tạm bằng `COPY`,
+sau đó người dùng và lớp được đối chiếu, kiểm tra trùng lặp và sĩ số, rồi ghi
+vào `student_course_enrollment` bằng vài câu lệnh SQL cho cả file.
+"""
+import codecs
+import csv
+import tempfile
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from course.models import OCCUPYING_STATUSES, CourseClass
+from enrollment.models import StudentCourseEnrollment
+
+
+# Tên cột chấp nhận trong dòng tiêu đề (không phân biệt hoa thường)
+COLUMNS = {
+    'user': ('user', 'email', 'username'),
+    'class_code': ('class_code',),
+    'tuition_fee': ('tuition_fee',),
+    'status': ('status',),
+    'notes': ('notes',),
+}
+REQUIRED_COLUMNS = ('user', 'class_code')
+STATUSES = {value for value, _ in StudentCourseEnrollment._meta.get_field('status').choices}
+FEE_FIELD = StudentCourseEnrollment._meta.get_field('tuition_fee')
+
+ERRORS = {
+    'user': "Không tìm thấy người dùng",
+    'class': "Không tìm thấy mã lớp",
+    'duplicate': "Trùng với một dòng phía trên trong file",
+    'enrolled': "Người dùng đã đăng ký lớp này",
+    'full': "Lớp đã đủ sĩ số",
+}
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)  # (dòng, người dùng, mã lớp, lỗi)
+
+    def add_error(self, line, user, class_code, message):
+        self.errors.append((line, user, class_code, message))
+
+
+#----------------------------------------------------------------
+# Reading
+#----------------------------------------------------------------
+def read_rows(uploaded_file):
+    """Đọc file theo từng dòng, trả về (số dòng, danh sách ô), bắt đầu từ dòng tiêu đề."""
+    extension = Path(uploaded_file.name).suffix.lower()
+    if extension == '.csv':
+        reader = csv.reader(codecs.iterdecode(uploaded_file, 'utf-8-sig'))
+        try:
+            for line, values in enumerate(reader, start=1):
+                yield line, values
+        except UnicodeDecodeError:
+            raise ValidationError("File CSV phải dùng mã hóa UTF-8.")
+    elif extension == '.xlsx':
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValidationError("Cần cài đặt openpyxl để nhập file XLSX.")
+        try:
+            workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        except Exception:
+            raise ValidationError("File XLSX không hợp lệ.")
+        try:
+            for line, values in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+                yield line, ['' if value is None else str(value) for value in values]
+        finally:
+            workbook.close()
+    else:
+        raise ValidationError("Chỉ hỗ trợ file .csv hoặc .xlsx.")
+
+
+def column_positions(header):
+    names = [str(name).strip().lower() for name in header]
+    positions = {}
+    for column, aliases in COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                positions[column] = names.index(alias)
+                break
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions]
+    if missing:
+        raise ValidationError(
+            "Thiếu cột: %(columns)s.", params={'columns': ", ".join(missing)}
+        )
+    return positions
+
+
+def parse_fee(text, default_fee):
+    if not text:
+        if default_fee is None:
+            raise ValueError("Thiếu học phí")
+        return default_fee
+    try:
+        fee = Decimal(text.replace(',', '').replace(' ', ''))
+    except InvalidOperation:
+        raise ValueError(f"Học phí không hợp lệ: {text}")
+    if fee < 0 or fee != fee.to_integral_value() or len(str(int(fee))) > FEE_FIELD.max_digits:
+        raise ValueError(f"Học phí không hợp lệ: {text}")
+    return fee
+
+
+def stage_rows(rows, default_fee, default_status, report, buffer):
+    """Kiểm tra từng dòng và ghi các dòng hợp lệ vào buffer CSV cho `COPY`."""
+    writer = csv.writer(buffer)
+    positions = None
+    for line, values in rows:
+        if not any(str(value).strip() for value in values):
+            continue
+        if positions is None:
+            positions = column_positions(values)
+            continue
+
+        report.rows += 1
+        cell = {
+            column: (values[position].strip() if position < len(values) else '')
+            for column, position in positions.items()
+        }
+        user, class_code = cell['user'], cell['class_code']
+        status = cell.get('status') or default_status
+        try:
+            if not user:
+                raise ValueError("Thiếu người dùng")
+            if not class_code:
+                raise ValueError("Thiếu mã lớp")
+            if status not in STATUSES:
+                raise ValueError(f"Trạng thái không hợp lệ: {status}")
+            fee = parse_fee(cell.get('tuition_fee'), default_fee)
+        except ValueError as e:
+            report.add_error(line, user, class_code, str(e))
+            continue
+        writer.writerow([line, user, class_code, fee, status, cell.get('notes', '')])
+
+    if positions is None:
+        raise ValidationError("File không có dữ liệu.")
+
+
+#----------------------------------------------------------------
+# Merging
+#----------------------------------------------------------------
+STAGING_SQL = """
+CREATE TEMPORARY TABLE enrollment_import (
+    line integer PRIMARY KEY,
+    login text NOT NULL,
+    class_code text NOT NULL,
+    tuition_fee numeric(10, 0) NOT NULL,
+    status varchar(20) NOT NULL,
+    notes text NOT NULL,
+    user_id uuid,
+    course_class_id uuid,
+    course_id uuid,
+    error text
+) ON COMMIT DROP
+"""
+
+COPY_SQL = """
+COPY enrollment_import (line, login, class_code, tuition_fee, status, notes) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (notes))
+"""
+
+LOCK_CLASSES_SQL = """
+SELECT id FROM course_class
+WHERE class_code IN (SELECT DISTINCT class_code FROM enrollment_import)
+ORDER BY id
+FOR UPDATE
+"""
+
+# Đối chiếu người dùng (email hoặc username) và lớp cho cả file, rồi gắn lỗi
+# đầu tiên của mỗi dòng. Chỗ trống của lớp được chia theo thứ tự dòng trong file.
+# Chỉ trạng thái chiếm chỗ mới tính vào sĩ số (xem OCCUPYING_STATUSES).
+RESOLVE_SQL = """
+WITH resolved AS (
+    SELECT
+        s.line, s.status, u.id AS user_id,
+        c.id AS course_class_id, c.course_id, c.max_students - c.reserved_seats AS free_seats
+    FROM enrollment_import s
+    LEFT JOIN LATERAL (
+        SELECT id FROM "user"
+        WHERE email = s.login OR username = s.login
+        ORDER BY email = s.login DESC
+        LIMIT 1
+    ) u ON true
+    LEFT JOIN course_class c ON c.class_code = s.class_code
+),
+checked AS (
+    SELECT resolved.*,
+        CASE
+            WHEN user_id IS NULL THEN 'user'
+            WHEN course_class_id IS NULL THEN 'class'
+            WHEN row_number() OVER (PARTITION BY user_id, course_class_id ORDER BY line) > 1 THEN 'duplicate'
+            WHEN EXISTS (
+                SELECT 1 FROM student_course_enrollment e
+                WHERE e.user_id = resolved.user_id AND e.course_class_id = resolved.course_class_id
+            ) THEN 'enrolled'
+        END AS error
+    FROM resolved
+),
+seated AS (
+    SELECT checked.*,
+        CASE WHEN error IS NULL AND status = ANY(%(occupying)s) THEN
+            row_number() OVER (
+                PARTITION BY course_class_id, error IS NULL AND status = ANY(%(occupying)s) ORDER BY line
+            )
+        END AS seat
+    FROM checked
+)
+UPDATE enrollment_import s
+SET user_id = seated.user_id,
+    course_class_id = seated.course_class_id,
+    course_id = seated.course_id,
+    error = COALESCE(seated.error, CASE WHEN seated.seat > seated.free_seats THEN 'full' END)
+FROM seated
+WHERE s.line = seated.line
+"""
+
+# Đăng ký được tạo đồng thời (ngoài lần nhập này) bị bỏ qua và báo là đã đăng ký.
+MERGE_SQL = """
+WITH inserted AS (
+    INSERT INTO student_course_enrollment (
+        id, created_at, updated_at, is_active, user_id, course_id, course_class_id, enrollment_date,
+        enrollment_method, status, tuition_fee, paid_amount, payment_status, final_grade, notes
+    )
+    SELECT
+        gen_random_uuid(), now(), now(), true, user_id, course_id, course_class_id, current_date,
+        'admin', status, tuition_fee, 0, 'unpaid', '', notes
+    FROM enrollment_import
+    WHERE error IS NULL
+    ORDER BY line
+    ON CONFLICT (user_id, course_class_id) DO NOTHING
+    RETURNING user_id, course_class_id
+)
+UPDATE enrollment_import s
+SET error = 'enrolled'
+WHERE s.error IS NULL AND NOT EXISTS (
+    SELECT 1 FROM inserted i WHERE i.user_id = s.user_id AND i.course_class_id = s.course_class_id
+)
+"""
+
+REPORT_SQL = """
+SELECT line, login, class_code, error FROM enrollment_import WHERE error IS NOT NULL
+"""
+
+
+def import_enrollments(uploaded_file, default_fee=None, default_status='enrolled'):
+    """
+    Nhập đăng ký từ file CSV/XLSX có dòng tiêu đề.
+
+    Cột bắt buộc: `user` (email hoặc username; hoặc cột `email`/`username`) và
+    `class_code`. Cột tùy chọn: `tuition_fee` (mặc định `default_fee`), `status`
+    (mặc định `default_status`), `notes`. Các dòng hợp lệ được ghi trong một
+    giao dịch; dòng lỗi được bỏ qua và liệt kê trong báo cáo.
+    """
+    report = ImportReport()
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode='w+', newline='', encoding='utf-8') as buffer:
+        stage_rows(read_rows(uploaded_file), default_fee, default_status, report, buffer)
+        buffer.seek(0)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(STAGING_SQL)
+            cursor.copy_expert(COPY_SQL, buffer)
+            cursor.execute(LOCK_CLASSES_SQL)
+            class_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(RESOLVE_SQL, {'occupying': list(OCCUPYING_STATUSES)})
+            cursor.execute(MERGE_SQL)
+            cursor.execute(REPORT_SQL)
+            failed = cursor.fetchall()
+            CourseClass.objects.filter(pk__in=class_ids).recount_reserved_seats()
+
+    for line, user, class_code, error in failed:
+        report.add_error(line, user, class_code, ERRORS[error])
+    report.errors.sort()
+    report.created = report.rows - len(report.errors)
+    return report
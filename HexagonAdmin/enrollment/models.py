@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from config.models import BaseModel
 
@@ -114,6 +116,26 @@ class StudentCourseEnrollment(BaseModel):
         return f"{self.student_name} - {self.course_class.title}"
 
 
+@receiver(pre_save, sender=StudentCourseEnrollment)
+def remember_course_class(sender, instance, **kwargs):
+    """Ghi nhớ lớp cũ để cập nhật số chỗ của cả hai lớp khi chuyển lớp"""
+    instance._previous_course_class_id = None
+    if not instance._state.adding:
+        instance._previous_course_class_id = sender.objects.filter(pk=instance.pk).values_list(
+            'course_class_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=StudentCourseEnrollment)
+@receiver(post_delete, sender=StudentCourseEnrollment)
+def recount_reserved_seats(sender, instance, **kwargs):
+    """Đếm lại số chỗ đã giữ của lớp sau khi thêm, sửa hoặc xóa đăng ký"""
+    from course.models import CourseClass
+
+    class_ids = {instance.course_class_id, getattr(instance, '_previous_course_class_id', None)} - {None}
+    CourseClass.objects.filter(pk__in=class_ids).recount_reserved_seats()
+
+
 class StudentInquiry(BaseModel):
     """Đăng ký tư vấn - giữ nguyên như cũ"""
     student_name = models.CharField(max_length=200, verbose_name=_("Tên học sinh"))
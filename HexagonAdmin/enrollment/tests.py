@@ -1,3 +1,179 @@
+import io
+import unittest
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+
+from course.models import Course, CourseCategory, CourseClass
+from enrollment.importer import import_enrollments
+from enrollment.models import StudentCourseEnrollment
+from user.models import User
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class ReservedSeatsTests(TestCase):
+    """`CourseClass.reserved_seats` follows enrollments changed outside the API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = CourseCategory.objects.create(name="Danh mục")
+        cls.course = Course.objects.create(category=category, title="Khóa học", short_description="Mô tả")
+        cls.classes = [
+            CourseClass.objects.create(
+                course=cls.course,
+                title=f"Lớp {i}",
+                short_description="Mô tả",
+                address="Hà Nội",
+                schedule_description="T2, T4",
+                class_code=f"RS{i:04d}",
+            )
+            for i in range(2)
+        ]
+        cls.users = [
+            User.objects.create_user(email=f"student{i}@example.com", username=f"student{i}", password='password')
+            for i in range(3)
+        ]
+
+    def enroll(self, user, course_class, **fields):
+        return StudentCourseEnrollment.objects.create(
+            user=user, course=self.course, course_class=course_class, tuition_fee=1000000, **fields
+        )
+
+    def assertReserved(self, *expected):
+        self.assertEqual(
+            [CourseClass.objects.get(pk=course_class.pk).reserved_seats for course_class in self.classes],
+            list(expected)
+        )
+
+    def test_counts_occupying_enrollments(self):
+        self.enroll(self.users[0], self.classes[0])
+        self.enroll(self.users[1], self.classes[0], status='completed')
+        self.enroll(self.users[2], self.classes[0], status='studying')
+        self.assertReserved(2, 0)
+
+    def test_status_change_and_delete_release_seat(self):
+        enrollment = self.enroll(self.users[0], self.classes[0])
+        enrollment.status = 'dropped'
+        enrollment.save()
+        self.assertReserved(0, 0)
+
+        enrollment.status = 'studying'
+        enrollment.save()
+        self.assertReserved(1, 0)
+
+        enrollment.delete()
+        self.assertReserved(0, 0)
+
+    def test_moving_enrollment_recounts_both_classes(self):
+        enrollment = self.enroll(self.users[0], self.classes[0])
+        enrollment.course_class = self.classes[1]
+        enrollment.save()
+        self.assertReserved(0, 1)
+
+    def test_recount_repairs_drift(self):
+        self.enroll(self.users[0], self.classes[0])
+        CourseClass.objects.update(reserved_seats=7)
+        CourseClass.objects.recount_reserved_seats()
+        self.assertReserved(1, 0)
+
+
+class EnrollmentImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = CourseCategory.objects.create(name="Danh mục")
+        cls.course = Course.objects.create(category=category, title="Khóa học", short_description="Mô tả")
+        cls.small = CourseClass.objects.create(
+            course=cls.course, title="Lớp nhỏ", short_description="Mô tả", address="Hà Nội",
+            schedule_description="T2", class_code="SMALL", max_students=2,
+        )
+        cls.large = CourseClass.objects.create(
+            course=cls.course, title="Lớp lớn", short_description="Mô tả", address="Hà Nội",
+            schedule_description="T3", class_code="LARGE",
+        )
+        cls.users = [
+            User.objects.create_user(email=f"student{i}@example.com", username=f"student{i}", password='password')
+            for i in range(5)
+        ]
+        StudentCourseEnrollment.objects.create(
+            user=cls.users[4], course=cls.course, course_class=cls.large, tuition_fee=1000000
+        )
+
+    def upload(self, text, name='enrollments.csv'):
+        return SimpleUploadedFile(name, text.encode('utf-8'))
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        report = import_enrollments(self.upload(
+            "email,class_code,tuition_fee,status\n"
+            "student0@example.com,SMALL,1500000,\n"
+            "student1,SMALL,,\n"                      # username, default fee
+            "student2@example.com,SMALL,1500000,\n"   # third seat of a 2-seat class
+            "student3@example.com,SMALL,1500000,completed\n"  # does not take a seat
+            "student0@example.com,SMALL,1500000,\n"   # repeated
+            "student4@example.com,LARGE,1500000,\n"   # already enrolled
+            "nobody@example.com,LARGE,1500000,\n"
+            "student1@example.com,NOPE,1500000,\n"
+            "student1@example.com,LARGE,abc,\n"
+            "student1@example.com,LARGE,1500000,waiting\n"
+            "\n"
+            ",LARGE,1500000,\n"
+        ), default_fee=900000)
+
+        self.assertEqual((report.rows, report.created), (11, 3))
+        self.assertEqual([(line, message) for line, _, _, message in report.errors], [
+            (4, "Lớp đã đủ sĩ số"),
+            (6, "Trùng với một dòng phía trên trong file"),
+            (7, "Người dùng đã đăng ký lớp này"),
+            (8, "Không tìm thấy người dùng"),
+            (9, "Không tìm thấy mã lớp"),
+            (10, "Học phí không hợp lệ: abc"),
+            (11, "Trạng thái không hợp lệ: waiting"),
+            (13, "Thiếu người dùng"),
+        ])
+
+        enrollments = StudentCourseEnrollment.objects.filter(course_class=self.small).order_by('user__username')
+        self.assertEqual(
+            [(e.user.username, e.status, e.tuition_fee, e.enrollment_method) for e in enrollments],
+            [
+                ('student0', 'enrolled', 1500000, 'admin'),
+                ('student1', 'enrolled', 900000, 'admin'),
+                ('student3', 'completed', 1500000, 'admin'),
+            ]
+        )
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.reserved_seats, 2)
+
+    def test_missing_column(self):
+        with self.assertRaisesMessage(Exception, "class_code"):
+            import_enrollments(self.upload("email,tuition_fee\nstudent0@example.com,1\n"))
+
+    @unittest.skipUnless(openpyxl, "openpyxl is not installed")
+    def test_xlsx(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["username", "class_code", "tuition_fee"])
+        workbook.active.append(["student0", "LARGE", 1200000])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        report = import_enrollments(SimpleUploadedFile('enrollments.xlsx', content.getvalue()))
+
+        self.assertEqual((report.rows, report.created, report.errors), (1, 1, []))
+
+    def test_admin_view(self):
+        admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password')
+        self.client.force_login(admin)
+        url = reverse('admin:enrollment_studentcourseenrollment_import')
+
+        response = self.client.post(url, {
+            'file': self.upload("user,class_code\nstudent0,LARGE\nghost,LARGE\n"),
+            'tuition_fee': '1000000',
+            'status': 'pending',
+        })
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].created, 1)
+        self.assertContains(response, "Không tìm thấy người dùng")
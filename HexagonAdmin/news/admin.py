@@ -1,9 +1,10 @@
 from django.contrib import admin
 from .models import *
 from config.admin import BaseModelAdmin
+from config.uploads import DirectUploadMixin
 
 
-class NewsContentBlockInline(admin.StackedInline):
+class NewsContentBlockInline(DirectUploadMixin, admin.StackedInline):
     model = NewsContentBlock
     extra = 0
 
@@ -11,6 +12,7 @@ class NewsContentBlockInline(admin.StackedInline):
 @admin.register(NewsCategory)
 class NewsCategoryAdmin(BaseModelAdmin):
     list_display = ['name', 'category_type', 'course', 'is_active']
+    list_select_related = ['course']
     list_filter = ['category_type', 'course']
     prepopulated_fields = {'slug': ('name',)}
 
@@ -18,6 +20,7 @@ class NewsCategoryAdmin(BaseModelAdmin):
 @admin.register(News)
 class NewsAdmin(BaseModelAdmin):
     list_display = ['title', 'category', 'is_published', 'published_at']
+    list_select_related = ['category']
     list_filter = ['category', 'is_published']
     inlines = [NewsContentBlockInline]
     prepopulated_fields = {'slug': ('title',)}
\ No newline at end of file
@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from news.models import News, NewsCategory
+
+
+TITLES = [
+    "Thông báo lịch thi",
+    "Kết quả thi học kỳ",
+    "Lịch khai giảng khóa mới",
+    "Thông báo nghỉ lễ",
+    "Tuyển sinh lớp 10",
+    "Đề thi thử THPT Quốc gia",
+    "Học bổng tháng",
+    "Sự kiện ngoại khóa",
+]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark slug allocation by creating news items with recurring titles "
+        "inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="News items to create")
+        parser.add_argument(
+            '--compare', action='store_true',
+            help="Also run the previous one-query-per-candidate allocation (quadratic, slow for large counts)"
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        runs = [('single query', self.create)]
+        if options['compare']:
+            runs.append(('per candidate', self.create_per_candidate))
+
+        for name, create in runs:
+            with transaction.atomic():
+                category = NewsCategory.objects.create(name="Benchmark")
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    started = time.perf_counter()
+                    for i in range(count):
+                        create(category, TITLES[i % len(TITLES)])
+                    elapsed = time.perf_counter() - started
+                slugs = News.objects.filter(category=category).values_list('slug', flat=True)
+                distinct = len(set(slugs))
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{name:<14} {count} items  {elapsed:8.2f} s  {queries.count} queries  "
+                f"{elapsed / count * 1000:.2f} ms/item  {distinct} distinct slugs"
+            )
+
+    def create(self, category, title):
+        News.objects.create(category=category, title=title, short_description=title)
+
+    def create_per_candidate(self, category, title):
+        converter = News.slug_converter
+        base_slug = converter.to_slug(title)
+        slug = base_slug
+        counter = 1
+        while News.objects.filter(slug=slug).exists():
+            slug = f"{base_slug}{converter.separator}{counter}"
+            counter += 1
+        News.objects.create(category=category, title=title, short_description=title, slug=slug)
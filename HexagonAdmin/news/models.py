@@ -1,10 +1,12 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from config.models import BaseModel
 from course.utils import SlugMixin
 
 
-class NewsCategory(BaseModel, SlugMixin):
+class NewsCategory(SlugMixin, BaseModel):
     """Danh mục bản tin"""
     name = models.CharField(max_length=100, verbose_name=_("Tên danh mục"))
     slug = models.SlugField(unique=True, blank=True)
@@ -27,9 +29,11 @@ class NewsCategory(BaseModel, SlugMixin):
         ],
         default='general'
     )
+    order = models.IntegerField(default=0, verbose_name=_("Thứ tự"))
 
     class Meta:
         db_table = 'news_category'
+        ordering = ['order', 'name']
         verbose_name = _("Danh mục bản tin")
         verbose_name_plural = _("Danh mục bản tin")
 
@@ -37,8 +41,10 @@ class NewsCategory(BaseModel, SlugMixin):
         return self.name
 
 
-class News(BaseModel, SlugMixin):
+class News(SlugMixin, BaseModel):
     """Bản tin"""
+    slug_source_field = 'title'
+
     category = models.ForeignKey(NewsCategory, on_delete=models.CASCADE)
     title = models.CharField(max_length=200, verbose_name=_("Tiêu đề"))
     slug = models.SlugField(unique=True, blank=True)
@@ -47,12 +53,14 @@ class News(BaseModel, SlugMixin):
     is_published = models.BooleanField(default=False, verbose_name=_("Đã xuất bản"))
     published_at = models.DateTimeField(null=True, blank=True)
     view_count = models.IntegerField(default=0)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         db_table = 'news'
         verbose_name = _("Bản tin")
         verbose_name_plural = _("Bản tin")
         ordering = ['-published_at']
+        indexes = [GinIndex(fields=['search_vector'], name='news_search_vector_gin')]
 
     def __str__(self):
         return self.title
@@ -0,0 +1,156 @@
+// Tải file thẳng từ trình duyệt lên MinIO cho các ô key trong trang quản trị.
+// Django chỉ cấp chính sách tải lên (upload/start/) và xác nhận key (upload/finish/).
+// Lần tải theo phần bị lỗi hoặc bị bỏ dở khi rời trang được hủy qua upload/abort/.
+(function() {
+    const PARALLEL_PARTS = 4;
+    // Các lần tải theo phần đã bắt đầu nhưng chưa ghép xong: upload_id -> {url, body}
+    const pending = new Map();
+
+    function csrfToken() {
+        const input = document.querySelector('[name=csrfmiddlewaretoken]');
+        return input ? input.value : '';
+    }
+
+    function postJSON(url, data, keepalive) {
+        return fetch(url, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': csrfToken(),
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(data),
+            keepalive: !!keepalive
+        })
+        .then(response => response.json())
+        .then(result => {
+            if (!result.success) {
+                throw new Error(result.error);
+            }
+            return result;
+        });
+    }
+
+    function send(method, url, body, onProgress) {
+        return new Promise((resolve, reject) => {
+            const xhr = new XMLHttpRequest();
+            xhr.open(method, url);
+            xhr.upload.addEventListener('progress', e => onProgress(e.loaded));
+            xhr.addEventListener('load', () => {
+                if (xhr.status >= 200 && xhr.status < 300) {
+                    resolve(xhr);
+                } else {
+                    reject(new Error('MinIO trả về lỗi ' + xhr.status));
+                }
+            });
+            xhr.addEventListener('error', () => reject(new Error('Không kết nối được tới MinIO')));
+            xhr.send(body);
+        });
+    }
+
+    function uploadSingle(upload, file, onProgress) {
+        const body = new FormData();
+        Object.entries(upload.fields).forEach(([name, value]) => body.append(name, value));
+        body.append('file', file);
+        return send('POST', upload.url, body, onProgress).then(() => ({}));
+    }
+
+    function uploadParts(upload, file, onProgress) {
+        const loaded = new Array(upload.urls.length).fill(0);
+        const parts = [];
+        let next = 0;
+
+        function worker() {
+            if (next >= upload.urls.length) {
+                return Promise.resolve();
+            }
+            const index = next++;
+            const blob = file.slice(index * upload.part_size, (index + 1) * upload.part_size);
+            return send('PUT', upload.urls[index], blob, bytes => {
+                loaded[index] = bytes;
+                onProgress(loaded.reduce((sum, value) => sum + value, 0));
+            }).then(xhr => {
+                parts[index] = {PartNumber: index + 1, ETag: xhr.getResponseHeader('ETag')};
+                return worker();
+            });
+        }
+
+        const workers = [];
+        for (let i = 0; i < Math.min(PARALLEL_PARTS, upload.urls.length); i++) {
+            workers.push(worker());
+        }
+        return Promise.all(workers).then(() => ({upload_id: upload.upload_id, parts: parts}));
+    }
+
+    // Ô cùng dòng inline, ví dụ "files-0-file_key" -> "files-0-file_size"
+    function sibling(input, field) {
+        const name = input.name.replace(/[^-]+$/, field);
+        return input.form ? input.form.elements.namedItem(name) : null;
+    }
+
+    function handle(container, file) {
+        const input = container.querySelector('input[type=text], input:not([type])');
+        const progress = container.querySelector('.direct-upload-progress');
+        const status = container.querySelector('.direct-upload-status');
+        const target = container.dataset.target;
+
+        progress.hidden = false;
+        progress.value = 0;
+        status.textContent = 'Đang tải lên...';
+        const onProgress = bytes => { progress.value = Math.round(bytes * 100 / file.size); };
+
+        postJSON(container.dataset.startUrl, {
+            target: target,
+            filename: file.name,
+            size: file.size,
+            content_type: file.type
+        })
+        .then(upload => {
+            if (!upload.upload_id) {
+                return uploadSingle(upload, file, onProgress)
+                    .then(() => postJSON(container.dataset.finishUrl, {target: target, key: upload.key}));
+            }
+            const abort = {target: target, key: upload.key, upload_id: upload.upload_id};
+            pending.set(upload.upload_id, {url: container.dataset.abortUrl, body: abort});
+            return uploadParts(upload, file, onProgress)
+                .then(extra => postJSON(container.dataset.finishUrl, {target: target, key: upload.key, ...extra}))
+                .then(info => {
+                    pending.delete(upload.upload_id);
+                    return info;
+                }, error => {
+                    // Không để các phần đã tải nằm lại trên MinIO
+                    pending.delete(upload.upload_id);
+                    return postJSON(container.dataset.abortUrl, abort)
+                        .catch(() => null)
+                        .then(() => { throw error; });
+                });
+        })
+        .then(info => {
+            input.value = info.key;
+            const size = sibling(input, 'file_size');
+            const type = sibling(input, 'file_type');
+            if (size) size.value = info.size;
+            if (type && !type.value) type.value = info.file_type;
+            progress.value = 100;
+            status.textContent = '✓ Đã tải lên';
+        })
+        .catch(error => {
+            progress.hidden = true;
+            status.textContent = 'Lỗi: ' + error.message;
+        });
+    }
+
+    // Rời trang khi đang tải: keepalive giữ yêu cầu hủy sống sau khi trang đóng
+    window.addEventListener('pagehide', () => {
+        pending.forEach(({url, body}) => postJSON(url, body, true).catch(() => null));
+        pending.clear();
+    });
+
+    // Lắng nghe trên document để cả các dòng inline thêm sau cũng hoạt động
+    document.addEventListener('change', e => {
+        if (!e.target.classList.contains('direct-upload-file') || !e.target.files.length) {
+            return;
+        }
+        handle(e.target.closest('.direct-upload'), e.target.files[0]);
+        e.target.value = '';
+    });
+})();
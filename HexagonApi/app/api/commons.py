@@ -12,5 +12,6 @@ from app.resources import context as r
 from app.api.shared.auth import with_user, with_token, maybe_user, Authorized
 from app.api.shared.errors import abort, abort_with, errorModel, ErrorResponse
 from app.api.shared.dependencies import URLFor
+from app.api.shared.responses import ViewResponse
 from app.api.view import responses as vr
 from app.api.view import requests as vq
\ No newline at end of file
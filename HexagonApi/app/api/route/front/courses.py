@@ -7,6 +7,7 @@ from app.api.commons import (
     Query,
     Path,
     Response,
+    ViewResponse,
     vr,
     maybe_user,
 )
@@ -43,6 +44,8 @@ async def get_course_category(
 
 @router.get(
     "",
+    response_model=vr.CourseListResponse,
+    response_class=ViewResponse,
     responses={
         200: {"description": "List of courses with pagination."},
     },
@@ -51,7 +54,7 @@ async def get_courses(
     category_id: Optional[str] = Query(None, description="Filter by category ID"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page")
-) -> vr.CourseListResponse:
+) -> ViewResponse:
     """Get courses with pagination"""
     courses, total = (await cs.get_courses(
         category_id=category_id,
@@ -61,7 +64,7 @@ async def get_courses(
     
     total_pages = (total + per_page - 1) // per_page
     
-    return vr.CourseListResponse(
+    return ViewResponse(vr.CourseListResponse(
         items=[vr.CourseSummary.of(course) for course in courses],
         total=total,
         page=page,
@@ -69,7 +72,7 @@ async def get_courses(
         total_pages=total_pages,
         has_next=page < total_pages,
         has_prev=page > 1
-    )
+    ))
 
 
 @router.get(
@@ -1,15 +1,21 @@
+import posixpath
 from typing import Optional, List
 import app.service.file as fs
 from app.api.commons import (
     APIRouter,
     Authorized,
     Depends,
+    Errors,
     Query,
     Path,
+    Request,
     Response,
+    abort,
+    r,
     vr,
     maybe_user,
 )
+from app.api.shared.responses import StorageResponse
 
 router = APIRouter()
 
@@ -80,4 +86,46 @@ async def download_file(
     """Generate download URL for a file"""
     user = auth.User if auth else None
     file, download_url = (await fs.download_file(file_id, user)).get()
-    return vr.FileDownloadResponse.of(file, download_url) 
\ No newline at end of file
+    return vr.FileDownloadResponse.of(file, download_url) 
+
+
+@router.api_route(
+    "/{file_id}/content",
+    methods=["GET", "HEAD"],
+    response_class=StorageResponse,
+    responses={
+        200: {"description": "File content.", "content": {"application/octet-stream": {}}},
+        206: {"description": "Requested byte range of the file content."},
+        304: {"description": "File content has not changed (If-None-Match)."},
+        403: {"description": "Download not allowed."},
+        404: {"description": "File not found."},
+        416: {"description": "Requested range not satisfiable."},
+    },
+)
+async def get_file_content(
+    request: Request,
+    file_id: str = Path(..., description="File ID"),
+    download: bool = Query(False, description="Send as an attachment instead of inline"),
+    auth: Optional[Authorized] = Depends(maybe_user),
+) -> StorageResponse:
+    """
+    Stream the content of a file.
+
+    A single `Range` header (e.g. `bytes=1048576-`) is answered with `206 Partial Content`, so large PDFs and
+    videos can be seeked and interrupted downloads resumed; send `If-Range` with the `ETag` to resume safely.
+    """
+    user = auth.User if auth else None
+
+    def fail(e):
+        abort(403 if e.key == Errors.FORBIDDEN.key else 404, e)
+    file, stored = (await fs.open_file(file_id, user)).or_else(fail)
+
+    name = file.name
+    extension = posixpath.splitext(file.file_key)[1]
+    if extension and not name.lower().endswith(extension.lower()):
+        name += extension
+
+    response = StorageResponse(r.storage, stored, request.headers, filename=name, attachment=download)
+    if response.first_byte and request.method == "GET":
+        await fs.count_download(file.id)
+    return response
@@ -5,6 +5,7 @@ import app.service.website as ws
 from app.api.commons import (
     APIRouter,
     Depends,
+    ViewResponse,
     vr,
 )
 
@@ -151,26 +152,27 @@ async def get_sidebar_banners() -> List[vr.Banner]:
 
 @router.get(
     "/data",
+    response_model=vr.HomepageData,
+    response_class=ViewResponse,
     responses={
         200: {"description": "Complete homepage data."},
     },
 )
-async def get_homepage_data() -> vr.HomepageData:
+async def get_homepage_data() -> ViewResponse:
     """Get all homepage data in one request"""
     courses_result = await cs.get_courses(page=1, per_page=6)
     categories_result = await cs.get_course_categories()
-    exam_results_result = await ns.get_featured_news(category_type="exam_results", limit=6)
-    events_result = await ns.get_featured_news(category_type="upcoming_events", limit=6)
-    news_result = await ns.get_featured_news(category_type="general", limit=6)
+    featured_result = await ns.get_featured_news_by_types(["exam_results", "upcoming_events", "general"], limit=6)
     hero_banners_result = await ws.get_banners(position="hero")
     sidebar_banners_result = await ws.get_banners(position="sidebar")
     contact_result = await ws.get_contact_info()
     
     courses, _ = courses_result.get()
     categories = categories_result.get()
-    exam_results = exam_results_result.get()
-    events = events_result.get()
-    news = news_result.get()
+    featured = featured_result.get()
+    exam_results = featured["exam_results"]
+    events = featured["upcoming_events"]
+    news = featured["general"]
     hero_banners = hero_banners_result.get()
     sidebar_banners = sidebar_banners_result.get()
     contact = contact_result.get() if contact_result.get() else None
@@ -187,7 +189,7 @@ async def get_homepage_data() -> vr.HomepageData:
             roadmaps.append(course.roadmap)
     featured_roadmaps = roadmaps[:3]
     
-    return vr.HomepageData.of(
+    return ViewResponse(vr.HomepageData.of(
         courses=courses,
         students=featured_students,
         exam_results=exam_results,
@@ -198,4 +200,4 @@ async def get_homepage_data() -> vr.HomepageData:
         hero_banners=hero_banners,
         sidebar_banners=sidebar_banners,
         contact=contact
-    )
\ No newline at end of file
+    ))
\ No newline at end of file
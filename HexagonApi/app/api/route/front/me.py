@@ -8,6 +8,9 @@ from app.api.commons import (
     Query,
     Body,
     Response,
+    Errors,
+    abort,
+    abort_with,
     vr,
     vq,
     with_token,
@@ -90,6 +93,48 @@ async def update_profile(
     return vr.UserProfile.of(profile)
 
 
+@router.post(
+    "/profile/picture/uploads",
+    status_code=201,
+    responses={
+        201: {"description": "Presigned form to upload the picture straight to the storage."},
+        400: {"description": "Unsupported media type or size, or the account cannot change its picture."},
+    },
+)
+async def start_profile_picture_upload(
+    request: vq.ProfilePictureUploadRequest = Body(...),
+    auth: Authorized = Depends(with_user),
+) -> vr.DirectUpload:
+    """
+    Start a profile picture upload.
+
+    POST `fields` and then the picture as `file` (multipart/form-data) to `url`, then commit `key`
+    with `PUT /profile/picture`.
+    """
+    upload = (await as_.start_profile_picture_upload(
+        auth.User, request.content_type, request.size,
+    )).or_else(abort_with(400))
+    return vr.DirectUpload.of(upload)
+
+
+@router.put(
+    "/profile/picture",
+    responses={
+        200: {"description": "Updated user profile."},
+        404: {"description": "The picture has not been uploaded."},
+    },
+)
+async def commit_profile_picture(
+    request: vq.ProfilePictureCommitRequest = Body(...),
+    auth: Authorized = Depends(with_user),
+) -> vr.UserProfile:
+    """Set an uploaded picture as the profile picture; the thumbnail follows shortly after."""
+    def fail(e):
+        abort(404 if e.key == Errors.DATA_NOT_FOUND.key else 400, e)
+    profile = (await as_.commit_profile_picture(auth.User, request.key)).or_else(fail)
+    return vr.UserProfile.of(profile)
+
+
 @router.delete(
     "/withdraw",
     status_code=200,
@@ -0,0 +1,65 @@
+from typing import List, Literal, Optional
+import app.service.search as ss
+from app.api.commons import (
+    APIRouter,
+    Errors,
+    Query,
+    ViewResponse,
+    abort_with,
+    errorModel,
+    r,
+    vr,
+)
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    responses={
+        200: {"description": "Courses and news matching the query, best matches first."},
+        400: dict(model=errorModel(Errors.INVALID_REQUEST), description="Empty query."),
+    },
+)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text, accents optional"),
+    type: Optional[Literal["course", "news"]] = Query(None, description="Restrict results to one type"),
+    page: int = Query(1, ge=1, description="Page number"),
+    per_page: int = Query(20, ge=1, le=100, description="Items per page")
+) -> vr.SearchListResponse:
+    """Full-text search over course and news titles, descriptions and content"""
+    hits, has_next = (await ss.search(
+        q,
+        kind=type,
+        page=page,
+        per_page=per_page
+    )).or_else(abort_with(400))
+
+    return vr.SearchListResponse(
+        items=[vr.SearchResult.of(hit) for hit in hits],
+        page=page,
+        per_page=per_page,
+        has_next=has_next,
+        has_prev=page > 1
+    )
+
+
+@router.get(
+    "/suggest",
+    response_model=vr.SuggestionListResponse,
+    response_class=ViewResponse,
+    responses={
+        200: {"description": "Suggestions whose words start with the typed text, most popular first."},
+    },
+)
+async def suggest(
+    q: str = Query(..., max_length=100, description="Typed text, accents optional"),
+    type: Optional[List[Literal["course", "category", "class", "news"]]] = Query(None, description="Restrict suggestions to these types"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions")
+) -> ViewResponse:
+    """Search-as-you-type suggestions served from the in-memory index"""
+    suggestions = r.suggestions.lookup(q, limit, type) if r.suggestions else []
+
+    return ViewResponse(vr.SuggestionListResponse(
+        items=[vr.SuggestionResult.of(suggestion) for suggestion in suggestions]
+    ))
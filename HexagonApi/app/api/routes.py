@@ -7,7 +7,7 @@ from app.model.errors import Errors
 from fastapi import APIRouter, Depends, FastAPI, HTTPException, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
-from .route.front import me, courses, enrollments, news, homepage, website, contact, files
+from .route.front import me, courses, enrollments, news, homepage, website, contact, files, search
 from .route.internal import docs
 from .shared.errors import ValidationErrorResponse, errorModel, setup_handlers
 
@@ -83,11 +83,47 @@ def setup_api(app: FastAPI, env: Environment, logger: logging.Logger):
         tags=["Files"],
     )
 
+    router.include_router(
+        prefix="/search",
+        router=search.router,
+        tags=["Search"],
+    )
+
     @router.get("/health", tags=["Health"])
     async def health_check():
         """Health check endpoint for Docker and load balancers."""
         return {"status": "healthy", "service": "hexagon-api"}
 
+    if env.settings.metrics.active(env.settings.docs):
+        from fastapi import Request
+        from .shared.metrics import metrics_response
+
+        @router.get(
+            env.settings.metrics.path,
+            tags=["Health"],
+            include_in_schema=False,
+            dependencies=[Depends(DocumentAuth(env.settings.docs))],
+        )
+        async def metrics(request: Request):
+            """Metrics of the server, all worker processes included, in the Prometheus text format."""
+            return await metrics_response(request.app.state.metrics)
+
+    if env.settings.profiling.active(env.settings.docs):
+        from fastapi import Request
+        from fastapi.responses import FileResponse
+
+        @app.get(
+            f"{env.settings.profiling.path}/{{name}}",
+            include_in_schema=False,
+            dependencies=[Depends(DocumentAuth(env.settings.docs))],
+        )
+        async def get_profile_report(name: str, request: Request):
+            report = request.app.state.profiler.report(name)
+            if report is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+            path, media_type = report
+            return FileResponse(path, media_type=media_type)
+
     if env.settings.docs.enabled and env.settings.docs.username:
         from fastapi.openapi.utils import get_openapi
         from fastapi.security import HTTPBasic
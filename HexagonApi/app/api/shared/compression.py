@@ -0,0 +1,191 @@
+from collections import OrderedDict
+import gzip
+import hashlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import ApplicationSettings
+from app.ext.metrics.base import watch_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+#----------------------------------------------------------------
+# Cache
+#----------------------------------------------------------------
+class CompressedPayloads:
+    """
+    LRU cache of compressed variants keyed by the digest of the raw body.
+
+    Identical payloads (the same homepage data or course detail served to many clients) are compressed once per
+    encoding. Hashing the body is far cheaper than compressing it again.
+    """
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[bytes, str], bytes] = OrderedDict()
+
+    def get(self, body: bytes, encoding: str, compress) -> bytes:
+        """
+        Returns the compressed variant of a body, compressing and storing it on a miss.
+
+        Args:
+            body: Raw body.
+            encoding: Content coding of the variant.
+            compress: Function compressing the raw body.
+        Returns:
+            Compressed body.
+        """
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        value = self._entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = compress(body)
+        if len(value) <= self.max_bytes:
+            self._entries[key] = value
+            self.size += len(value)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return value
+
+
+#----------------------------------------------------------------
+# Middleware
+#----------------------------------------------------------------
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete responses with brotli or gzip.
+
+    Only single-message bodies are compressed; streamed responses (file downloads, ranges) pass through untouched.
+    Compressed variants are kept in `CompressedPayloads`. Every response that could be compressed carries
+    `Vary: Accept-Encoding`, also when this client got it uncompressed, so shared caches keep the variants apart.
+    """
+    def __init__(self, app: ASGIApp, settings: ApplicationSettings.Compression, cache: Optional[CompressedPayloads] = None) -> None:
+        self.app = app
+        self.settings = settings
+        self.content_types = frozenset(settings.content_types)
+        self.cache = cache or CompressedPayloads(settings.cache_entries, settings.cache_bytes)
+        watch_cache("compression", lambda: (self.cache.hits, self.cache.misses))
+        self.encoders = {
+            "gzip": lambda body: gzip.compress(body, compresslevel=settings.gzip_level, mtime=0),
+        }
+        if brotli is not None:
+            self.encoders["br"] = lambda body: brotli.compress(body, quality=settings.brotli_quality)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        await _Responder(self, encoding, send)(self.app, scope, receive)
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """
+        Chooses the content coding for an `Accept-Encoding` header value.
+
+        The coding with the highest quality wins, brotli on a tie. `*` stands for the codings not listed, so it
+        never brings back one refused with `q=0`.
+
+        Args:
+            accept_encoding: Header value.
+        Returns:
+            `br` or `gzip`, or `None` when the client accepts neither.
+        """
+        if not accept_encoding:
+            return None
+        qualities: dict[str, float] = {}
+        for item in accept_encoding.split(","):
+            coding, _, params = item.strip().partition(";")
+            params = params.replace(" ", "")
+            q = 1.0
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    continue
+            qualities[coding.strip().lower()] = q
+        other = qualities.get("*", 0.0)
+        best, quality = None, 0.0
+        for coding in ("br", "gzip"):
+            if coding not in self.encoders:
+                continue
+            q = qualities.get(coding, other)
+            if q > quality:
+                best, quality = coding, q
+        return best
+
+    def negotiable(self, status: int, headers: MutableHeaders) -> bool:
+        """Whether the representation depends on `Accept-Encoding`, regardless of this request and body size."""
+        if status < 200 or status in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        return media_type in self.content_types
+
+
+class _Responder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+
+    async def __call__(self, app: ASGIApp, scope: Scope, receive: Receive) -> None:
+        await app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body" or self.start is None:
+            # Extension messages (http.response.zerocopysend) carry the body outside of `body`.
+            if self.start is not None:
+                start, self.start = self.start, None
+                self.passthrough = True
+                await self.send(start)
+            await self.send(message)
+            return
+
+        start, self.start = self.start, None
+        self.passthrough = True
+        body = message.get("body", b"")
+        headers = MutableHeaders(raw=list(start["headers"]))
+        start["headers"] = headers.raw
+
+        if message.get("more_body", False) or not self.middleware.negotiable(start["status"], headers):
+            await self.send(start)
+            await self.send(message)
+            return
+
+        vary = [value.strip() for value in headers.get("vary", "").split(",") if value.strip()]
+        if not any(value == "*" or value.lower() == "accept-encoding" for value in vary):
+            headers["Vary"] = ", ".join(vary + ["Accept-Encoding"])
+        if self.encoding is None or len(body) < self.middleware.settings.minimum_size:
+            await self.send(start)
+            await self.send(message)
+            return
+
+        compressed = self.middleware.cache.get(body, self.encoding, self.middleware.encoders[self.encoding])
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": compressed})
@@ -1,6 +1,5 @@
 from urllib.parse import urlparse
 
-from app.ext.storage.s3 import S3Storage
 from fastapi import Header, Request
 
 
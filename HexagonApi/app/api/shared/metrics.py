@@ -0,0 +1,66 @@
+import time
+from typing import Union
+from fastapi import Response
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.ext.metrics.base import REGISTRY, Registry, SharedRegistry
+
+
+IN_FLIGHT = REGISTRY.gauge("hexagon_http_requests_in_flight", "Requests being handled.")
+REQUEST_SECONDS = REGISTRY.histogram(
+    "hexagon_http_request_duration_seconds",
+    "Duration of requests until the response is sent, by route template.",
+    ("method", "route", "status"),
+)
+REQUEST_QUERIES = REGISTRY.histogram(
+    "hexagon_http_request_db_queries",
+    "Database statements executed per request, by route template.",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+
+#----------------------------------------------------------------
+# Middleware
+#----------------------------------------------------------------
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency, status class and query count of each request.
+
+    Requests are labelled with the template of the matched route (`/courses/{slug}`), never the raw path, so
+    the number of series stays bounded. Added outermost, it times opening and committing the resource session
+    too; the session middleware leaves the session in the request state (`session`) for the query count.
+    """
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, f"{status // 100}xx")
+            session = scope.get("state", {}).get("session")
+            if session is not None:
+                REQUEST_QUERIES.observe(session.stats.count, scope["method"], route)
+
+
+async def metrics_response(registry: Union[Registry, SharedRegistry]) -> Response:
+    # The shared registry reads the files of the other workers
+    text = await run_in_threadpool(registry.expose) if isinstance(registry, SharedRegistry) else registry.expose()
+    return Response(text, media_type="text/plain; version=0.0.4")
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import logging
+import os
+import re
+import secrets
+import time
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import ApplicationSettings
+
+try:
+    import pyinstrument
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:
+    pyinstrument = None
+
+
+# Report formats: file suffix and media type
+FORMATS = {
+    "html": (".html", "text/html"),
+    "speedscope": (".speedscope.json", "application/json"),
+}
+
+REPORT_NAME = re.compile(r"[0-9]{8}T[0-9]{6}-[0-9a-f]{8}-[a-z0-9-]+(\.html|\.speedscope\.json)")
+
+
+class RequestProfiler:
+    """
+    Runs single requests under the pyinstrument sampling profiler on demand.
+
+    A request is profiled when it carries the `header` (value `html` or `speedscope`, empty for the default
+    format) and the documentation credentials in `X-Profile-Authorization` as a Basic authorization value. The
+    report is written to `directory` and its URL, served behind the same credentials, is returned in the
+    `X-Profile-Report` response header. Requests without the header only pay for one header lookup.
+
+    Without documentation credentials (development) nothing is profiled: see `Profiling.active`.
+
+    The profiler runs in async mode, so the time a request spends waiting on the database or other requests
+    is shown as awaiting rather than attributed to whatever else the event loop ran meanwhile.
+    """
+    def __init__(
+        self, settings: ApplicationSettings.Profiling, docs: ApplicationSettings.DocumentAuth, logger: logging.Logger
+    ) -> None:
+        self.settings = settings
+        self.header = settings.header.lower()
+        self.logger = logger
+        self.credentials = None
+        if docs.username and docs.password:
+            self.credentials = f"{docs.username}:{docs.password}".encode("utf-8")
+
+    def requested(self, scope: Scope) -> Optional[str]:
+        """
+        Report format requested by an authorized request, or None when it is not to be profiled.
+        """
+        headers = Headers(scope=scope)
+        value = headers.get(self.header)
+        if value is None:
+            return None
+        format = value.strip().lower() or self.settings.format
+        if format not in FORMATS:
+            return None
+        if not self.authorized(headers.get("x-profile-authorization", "")):
+            self.logger.warning(f"Profiling refused for {scope['method']} {scope['path']}: invalid credentials.")
+            return None
+        if pyinstrument is None:
+            self.logger.warning("Profiling requested but pyinstrument is not installed.")
+            return None
+        return format
+
+    def authorized(self, authorization: str) -> bool:
+        if self.credentials is None:
+            return False
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "basic":
+            return False
+        try:
+            decoded = base64.b64decode(token.strip(), validate=True)
+        except (binascii.Error, ValueError):
+            return False
+        return secrets.compare_digest(decoded, self.credentials)
+
+    async def __call__(self, format: str, app: ASGIApp, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Runs the request under the profiler until its response starts, which carries the report URL.
+        """
+        profiler = pyinstrument.Profiler(interval=self.settings.interval, async_mode="enabled")
+
+        async def send_profiled(message: Message) -> None:
+            if message["type"] == "http.response.start" and profiler.is_running:
+                name = await self.write_report(scope, format, profiler.stop())
+                MutableHeaders(scope=message)["X-Profile-Report"] = f"{self.settings.path}/{name}"
+            await send(message)
+
+        profiler.start()
+        try:
+            await app(scope, receive, send_profiled)
+        finally:
+            if profiler.is_running:
+                profiler.stop()
+
+    async def write_report(self, scope: Scope, format: str, session) -> str:
+        route = scope.get("route")
+        path = getattr(route, "path", scope["path"])
+        slug = re.sub(r"[^a-z0-9]+", "-", f"{scope['method']} {path}".lower()).strip("-")[:60]
+        suffix, _ = FORMATS[format]
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.urandom(4).hex()}-{slug}{suffix}"
+
+        await run_in_threadpool(self.save, session, format, name)
+        self.logger.info(f"Profiled {scope['method']} {scope['path']}: {name} ({session.duration * 1000:.1f} ms)")
+        return name
+
+    def save(self, session, format: str, name: str) -> None:
+        renderer = HTMLRenderer() if format == "html" else SpeedscopeRenderer()
+        os.makedirs(self.settings.directory, exist_ok=True)
+        with open(os.path.join(self.settings.directory, name), "w", encoding="utf-8") as f:
+            f.write(renderer.render(session))
+
+        # Keep the most recent reports only
+        reports = sorted(n for n in os.listdir(self.settings.directory) if REPORT_NAME.fullmatch(n))
+        for old in reports[:-self.settings.max_reports]:
+            try:
+                os.remove(os.path.join(self.settings.directory, old))
+            except FileNotFoundError:
+                pass
+
+    def report(self, name: str) -> Optional[tuple[str, str]]:
+        """
+        Path and media type of a saved report, or None when there is no such report.
+        """
+        if not REPORT_NAME.fullmatch(name):
+            return None
+        path = os.path.join(self.settings.directory, name)
+        if not os.path.isfile(path):
+            return None
+        return path, FORMATS["html" if name.endswith(".html") else "speedscope"][1]
@@ -0,0 +1,230 @@
+from datetime import timezone
+from decimal import Decimal
+from email.utils import format_datetime
+from functools import lru_cache
+from typing import Any, Optional
+from urllib.parse import quote
+import unicodedata
+import anyio
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+from app.ext.metrics.base import watch_cache
+from app.ext.storage.base import Storage, StoredObject
+
+
+#----------------------------------------------------------------
+# Serialization
+#----------------------------------------------------------------
+@lru_cache(maxsize=None)
+def adapter_of(tp: Any) -> TypeAdapter:
+    """
+    Returns the cached `TypeAdapter` of a view type.
+
+    Building an adapter compiles its serializer, so it is done once per type.
+
+    Args:
+        tp: View type, or `list[...]` of it.
+    Returns:
+        Type adapter of the type.
+    """
+    return TypeAdapter(tp)
+
+
+watch_cache("type_adapters", lambda: adapter_of.cache_info()[:2])
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def dump_view(content: Any) -> bytes:
+    """
+    Serializes a view object (or a list of them) to JSON bytes.
+
+    Output matches FastAPI's response serialization: camelCase aliases and pydantic's JSON representation of
+    values such as `datetime` and `Decimal`.
+
+    Args:
+        content: Validated view object, list of view objects, or plain JSON compatible value.
+    Returns:
+        Serialized JSON.
+    """
+    if isinstance(content, list):
+        if not content:
+            return b"[]"
+        tp: Any = list[type(content[0])]  # type: ignore[misc]
+    else:
+        tp = type(content)
+    if tp in (dict, str, int, float, bool, type(None)):
+        return orjson.dumps(content, default=_default)
+    return orjson.dumps(adapter_of(tp).dump_python(content, mode="json", by_alias=True), default=_default)
+
+
+#----------------------------------------------------------------
+# Response types
+#----------------------------------------------------------------
+class ViewResponse(JSONResponse):
+    """
+    JSON response of a view object in `app.api.view.responses`.
+
+    View objects are validated when they are constructed, so a route returning this response skips FastAPI's
+    response-model validation and `jsonable_encoder` pass. Declare `response_model` on the route to keep the
+    schema in the document; subclassing `JSONResponse` is what makes FastAPI document it.
+
+    ```python
+    @router.get("", response_model=vr.CourseListResponse, response_class=ViewResponse)
+    async def get_courses() -> ViewResponse:
+        return ViewResponse(vr.CourseListResponse(...))
+    ```
+    """
+    def render(self, content: Any) -> bytes:
+        return dump_view(content)
+
+
+#----------------------------------------------------------------
+# Stored files
+#----------------------------------------------------------------
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parses a `Range` header value into the first and last byte of a single range.
+
+    Args:
+        header: Header value such as `bytes=0-1023`, `bytes=1024-` or `bytes=-512`.
+        size: Size of the file.
+    Returns:
+        First and last byte (inclusive), or `None` when the header is to be ignored: another unit, malformed
+        or several ranges.
+    Raises:
+        ValueError: The range is not satisfiable for a file of `size` bytes.
+    """
+    unit, _, spec = header.partition("=")
+    first, sep, last = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or "," in spec or not sep:
+        return None
+    if (first and not first.isdigit()) or (last and not last.isdigit()) or not (first or last):
+        return None
+
+    if first:
+        start, end = int(first), int(last) if last else size - 1
+        if last and end < start:
+            return None
+        if start >= size:
+            raise ValueError(header)
+        return start, min(end, size - 1)
+
+    if int(last) == 0 or size == 0:
+        raise ValueError(header)
+    return max(size - int(last), 0), size - 1
+
+
+class StorageResponse(StreamingResponse):
+    """
+    Streams a file of the storage, answering a `Range` request with `206 Partial Content`.
+
+    Only a single range is served; other `Range` headers, or an `If-Range` validator that no longer matches, get
+    the whole file. Local files are handed to the server with the `http.response.zerocopysend` extension when
+    it is offered. Otherwise the file is read `chunk_size` bytes at a time in a worker thread, so a download
+    holds at most one chunk in memory however large the file is.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        storage: Storage,
+        stored: StoredObject,
+        request_headers: Headers,
+        filename: Optional[str] = None,
+        attachment: bool = False,
+    ) -> None:
+        self.storage = storage
+        self.stored = stored
+        self.status_code = 200
+        self.media_type = stored.content_type or "application/octet-stream"
+        self.background = None
+        self.range: Optional[tuple[int, int]] = None
+
+        validators = {}
+        if stored.etag:
+            validators["etag"] = stored.etag
+        if stored.modified_at:
+            validators["last-modified"] = format_datetime(stored.modified_at.astimezone(timezone.utc), usegmt=True)
+
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if stored.etag and request_headers.get("if-none-match") in (stored.etag, "*"):
+            self.status_code = 304
+        elif range_header and (if_range is None or if_range in validators.values()):
+            try:
+                self.range = parse_range(range_header, stored.size)
+            except ValueError:
+                self.status_code = 416
+            else:
+                if self.range:
+                    self.status_code = 206
+
+        self.init_headers({
+            "accept-ranges": "bytes",
+            "cache-control": "private, no-cache",
+            **validators,
+        })
+        if self.status_code == 304:
+            return
+        if filename:
+            disposition = "attachment" if attachment else "inline"
+            fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode().replace('"', "")
+            fallback = fallback or "download"
+            self.headers["content-disposition"] = f'{disposition}; filename="{fallback}"; filename*=UTF-8\'\'{quote(filename)}'
+        if self.status_code == 416:
+            self.headers["content-range"] = f"bytes */{stored.size}"
+            self.headers["content-length"] = "0"
+        elif self.range:
+            start, end = self.range
+            self.headers["content-range"] = f"bytes {start}-{end}/{stored.size}"
+            self.headers["content-length"] = str(end - start + 1)
+        else:
+            self.headers["content-length"] = str(stored.size)
+
+    @property
+    def first_byte(self) -> bool:
+        """Whether the response sends the beginning of the file, i.e. is a new download and not a resumption."""
+        return self.status_code == 200 or (self.status_code == 206 and self.range is not None and self.range[0] == 0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.scope = scope
+        await super().__call__(scope, receive, send)
+
+    async def stream_response(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        start, end = self.range or (0, self.stored.size - 1)
+        if self.status_code not in (200, 206) or self.scope["method"] == "HEAD" or end < start:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        local = self.storage.locate(self.stored.path)
+        if local and "http.response.zerocopysend" in self.scope.get("extensions", {}):
+            with open(local, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": start,
+                    "count": end - start + 1,
+                    "more_body": False,
+                })
+            return
+
+        chunks = self.storage.stream(self.stored.path, start, end, self.chunk_size)
+        try:
+            async for chunk in iterate_in_threadpool(chunks):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            # Releases the file or the storage connection, also when the client went away.
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(chunks.close)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,76 @@
+from typing import Optional, TYPE_CHECKING
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.resources import Resources, _context
+
+if TYPE_CHECKING:
+    from .profiling import RequestProfiler
+    from .timing import Timed
+
+
+#----------------------------------------------------------------
+# Middleware
+#----------------------------------------------------------------
+class SessionMiddleware:
+    """
+    ASGI middleware running each request in its own `ResourceSession`.
+
+    The session is the `app.resources.context` of the request, and the request state keeps it as `session`.
+    Its transaction is committed, or rolled back when the session failed, just before the response starts.
+    A client therefore never gets a response before the next request can see its changes. The body is sent
+    and the background tasks run afterwards. A request raising before its response rolls back.
+
+    Unlike `@app.middleware('http')` (Starlette's `BaseHTTPMiddleware`), this runs the application in the
+    task of the request and passes its messages straight through. There is no extra task and no memory
+    stream per request, and streamed responses and background tasks behave as without middleware.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        resources: Resources,
+        timed: Optional["Timed"] = None,
+        profiler: Optional["RequestProfiler"] = None,
+    ) -> None:
+        self.app = app
+        self.resources = resources
+        self.timed = timed
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        session = self.resources.open()
+        token = _context.set(session)
+        scope.setdefault("state", {})["session"] = session
+        closed = False
+
+        async def send_committed(message: Message) -> None:
+            nonlocal closed
+            if not closed and message["type"] == "http.response.start":
+                closed = True
+                await session.close(None)
+            await send(message)
+
+        try:
+            format = self.profiler.requested(scope) if self.profiler else None
+            if format:
+                app = self.app
+                if self.timed:
+                    app = lambda scope, receive, send: self.timed(self.app, session, scope, receive, send)
+                await self.profiler(format, app, scope, receive, send_committed)
+            elif self.timed:
+                await self.timed(self.app, session, scope, receive, send_committed)
+            else:
+                await self.app(scope, receive, send_committed)
+        except BaseException as e:
+            session.fail()
+            if not closed:
+                closed = True
+                await session.close(e)
+            raise
+        else:
+            if not closed:
+                await session.close(None)
+        finally:
+            _context.reset(token)
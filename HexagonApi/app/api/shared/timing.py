@@ -0,0 +1,137 @@
+import asyncio
+import functools
+import logging
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import ApplicationSettings
+from app.resources import ResourceSession
+
+
+#----------------------------------------------------------------
+# Request timer
+#----------------------------------------------------------------
+@dataclass
+class RequestTimer:
+    started: float
+    # When the endpoint returned; the rest until the response starts is serialization
+    handled: Optional[float] = None
+
+
+_timer = ContextVar[RequestTimer]("_timer")
+
+
+def instrument_routes(app: FastAPI) -> None:
+    """
+    Marks when each endpoint returns, to split the time of a request into handling and rendering.
+
+    FastAPI calls `dependant.call` at request time, so the wrapper replaces it in place. The wrapper is a
+    coroutine function exactly when the endpoint is, which keeps sync endpoints in the thread pool.
+    """
+    def mark():
+        timer = _timer.get(None)
+        if timer is not None:
+            timer.handled = time.perf_counter()
+
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or getattr(route.dependant.call, "__timed__", False):
+            continue
+        call = route.dependant.call
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed(*args, __call=call, **kwargs):
+                try:
+                    return await __call(*args, **kwargs)
+                finally:
+                    mark()
+        else:
+            @functools.wraps(call)
+            def timed(*args, __call=call, **kwargs):
+                try:
+                    return __call(*args, **kwargs)
+                finally:
+                    mark()
+        timed.__timed__ = True
+        route.dependant.call = timed
+
+
+#----------------------------------------------------------------
+# Middleware
+#----------------------------------------------------------------
+class Timed:
+    """
+    Times a request handled within a `ResourceSession`.
+
+    Adds a `Server-Timing` header with the database time and query count of the session, the rendering time and
+    the total time until the response starts, and logs the same numbers keyed by the session ID: at DEBUG
+    level, or WARNING for requests slower than `slow_request`. A `statement_sample_rate` share of requests
+    records its statements, which are logged with slow requests to expose query explosions.
+    """
+    def __init__(self, settings: ApplicationSettings.Timing, logger: logging.Logger) -> None:
+        self.settings = settings
+        self.logger = logger
+
+    async def __call__(
+        self, app: ASGIApp, session: ResourceSession, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        timer = RequestTimer(time.perf_counter())
+        token = _timer.set(timer)
+        if self.settings.statement_sample_rate and random.random() < self.settings.statement_sample_rate:
+            session.stats.statements = []
+            session.stats.limit = self.settings.max_statements
+
+        async def send_timed(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self.finish(scope, session, timer, message)
+            await send(message)
+
+        try:
+            await app(scope, receive, send_timed)
+        finally:
+            _timer.reset(token)
+
+    def finish(self, scope: Scope, session: ResourceSession, timer: RequestTimer, start: Message) -> None:
+        """
+        Adds the header to the response starting with `start` and logs the request.
+        """
+        now = time.perf_counter()
+        total = now - timer.started
+        render = now - timer.handled if timer.handled is not None else 0.0
+        stats = session.stats
+
+        if self.settings.header:
+            MutableHeaders(scope=start).append(
+                "Server-Timing",
+                f'db;dur={stats.time * 1000:.1f};desc="{stats.count} queries", '
+                f"render;dur={render * 1000:.1f}, total;dur={total * 1000:.1f}",
+            )
+
+        slow = total >= self.settings.slow_request
+        level = logging.WARNING if slow else logging.DEBUG
+        if self.logger.isEnabledFor(level):
+            route = scope.get("route")
+            fields = {
+                "session": session.id,
+                "method": scope["method"],
+                "path": route.path if isinstance(route, APIRoute) else scope["path"],
+                "status": start["status"],
+                "total_ms": round(total * 1000, 1),
+                "db_ms": round(stats.time * 1000, 1),
+                "db_queries": stats.count,
+                "render_ms": round(render * 1000, 1),
+            }
+            message = " ".join(f"{k}={v}" for k, v in fields.items())
+            if slow and stats.statements:
+                fields["statements"] = [
+                    {"sql": sql, "ms": round(elapsed * 1000, 1)} for sql, elapsed in stats.statements
+                ]
+                message += "".join(
+                    f"\n  {elapsed * 1000:8.1f} ms  {' '.join(sql.split())}" for sql, elapsed in stats.statements
+                )
+            self.logger.log(level, f"{'Slow request' if slow else 'Request'} {message}", extra=fields)
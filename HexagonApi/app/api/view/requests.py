@@ -20,6 +20,17 @@ class UpdateProfileRequest(BaseModel):
     address: Optional[str] = Field(None, description="Address")
 
 
+class ProfilePictureUploadRequest(BaseModel):
+    """Profile picture upload session request"""
+    content_type: str = Field(description="Media type of the picture, e.g. image/jpeg")
+    size: int = Field(gt=0, description="Size of the picture in bytes")
+
+
+class ProfilePictureCommitRequest(BaseModel):
+    """Profile picture commit request"""
+    key: str = Field(description="Key returned by the upload session, after the upload has finished")
+
+
 # ================================================================
 # Enrollment Requests
 # ================================================================
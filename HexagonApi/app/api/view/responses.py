@@ -3,6 +3,7 @@ from typing import List, Optional
 from decimal import Decimal
 
 import app.model.composite as c
+from app.ext.search.base import Suggestion
 from pydantic import ConfigDict, Field
 from pydantic.alias_generators import to_camel
 from pydantic.dataclasses import dataclass
@@ -67,6 +68,9 @@ class UserProfile:
     bio: Optional[str] = Field(description="Biography")
     address: Optional[str] = Field(description="Address")
     profile_picture: Optional[str] = Field(description="Profile picture URL")
+    profile_picture_thumbnail: Optional[str] = Field(
+        default=None, description="Profile picture thumbnail URL, once an uploaded picture has been processed"
+    )
 
     @classmethod
     def of(cls, profile: c.UserProfile) -> Self:
@@ -76,6 +80,10 @@ class UserProfile:
                 profile_picture_url = r.storage.urlize(profile.profile_picture)
             except Exception as e:
                 profile_picture_url = profile.profile_picture
+
+        thumbnail_url = None
+        if profile.profile_picture_thumbnail:
+            thumbnail_url = r.storage.urlize(profile.profile_picture_thumbnail)
         
         return cls(
             id=profile.id,
@@ -86,10 +94,23 @@ class UserProfile:
             login_method=profile.login_method,
             bio=profile.bio,
             address=profile.address,
-            profile_picture=profile_picture_url
+            profile_picture=profile_picture_url,
+            profile_picture_thumbnail=thumbnail_url,
         )
 
 
+@dataclass(config=config)
+class DirectUpload:
+    key: str = Field(description="Storage key to commit once the upload has finished")
+    url: str = Field(description="URL to POST the upload form to")
+    fields: dict[str, str] = Field(description="Form fields to send before the file (sent as `file`)")
+    expires_at: Optional[datetime] = Field(description="Expiration of the form")
+
+    @classmethod
+    def of(cls, upload: c.DirectUpload) -> Self:
+        return cls(key=upload.key, url=upload.url, fields=upload.fields, expires_at=upload.expires_at)
+
+
 # ================================================================
 # Course Responses
 # ================================================================
@@ -745,4 +766,67 @@ class FileDownloadResponse:
             file_size=file.file_size,
             file_type=file.file_type,
             expires_in=3600
-        )
\ No newline at end of file
+        )
+
+
+# ================================================================
+# Search Responses
+# ================================================================
+
+@dataclass(config=config)
+class SearchResult:
+    kind: str = Field(description="Result type: course or news")
+    id: str = Field(description="Item ID")
+    title: str = Field(description="Title")
+    slug: str = Field(description="URL slug")
+    short_description: str = Field(description="Short description")
+    image_key: Optional[str] = Field(description="Image key")
+    published_at: Optional[datetime] = Field(description="Published date (news only)")
+    rank: float = Field(description="Relevance score")
+
+    @classmethod
+    def of(cls, hit: c.SearchHit) -> "SearchResult":
+        return cls(
+            kind=hit.kind,
+            id=hit.id,
+            title=hit.title,
+            slug=hit.slug,
+            short_description=hit.short_description,
+            image_key=hit.image_key,
+            published_at=hit.published_at,
+            rank=hit.rank
+        )
+
+
+@dataclass(config=config)
+class SearchListResponse:
+    """Page of search results; matches are not counted, so there is no total"""
+    items: List[SearchResult] = Field(description="Search results ordered by relevance")
+    page: int = Field(description="Current page number")
+    per_page: int = Field(description="Items per page")
+    has_next: bool = Field(description="Has next page")
+    has_prev: bool = Field(description="Has previous page")
+
+
+@dataclass(config=config)
+class SuggestionResult:
+    kind: str = Field(description="Suggestion type: course, category, class or news")
+    id: str = Field(description="Item ID")
+    label: str = Field(description="Text to display")
+    slug: str = Field(description="URL slug (the course slug for classes)")
+    detail: Optional[str] = Field(default=None, description="Secondary text, e.g. the course title of a class")
+
+    @classmethod
+    def of(cls, suggestion: Suggestion) -> "SuggestionResult":
+        return cls(
+            kind=suggestion.kind,
+            id=suggestion.id,
+            label=suggestion.label,
+            slug=suggestion.slug,
+            detail=suggestion.detail
+        )
+
+
+@dataclass(config=config)
+class SuggestionListResponse:
+    items: List[SuggestionResult] = Field(description="Suggestions, most popular first")
@@ -22,6 +22,13 @@ class ApplicationSettings(BaseSettings):
 
         dsn: str = Field(description="Database DSN connection string.")
         pool_size: int = Field(default=20, description="Maximum connection pool size.")
+        max_overflow: int = Field(
+            default=10, description="Connections opened beyond pool_size under load, closed once returned."
+        )
+        max_connections: int = Field(
+            default=80,
+            description="Connections all worker processes together may open; below the server's max_connections.",
+        )
         echo: bool = Field(default=False, description="Whether to output query logs.")
         echo_pool: bool = Field(default=False, description="Whether to output connection pool-related logs.")
 
@@ -45,6 +52,148 @@ class ApplicationSettings(BaseSettings):
         username: Optional[str] = Field(default=None, description="Basic auth username for docs")
         password: Optional[str] = Field(default=None, description="Basic auth password for docs")
 
+    class Compression(BaseModel):
+        """
+        Response compression configuration.
+        """
+        enabled: bool = Field(default=True, description="Whether to compress responses.")
+        minimum_size: int = Field(default=1024, description="Minimum body size in bytes to compress.")
+        gzip_level: int = Field(default=6, description="gzip compression level (1-9).")
+        brotli_quality: int = Field(default=5, description="Brotli quality (0-11), used when brotli is installed.")
+        content_types: list[str] = Field(
+            default=[
+                "application/json",
+                "application/javascript",
+                "image/svg+xml",
+                "text/css",
+                "text/html",
+                "text/plain",
+            ],
+            description="Media types eligible for compression.",
+        )
+        cache_entries: int = Field(default=512, description="Maximum number of payloads kept in the compressed cache.")
+        cache_bytes: int = Field(default=32 * 1024 * 1024, description="Maximum total bytes kept in the compressed cache.")
+
+    class Suggest(BaseModel):
+        """
+        Search-as-you-type suggestion index configuration.
+        """
+        enabled: bool = Field(default=True, description="Whether to build the suggestion index.")
+        channel: str = Field(default="hexagon_search", description="PostgreSQL notification channel announcing changes.")
+        debounce: float = Field(default=1.0, description="Seconds to wait for more changes before rebuilding.")
+        refresh_interval: float = Field(default=600.0, description="Seconds between rebuilds without changes.")
+        news_limit: int = Field(default=5000, description="Number of most recent news indexed.")
+
+    class Upload(BaseModel):
+        """
+        Direct upload configuration.
+        """
+        expiration: int = Field(default=900, description="Seconds a presigned upload form is valid for.")
+        picture_max_size: int = Field(default=10 * 1024 * 1024, description="Maximum profile picture size in bytes.")
+        picture_types: list[str] = Field(
+            default=["image/jpeg", "image/png", "image/webp", "image/gif", "image/heic", "image/heif"],
+            description="Accepted profile picture media types.",
+        )
+        picture_dimension: int = Field(default=1024, description="Longest side of a processed profile picture.")
+        thumbnail_dimension: int = Field(default=256, description="Longest side of a profile picture thumbnail.")
+
+    class Timing(BaseModel):
+        """
+        Per-request database statistics and timing configuration.
+        """
+        enabled: bool = Field(default=True, description="Whether to count queries and time requests.")
+        header: bool = Field(default=True, description="Whether to send the Server-Timing header.")
+        slow_request: float = Field(default=1.0, description="Seconds after which a request is logged as slow.")
+        statement_sample_rate: float = Field(
+            default=0.0, description="Share of requests (0-1) whose statements are recorded and logged when slow."
+        )
+        max_statements: int = Field(default=100, description="Maximum number of statements logged per request.")
+
+    class Metrics(BaseModel):
+        """
+        Prometheus metrics configuration.
+        """
+        enabled: bool = Field(
+            default=True, description="Whether to collect metrics and serve them; needs the documentation credentials."
+        )
+        path: str = Field(default="/metrics", description="Path of the metrics endpoint.")
+        directory: Optional[str] = Field(
+            default=None,
+            description="Directory the worker processes share their samples through; app.serve creates one if unset.",
+        )
+        interval: float = Field(default=5.0, description="Seconds between two writes of a worker's samples.")
+
+        def active(self, docs: "ApplicationSettings.DocumentAuth") -> bool:
+            # The endpoint lists the routes, their traffic and the pool state: never without credentials
+            return self.enabled and docs.enabled and bool(docs.username and docs.password)
+
+    class Profiling(BaseModel):
+        """
+        On-demand request profiling configuration (see `app.api.shared.profiling`).
+        """
+        enabled: bool = Field(
+            default=True, description="Whether requests can ask to be profiled; needs the documentation credentials."
+        )
+        header: str = Field(default="X-Profile", description="Request header asking for a profile, with its format.")
+        format: str = Field(default="html", description="Default report format: html or speedscope.")
+        interval: float = Field(default=0.001, description="Sampling interval in seconds.")
+        directory: str = Field(default="./data/profiles", description="Directory the reports are written to.")
+        path: str = Field(default="/profiles", description="URL path the reports are served under.")
+        max_reports: int = Field(default=100, description="Number of most recent reports kept.")
+
+        def active(self, docs: "ApplicationSettings.DocumentAuth") -> bool:
+            # Reports expose the code and the data of the requests: never without credentials
+            return self.enabled and docs.enabled and bool(docs.username and docs.password)
+
+    class Strict(BaseModel):
+        """
+        Development checks of how the ORM loads data (see `app.model.loading`).
+        """
+        enabled: Optional[bool] = Field(
+            default=None, description="Whether to run the checks; by default only in the test environment."
+        )
+        repeated_statements: int = Field(
+            default=3, description="Runs of one statement in a request reported as N+1; 0 disables the check."
+        )
+        fail: bool = Field(default=False, description="Whether an N+1 statement raises instead of logging a warning.")
+
+        def active(self, env: str) -> bool:
+            # Not by default in dev, which is also what a deployment without ENV runs as
+            return self.enabled if self.enabled is not None else env == "test"
+
+    class Server(BaseModel):
+        """
+        Production server configuration (see `app.serve`).
+        """
+        host: str = Field(default="0.0.0.0", description="Address to listen on.")
+        port: int = Field(default=8000, description="Port to listen on.")
+        workers: Optional[int] = Field(
+            default=None,
+            description="Worker processes; by default one per CPU, as many as DB__MAX_CONNECTIONS allows. "
+            "Each opens its own DB pool.",
+        )
+        loop: str = Field(default="uvloop", description="Event loop of the workers: uvloop, asyncio or auto.")
+        http: str = Field(default="httptools", description="HTTP parser of the workers: httptools, h11 or auto.")
+        preload: bool = Field(default=True, description="Whether to import the application before forking workers.")
+        max_requests: int = Field(default=10000, description="Requests after which a worker is replaced; 0 disables.")
+        max_requests_jitter: int = Field(
+            default=1000, description="Random extra requests per worker, so workers are not replaced together."
+        )
+        graceful_timeout: int = Field(
+            default=30, description="Seconds a stopping worker has to finish its requests before being killed."
+        )
+        timeout: int = Field(default=60, description="Seconds without a heartbeat after which a worker is restarted.")
+        keepalive: int = Field(default=5, description="Seconds an idle keep-alive connection is kept open.")
+        backlog: int = Field(default=2048, description="Maximum number of pending connections.")
+
+        def worker_count(self, connections: int, max_connections: int) -> int:
+            """
+            `workers`, or one per CPU, only as many as `max_connections` allows with `connections` per worker.
+            """
+            if self.workers:
+                return self.workers
+            return max(min(os.cpu_count() or 1, max_connections // connections), 1)
+
     # Application settings
     name: str = Field(description="Application name.")
     version: str = Field(description="Application version.")
@@ -60,6 +209,34 @@ class ApplicationSettings(BaseSettings):
     email: SendEmailSettings
     tz: SetTimeZone
     docs: DocumentAuth = Field(default_factory=DocumentAuth)
+    compression: Compression = Field(default_factory=Compression)
+    suggest: Suggest = Field(default_factory=Suggest)
+    upload: Upload = Field(default_factory=Upload)
+    timing: Timing = Field(default_factory=Timing)
+    metrics: Metrics = Field(default_factory=Metrics)
+    strict: Strict = Field(default_factory=Strict)
+    profiling: Profiling = Field(default_factory=Profiling)
+    server: Server = Field(default_factory=Server)
+
+    def worker_connections(self) -> int:
+        """
+        Database connections one worker process may open: its pool, the overflow and the suggestion listener.
+        """
+        return self.db.pool_size + self.db.max_overflow + (1 if self.suggest.enabled else 0)
+
+    def worker_count(self) -> int:
+        """
+        Worker processes of the server, whose connections together must fit in `db.max_connections`.
+        """
+        connections = self.worker_connections()
+        workers = self.server.worker_count(connections, self.db.max_connections)
+        if workers * connections > self.db.max_connections:
+            raise ValueError(
+                f"{workers} workers may open {workers * connections} database connections, {connections} each "
+                f"(DB__POOL_SIZE + DB__MAX_OVERFLOW + the suggestion listener), over DB__MAX_CONNECTIONS="
+                f"{self.db.max_connections}: lower SERVER__WORKERS or the pool sizes."
+            )
+        return workers
 
     def dump(self) -> str:
         lines = ["[root]"]
@@ -4,15 +4,24 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, TYPE_CHECKING
 from functools import cached_property
-from jinja2 import Environment, FileSystemLoader
 import logging
 import mimetypes
 from pydantic import BaseModel, Field
+from app.ext.metrics.base import REGISTRY
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
 
 logger = logging.getLogger(__name__)
 
+SEND_SECONDS = REGISTRY.histogram(
+    "hexagon_smtp_send_duration_seconds",
+    "Duration of sending an email over SMTP, including connecting and logging in.",
+    ("outcome",),
+)
+
 
 # ----------------------------------------------------------------
 # Settings
@@ -61,8 +70,10 @@ class GmailEmailService:
         self.embedded_images = {}  # Cache for embedded images
         
     @cached_property
-    def template_env(self) -> Environment:
+    def template_env(self) -> "Environment":
         """Get Jinja2 template environment"""
+        from jinja2 import Environment, FileSystemLoader
+
         template_dir = Path(self.settings.template_dir)
         if not template_dir.exists():
             template_dir.mkdir(parents=True, exist_ok=True)
@@ -240,7 +251,7 @@ class GmailEmailService:
             if bcc_emails:
                 all_recipients.extend(bcc_emails)
             
-            with self._create_smtp_connection() as server:
+            with SEND_SECONDS.time(), self._create_smtp_connection() as server:
                 server.send_message(msg, to_addrs=all_recipients)
             
             logger.info(f"Email sent successfully to {len(to_emails)} recipients")
@@ -1,14 +1,24 @@
 import json
-from typing import Any, Optional, Literal
-from functools import cached_property
+from typing import Any, Optional, Literal, TYPE_CHECKING
+from functools import cache, cached_property
 import jwt
 from pydantic import BaseModel
-import requests
-from cachecontrol import CacheControl
 from cryptography.x509 import load_pem_x509_certificate
 from cryptography.hazmat.backends import default_backend
-import firebase_admin
-import firebase_admin.auth
+from app.ext.metrics.base import REGISTRY
+
+# firebase_admin (with google-auth) and requests are imported on first use: only the admin kind and fetching
+# the signing keys need them
+if TYPE_CHECKING:
+    import firebase_admin
+    import firebase_admin.auth
+
+
+VERIFY_SECONDS = REGISTRY.histogram(
+    "hexagon_firebase_verify_duration_seconds",
+    "Duration of Firebase ID token verifications, including fetching the signing keys.",
+    ("outcome",),
+)
 
 
 class FirebaseSettings(BaseModel):
@@ -43,24 +53,35 @@ class FirebaseAuth:
         Returns:
             Claims.
         """
-        kid = jwt.get_unverified_header(token).get('kid', '')
-        key = kid and self.keys().get(kid, None)
-        if not key:
-            raise ValueError(f"Invalid firebase kid: {kid}")
-
-        cert = load_pem_x509_certificate(key.encode(), default_backend())
-
-        return jwt.decode(
-            token,
-            cert.public_key(), # type: ignore
-            algorithms=['RS256'],
-            audience=self.settings.project_id,
-            issuer=f"https://securetoken.google.com/{self.settings.project_id}",
-            leeway=30,
-        )
+        with VERIFY_SECONDS.time():
+            kid = jwt.get_unverified_header(token).get('kid', '')
+            key = kid and self.keys().get(kid, None)
+            if not key:
+                raise ValueError(f"Invalid firebase kid: {kid}")
 
-    def keys(self, cache = CacheControl(requests.session())) -> dict[str, str]:
-        return cache.get('https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com').json()
+            cert = load_pem_x509_certificate(key.encode(), default_backend())
+
+            return jwt.decode(
+                token,
+                cert.public_key(), # type: ignore
+                algorithms=['RS256'],
+                audience=self.settings.project_id,
+                issuer=f"https://securetoken.google.com/{self.settings.project_id}",
+                leeway=30,
+            )
+
+    def keys(self) -> dict[str, str]:
+        return _key_session().get('https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com').json()
+
+
+@cache
+def _key_session():
+    """
+    HTTP session shared by the process, caching the signing keys as long as their `Cache-Control` allows.
+    """
+    import requests
+    from cachecontrol import CacheControl
+    return CacheControl(requests.session())
 
 
 class FirebaseAdmin:
@@ -74,10 +95,13 @@ class FirebaseAdmin:
         self.auth = FirebaseAuth(settings)
 
     @cached_property
-    def app(self) -> firebase_admin.App:
+    def app(self) -> "firebase_admin.App":
         """
         Gets the Firebase application associated with the set name.
         """
+        import firebase_admin
+        import firebase_admin.credentials
+
         try:
             return firebase_admin.get_app(self.settings.name) if self.settings.name else firebase_admin.get_app()
         except ValueError:
@@ -94,6 +118,9 @@ class FirebaseAdmin:
         Returns:
             A pair of access token and refresh token.
         """
+        import firebase_admin.auth
+        import requests
+
         custom_token = firebase_admin.auth.create_custom_token(sub, app=self.app, developer_claims=claims).decode()
 
         r = requests.post(
@@ -107,7 +134,7 @@ class FirebaseAdmin:
 
         return r.json()['idToken'],  r.json()['refreshToken']
 
-    def get_users(self, uids: list[str]) -> list[firebase_admin.auth.UserRecord]:
+    def get_users(self, uids: list[str]) -> list["firebase_admin.auth.UserRecord"]:
         """
         Gets the user from UID.
 
@@ -116,6 +143,8 @@ class FirebaseAdmin:
         Returns:
             User list.
         """
+        import firebase_admin.auth
+
         ids = [firebase_admin.auth.UidIdentifier(uid) for uid in uids]
         res = firebase_admin.auth.get_users(ids, app=self.app)
         if len(res.users) == 0:
@@ -1,6 +1,12 @@
 from dataclasses import dataclass, field
 import io
-from PIL import Image
+from PIL import Image, ImageOps, JpegImagePlugin
+from pillow_heif import register_heif_opener
+
+
+# Decode HEIC/HEIF uploads, and read MPO files (multi-picture JPEG from phones) as plain JPEG
+register_heif_opener()
+JpegImagePlugin._getmp = lambda x: None
 
 
 @dataclass
@@ -48,6 +54,28 @@ def load_image(data: bytes) -> ImageContent:
     return ImageContent(image)
 
 
+def render_jpegs(data: bytes, *dimensions: int, quality: int = 85) -> list[bytes]:
+    """
+    Decodes the image once and encodes it as JPEG fitted into each of `dimensions` (largest first).
+
+    The Exif orientation is applied to the pixels, and metadata such as Exif (including GPS) is dropped.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        # JPEG can be decoded at a reduced scale close to the largest output
+        img.draft("RGB", (dimensions[0], dimensions[0]))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        outputs = []
+        for dimension in dimensions:
+            img.thumbnail((dimension, dimension))
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG", quality=quality, optimize=True)
+            outputs.append(buf.getvalue())
+        return outputs
+
+
 def resize_and_compress_image(image_path: str = None, image: Image = None, max_width=None, max_height=None, quality=85):
     """
     Resize and compress an image, returning the processed Image object.
@@ -0,0 +1,405 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+
+#----------------------------------------------------------------
+# Collectors
+#----------------------------------------------------------------
+# Latency buckets in seconds, from a cache hit to a slow outbound call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    """
+    Base of the collectors.
+
+    Values are kept in one dictionary per thread, created the first time the thread records a value. A shard is
+    only written by its own thread, so recording takes no lock; a scrape copies each shard (a single C call
+    under the GIL) and sums them. Each worker process has its own values (see `SharedRegistry`).
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards: list[dict] = []
+
+    def _values(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            self._shards.append(values)
+            return values
+
+    def _snapshots(self) -> Iterable[dict]:
+        for shard in list(self._shards):
+            yield dict(shard)
+
+    def samples(self) -> Iterable[tuple[str, tuple[str, ...], float]]:
+        """
+        Current values as (name suffix, label values, value).
+        """
+        raise NotImplementedError()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        values = self._values()
+        values[labels] = values.get(labels, 0) + amount
+
+    def samples(self):
+        merged: dict[tuple, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                merged[labels] = merged.get(labels, 0) + value
+        for labels, value in merged.items():
+            yield "", labels, value
+
+
+class Gauge(Counter):
+    """
+    Gauge moved by increments, such as requests in flight.
+    """
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """
+    Histogram of observations, usually durations in seconds.
+
+    When the last label is `outcome`, `time()` fills it with `ok` or `error` depending on whether the block
+    raised.
+    """
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._values()
+        cell = values.get(labels)
+        if cell is None:
+            # Counts per bucket, the count above the last bucket, then the sum
+            cell = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self, *labels: str) -> "Timer":
+        """
+        Observes the duration of a `with` block.
+
+        Args:
+            labels: Label values, without `outcome`.
+        Returns:
+            Context manager.
+        """
+        return Timer(self, labels, self.labels[-1:] == ("outcome",))
+
+    def samples(self):
+        merged: dict[tuple, list] = {}
+        for shard in self._snapshots():
+            for labels, cell in shard.items():
+                total = merged.setdefault(labels, [0] * len(cell))
+                for i, value in enumerate(list(cell)):
+                    total[i] += value
+        for labels, cell in merged.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), cell):
+                cumulative += count
+                yield "_bucket", labels + (_number(bound),), cumulative
+            yield "_sum", labels, cell[-1]
+            yield "_count", labels, cumulative
+
+
+class Timer:
+    __slots__ = ("histogram", "labels", "outcome", "started")
+
+    def __init__(self, histogram: Histogram, labels: tuple, outcome: bool) -> None:
+        self.histogram = histogram
+        self.labels = labels
+        self.outcome = outcome
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        labels = self.labels + (("error" if exc_type else "ok"),) if self.outcome else self.labels
+        self.histogram.observe(time.perf_counter() - self.started, *labels)
+
+
+class Collected(Metric):
+    """
+    Values read when scraped, from state that is kept anyway (pool sizes, cache statistics).
+    """
+    def __init__(
+        self, name: str, help: str, kind: str, labels: Sequence[str], read: Callable[[], dict[tuple, float]]
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.read = read
+
+    def samples(self):
+        for labels, value in self.read().items():
+            yield "", labels, value
+
+
+#----------------------------------------------------------------
+# Registry
+#----------------------------------------------------------------
+class Registry:
+    """
+    Collectors exported together in the Prometheus text format.
+
+    Creating a collector with a registered name returns the registered one, so modules can declare their
+    collectors at import time.
+    """
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))  # type: ignore[return-value]
+
+    def collected(
+        self, name: str, help: str, kind: str, labels: Sequence[str], read: Callable[[], dict[tuple, float]]
+    ) -> Collected:
+        """
+        Registers values read on each scrape, replacing an earlier reader of the same name.
+        """
+        metric = self.metrics[name] = Collected(name, help, kind, labels, read)
+        return metric
+
+    def collect(self) -> list[dict[str, Any]]:
+        """
+        Current samples of every collector, as JSON-serializable families.
+        """
+        return [
+            {
+                "name": metric.name,
+                "help": metric.help,
+                "kind": metric.kind,
+                "labels": metric.labels + (("le",) if metric.kind == "histogram" else ()),
+                "samples": [(suffix, labels, value) for suffix, labels, value in metric.samples()],
+            }
+            for metric in list(self.metrics.values())
+        ]
+
+    def expose(self) -> str:
+        """
+        Renders every collector in the Prometheus text exposition format (version 0.0.4).
+        """
+        return render(self.collect())
+
+    def reset(self) -> None:
+        """
+        Forgets the values recorded so far, which a forked process copied from its parent.
+        """
+        for metric in self.metrics.values():
+            metric._local = threading.local()
+            metric._shards = []
+
+
+def render(families: Iterable[dict[str, Any]]) -> str:
+    """
+    Renders families of `Registry.collect` in the Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family['name']} {family['help']}")
+        lines.append(f"# TYPE {family['name']} {family['kind']}")
+        for suffix, labels, value in family["samples"]:
+            pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(family["labels"], labels))
+            name = f"{family['name']}{suffix}{{{pairs}}}" if pairs else f"{family['name']}{suffix}"
+            lines.append(f"{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class SharedRegistry:
+    """
+    Samples of every worker process of a server, shared through files in a directory.
+
+    Each worker process writes the samples of its registry to `<pid>.json` every `interval` seconds and when
+    it stops. A scrape reaches any one of the workers, which adds up the files of the others and its own
+    current samples, so one scrape target covers the whole server. Counters and histograms of stopped workers
+    stay in the sums, so totals never go down when a worker is replaced; gauges only count running workers.
+    The directory must be emptied when the server starts (see `app.serve`).
+    """
+    def __init__(self, registry: Registry, directory: str, interval: float, logger: logging.Logger) -> None:
+        self.registry = registry
+        self.directory = Path(directory)
+        self.interval = interval
+        self.logger = logger
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> Path:
+        # Read on each call: the registry may be created before the worker process is forked
+        return self.directory / f"{os.getpid()}.json"
+
+    def write(self, final: bool = False) -> None:
+        """
+        Writes the samples of this process; the final ones, once it stops serving, leave out the gauges.
+        """
+        families = [f for f in self.registry.collect() if not (final and f["kind"] == "gauge")]
+        path = self.path
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"pid": os.getpid(), "families": families}))
+        os.replace(temporary, path)
+
+    def read(self) -> list[dict[str, Any]]:
+        """
+        Families of every worker process, with the samples of the same name and labels added up.
+        """
+        merged: dict[str, dict[str, Any]] = {}
+
+        def add(families: Iterable[dict[str, Any]], running: bool) -> None:
+            for family in families:
+                if family["kind"] == "gauge" and not running:
+                    continue
+                into = merged.setdefault(family["name"], {**family, "samples": {}})
+                for suffix, labels, value in family["samples"]:
+                    key = (suffix, tuple(labels))
+                    into["samples"][key] = into["samples"].get(key, 0) + value
+
+        own = self.path
+        for path in sorted(self.directory.glob("*.json")):
+            if path == own:
+                continue
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Failed to read the metrics of another worker: {path}", exc_info=e)
+                continue
+            add(snapshot["families"], _running(snapshot["pid"]))
+        add(self.registry.collect(), True)
+
+        return [
+            {**family, "samples": [(suffix, labels, value) for (suffix, labels), value in family["samples"].items()]}
+            for family in merged.values()
+        ]
+
+    def expose(self) -> str:
+        return render(self.read())
+
+    def start(self) -> None:
+        """
+        Starts writing the samples of this process periodically in the running event loop.
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._publish())
+
+    async def _publish(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.write)
+            except OSError as e:
+                self.logger.warning(f"Failed to write the metrics of this worker: {self.path}", exc_info=e)
+            await asyncio.sleep(self.interval)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await asyncio.to_thread(self.write, True)
+        except OSError as e:
+            self.logger.warning(f"Failed to write the metrics of this worker: {self.path}", exc_info=e)
+
+
+def _running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+
+# Caches by name, each read as (hits, misses) when scraped
+_caches: dict[str, Callable[[], tuple[int, int]]] = {}
+
+
+def watch_cache(name: str, stats: Callable[[], tuple[int, int]]) -> None:
+    """
+    Exports the hit and miss counts of a cache that already keeps them.
+
+    Args:
+        name: Value of the `cache` label.
+        stats: Function returning the (hits, misses) counts, such as `lambda: f.cache_info()[:2]`.
+    """
+    _caches[name] = stats
+
+
+REGISTRY.collected(
+    "hexagon_cache_hits_total", "Lookups answered from a cache.", "counter", ("cache",),
+    lambda: {(name,): stats()[0] for name, stats in list(_caches.items())},
+)
+REGISTRY.collected(
+    "hexagon_cache_misses_total", "Lookups missing a cache.", "counter", ("cache",),
+    lambda: {(name,): stats()[1] for name, stats in list(_caches.items())},
+)
+
+_started = time.time()
+
+REGISTRY.collected(
+    "hexagon_process_start_time_seconds", "Start time of the worker process since the epoch.", "gauge", ("pid",),
+    lambda: {(str(os.getpid()),): _started},
+)
+
+
+def _forked() -> None:
+    # A worker forked from a master that imported the application starts afresh
+    global _started
+    _started = time.time()
+    REGISTRY.reset()
+
+
+os.register_at_fork(after_in_child=_forked)
@@ -0,0 +1,251 @@
+import asyncio
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+import heapq
+import logging
+import re
+import time
+import unicodedata
+from typing import Any, Awaitable, Callable, Iterable, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+#----------------------------------------------------------------
+# Normalization
+#----------------------------------------------------------------
+# Mirrors SlugConverter.VIETNAMESE_CHAR_MAP in HexagonAdmin (course/utils/create_slug.py) and the
+# `hexagon_fold()` SQL function generated from it, so suggestions and full-text search fold text alike.
+_ACCENTS = {
+    "a": "àáạảãâầấậẩẫăằắặẳẵ",
+    "e": "èéẹẻẽêềếệểễ",
+    "i": "ìíịỉĩ",
+    "o": "òóọỏõôồốộổỗơờớợởỡ",
+    "u": "ùúụủũưừứựửữ",
+    "y": "ỳýỵỷỹ",
+    "d": "đ",
+}
+_FOLD_TABLE = str.maketrans(
+    {accented: plain for plain, chars in _ACCENTS.items() for accented in chars}
+    | {accented.upper(): plain.upper() for plain, chars in _ACCENTS.items() for accented in chars}
+)
+_SEPARATORS = re.compile(r"[^\w]+")
+
+
+def fold(text: Optional[str]) -> str:
+    """
+    Folds text for matching: Vietnamese accents removed, lower-cased, punctuation collapsed to single spaces.
+
+    Args:
+        text: Text to fold.
+    Returns:
+        Folded text.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", text).translate(_FOLD_TABLE).lower()
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+#----------------------------------------------------------------
+# Index
+#----------------------------------------------------------------
+@dataclass(slots=True, frozen=True)
+class Suggestion:
+    """
+    Entry of the suggestion index.
+    """
+    kind: str
+    id: str
+    label: str
+    slug: str
+    popularity: int = 0
+    detail: Optional[str] = None
+    terms: tuple[str, ...] = ()
+
+
+class PrefixIndex:
+    """
+    Immutable prefix index over suggestion terms.
+
+    Every word-suffix of a folded term ("luyen thi toan", "thi toan", "toan") is kept in one sorted list, so
+    a prefix of any word matches with two bisections. Entries are ranked by popularity up front; a match is
+    then the lowest entry numbers in the bisected range. Ranges of short prefixes, which are large, are
+    resolved when the index is built, and recent lookups are cached since many visitors type the same
+    prefixes.
+    """
+    def __init__(self, suggestions: Iterable[Suggestion], precomputed: int = 2, cache_size: int = 4096) -> None:
+        self._cached = lru_cache(maxsize=cache_size)(self._lookup)
+        self.entries: list[Suggestion] = sorted(suggestions, key=lambda s: -s.popularity)
+
+        pairs: list[tuple[str, int]] = []
+        for number, entry in enumerate(self.entries):
+            seen = set()
+            for term in entry.terms or (entry.label,):
+                words = fold(term).split(" ")
+                for i in range(len(words)):
+                    key = " ".join(words[i:])
+                    if key and key not in seen:
+                        seen.add(key)
+                        pairs.append((key, number))
+        pairs.sort()
+
+        self.keys: list[str] = [key for key, _ in pairs]
+        self.refs = array("I", (number for _, number in pairs))
+        self.short: dict[str, array] = {}
+        for key in self.keys:
+            for length in range(1, precomputed + 1):
+                prefix = key[:length]
+                if len(prefix) == length and prefix not in self.short:
+                    self.short[prefix] = self._range(prefix)
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _bounds(self, prefix: str) -> tuple[int, int]:
+        lo = bisect_left(self.keys, prefix)
+        return lo, bisect_left(self.keys, prefix + "\U0010ffff", lo)
+
+    def _range(self, prefix: str) -> array:
+        lo, hi = self._bounds(prefix)
+        return array("I", sorted(set(self.refs[lo:hi])))
+
+    def lookup(self, text: str, limit: int = 10, kinds: Optional[Sequence[str]] = None) -> list[Suggestion]:
+        """
+        Finds the most popular entries having a word that starts with the text.
+
+        Args:
+            text: Typed text; accents and case are ignored.
+            limit: Maximum number of entries.
+            kinds: Kinds of entries to return, all when omitted.
+        Returns:
+            Matching entries, most popular first.
+        """
+        prefix = fold(text)
+        if not prefix or limit <= 0:
+            return []
+        return list(self._cached(prefix, limit, tuple(sorted(kinds)) if kinds is not None else None))
+
+    def _lookup(self, prefix: str, limit: int, kinds: Optional[tuple[str, ...]]) -> tuple[Suggestion, ...]:
+        numbers = self.short.get(prefix)
+        if numbers is not None:
+            found = []
+            for number in numbers:
+                entry = self.entries[number]
+                if kinds is None or entry.kind in kinds:
+                    found.append(entry)
+                    if len(found) == limit:
+                        break
+            return tuple(found)
+
+        lo, hi = self._bounds(prefix)
+        candidates = set(self.refs[lo:hi])
+        if kinds is not None:
+            candidates = {number for number in candidates if self.entries[number].kind in kinds}
+        return tuple(self.entries[number] for number in heapq.nsmallest(limit, candidates))
+
+
+#----------------------------------------------------------------
+# Live index
+#----------------------------------------------------------------
+class SuggestionIndex:
+    """
+    Process-wide suggestion index, rebuilt from the database when it changes.
+
+    Changes are announced on a PostgreSQL notification channel by triggers the admin installs
+    (HexagonAdmin/course/search.py). Notifications arriving together are coalesced into one rebuild, and
+    the index is also rebuilt periodically so popularity stays current. Lookups always read a complete
+    index; a rebuild swaps in a new one.
+    """
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[list[Suggestion]]],
+        logger: logging.Logger,
+        channel: str = "hexagon_search",
+        debounce: float = 1.0,
+        refresh_interval: float = 600.0,
+    ) -> None:
+        self.load = load
+        self.logger = logger
+        self.channel = channel
+        self.debounce = debounce
+        self.refresh_interval = refresh_interval
+        self.index = PrefixIndex(())
+        self.built_at: Optional[float] = None
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def lookup(self, text: str, limit: int = 10, kinds: Optional[Sequence[str]] = None) -> list[Suggestion]:
+        return self.index.lookup(text, limit, kinds)
+
+    async def refresh(self) -> None:
+        """
+        Rebuilds the index. On failure the current index is kept.
+        """
+        try:
+            started = time.perf_counter()
+            index = PrefixIndex(await self.load())
+        except Exception as e:
+            self.logger.warning("Failed to build the suggestion index.", exc_info=e)
+            return
+        self.index = index
+        self.built_at = time.time()
+        self.logger.info(f"Suggestion index built: {len(index)} entries in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def notify(self, *args: Any) -> None:
+        self._changed.set()
+
+    def start(self, engine: AsyncEngine) -> None:
+        """
+        Starts listening for changes and rebuilding in the background.
+
+        Args:
+            engine: Engine whose database announces changes; the listener connects with its URL, outside its pool.
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch(engine))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self, engine: AsyncEngine) -> None:
+        import asyncpg
+
+        # A connection of its own: LISTEN holds it for the life of the process, which would take a slot of the
+        # request pool for good
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                listener = await asyncpg.connect(dsn)
+                try:
+                    await listener.add_listener(self.channel, self.notify)
+                    await self._rebuild_on_change(listener)
+                finally:
+                    await listener.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning("Suggestion index lost its change listener, reconnecting.", exc_info=e)
+                await asyncio.sleep(self.debounce * 5)
+                await self.refresh()
+
+    async def _rebuild_on_change(self, listener: Any) -> None:
+        while not listener.is_closed():
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.refresh_interval)
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            await self.refresh()
+        raise ConnectionError("Notification connection closed")
@@ -1,6 +1,17 @@
 from .base import Storage, StorageSettings
-from .local import LocalStorage
-from .s3 import S3Storage
-from .minio import MinioStorage
 
 __all__ = ['Storage', 'StorageSettings', 'LocalStorage', 'S3Storage', 'MinioStorage']
+
+# Backends pull in their client libraries, so they are imported on first access
+_backends = {
+    'LocalStorage': '.local',
+    'S3Storage': '.s3',
+    'MinioStorage': '.minio',
+}
+
+
+def __getattr__(name: str):
+    if name in _backends:
+        from importlib import import_module
+        return getattr(import_module(_backends[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
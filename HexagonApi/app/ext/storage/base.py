@@ -1,7 +1,13 @@
-from typing import Type, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import wraps
+from importlib import import_module
+from typing import Iterable, Iterator, Type, Optional
 from urllib.parse import urlparse, ParseResult
 from pydantic import BaseModel, Field
 import os
+from app.ext.metrics.base import REGISTRY
 
 
 class StorageSettings(BaseModel):
@@ -9,20 +15,80 @@ class StorageSettings(BaseModel):
     public_url: Optional[str] = Field(default=None, description="Public URL for accessing files from frontend.")
 
 
+@dataclass(slots=True)
+class StoredObject:
+    """
+    Metadata of a stored file.
+    """
+    path: str
+    size: int
+    content_type: Optional[str] = None
+    modified_at: Optional[datetime] = None
+    etag: Optional[str] = None
+
+
+@dataclass(slots=True)
+class UploadForm:
+    """
+    Presigned form for uploading a file directly to the storage.
+
+    The client sends `multipart/form-data` with `fields` followed by the file (as `file`) to `url` with POST.
+    """
+    url: str
+    fields: dict[str, str] = field(default_factory=dict)
+    expires_at: Optional[datetime] = None
+
+
+OPERATION_SECONDS = REGISTRY.histogram(
+    "hexagon_storage_operation_duration_seconds",
+    "Duration of storage operations.",
+    ("backend", "operation", "outcome"),
+)
+
+
+def _timed(operation, backend: str, name: str):
+    @wraps(operation)
+    def timed(self, *args, **kwargs):
+        with OPERATION_SECONDS.time(backend, name):
+            return operation(self, *args, **kwargs)
+    return timed
+
+
 class Storage:
     """
     File storage abstract base class.
     """
     _children: set[Type] = set()
 
+    #: Number of requests the batch operations run at the same time by default.
+    concurrency: int = 10
+
+    #: Modules defining the backends by URL scheme, imported when a URL selects them.
+    backends: dict[str, str] = {
+        "": "app.ext.storage.local",
+        "file": "app.ext.storage.local",
+        "s3": "app.ext.storage.s3",
+        "minio": "app.ext.storage.minio",
+    }
+
+    #: Operations timed per backend when a subclass defines them; defaults built on them are timed through them.
+    timed_operations = ("read", "write", "stat", "delete", "delete_many", "presign_upload")
+
     def __init_subclass__(cls) -> None:
         Storage._children.add(cls)
+        backend = cls.__name__.removesuffix("Storage").lower()
+        for name in Storage.timed_operations:
+            if name in cls.__dict__:
+                setattr(cls, name, _timed(cls.__dict__[name], backend, name))
 
     @staticmethod
     def of(url, public_url: str = None) -> Optional['Storage']:
         """
         Generates an instance of the appropriate type determined from the URL scheme.
 
+        The module of the backend is imported first when the scheme is one of `backends`, so only the client
+        library of the configured storage is loaded.
+
         Args:
             url: URL containing access information.
             public_url: Public URL for accessing files.
@@ -30,6 +96,8 @@ class Storage:
             Storage access object.
         """
         parsed = urlparse(url)
+        if parsed.scheme in Storage.backends:
+            import_module(Storage.backends[parsed.scheme])
         s = next(filter(lambda s: s.accept(parsed.scheme), Storage._children), None)
         if s:
             try:
@@ -68,7 +136,19 @@ class Storage:
         Returns:
             Whether the file exists.
         """
-        raise NotImplementedError()
+        return self.stat(path) is not None
+
+    def exists_many(self, paths: Iterable[str], concurrency: Optional[int] = None) -> dict[str, bool]:
+        """
+        Checks if files exist at the specified paths.
+
+        Args:
+            paths: File paths.
+            concurrency: Maximum number of checks running at the same time.
+        Returns:
+            Whether each file exists, keyed by path.
+        """
+        return {p: s is not None for p, s in self.stat_many(paths, concurrency).items()}
 
     def read(self, path: str) -> bytes:
         """
@@ -81,13 +161,89 @@ class Storage:
         """
         raise NotImplementedError()
 
-    def write(self, path: str, data: bytes):
+    def stream(self, path: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Reads a byte range of the specified file chunk by chunk.
+
+        At most `chunk_size` bytes are held in memory at a time.
+
+        Args:
+            path: File path.
+            start: First byte to read.
+            end: Last byte to read (inclusive). Reads to the end of the file if omitted.
+            chunk_size: Maximum size of each chunk.
+        Returns:
+            Iterator of chunks. Closing it releases the underlying file or connection.
+        """
+        raise NotImplementedError()
+
+    def locate(self, path: str) -> Optional[str]:
+        """
+        Gets the path of the specified file on the local file system, if the storage keeps files there.
+
+        Args:
+            path: File path.
+        Returns:
+            Local file system path, or `None` if files are not stored locally.
+        """
+        return None
+
+    def write(self, path: str, data: bytes, content_type: Optional[str] = None):
         """
         Writes the contents of the specified file.
 
         Args:
             path: File path.
             data: File data.
+            content_type: MIME type of the data.
+        """
+        raise NotImplementedError()
+
+    def stat(self, path: str) -> Optional[StoredObject]:
+        """
+        Gets the metadata of the specified file without reading it.
+
+        Args:
+            path: File path.
+        Returns:
+            File metadata, or `None` if the file does not exist.
+        """
+        raise NotImplementedError()
+
+    def stat_many(self, paths: Iterable[str], concurrency: Optional[int] = None) -> dict[str, Optional[StoredObject]]:
+        """
+        Gets the metadata of the specified files.
+
+        Files are looked up in parallel threads, at most `concurrency` at a time.
+
+        Args:
+            paths: File paths.
+            concurrency: Maximum number of lookups running at the same time. Defaults to `Storage.concurrency`.
+        Returns:
+            Metadata of each file (or `None` if it does not exist), keyed by path.
+        """
+        paths = list(dict.fromkeys(paths))
+        workers = min(concurrency or self.concurrency, len(paths))
+        if workers <= 1:
+            return {p: self.stat(p) for p in paths}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(paths, executor.map(self.stat, paths)))
+
+    def presign_upload(self, path: str, content_type: str, max_size: int, expiration: int = 900) -> UploadForm:
+        """
+        Generates a form for uploading the specified file directly from a client.
+
+        The storage rejects uploads to another path, with another Content-Type or larger than `max_size`.
+
+        Args:
+            path: File path.
+            content_type: MIME type the file must be uploaded with.
+            max_size: Maximum file size in bytes.
+            expiration: Seconds the form is valid for.
+        Returns:
+            Upload form.
+        Raises:
+            NotImplementedError: The storage does not support direct uploads.
         """
         raise NotImplementedError()
 
@@ -100,6 +256,27 @@ class Storage:
         """
         raise NotImplementedError()
 
+    def delete_many(self, paths: Iterable[str]) -> list[str]:
+        """
+        Deletes the specified files.
+
+        Files that do not exist are treated as deleted.
+
+        Args:
+            paths: File paths.
+        Returns:
+            Paths that could not be deleted.
+        """
+        failed = []
+        for path in dict.fromkeys(paths):
+            try:
+                self.delete(path)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                failed.append(path)
+        return failed
+
     def urlize(self, path: str, **kwargs) -> str:
         """
         Generates a URL that can access the specified file.
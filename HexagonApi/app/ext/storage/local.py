@@ -1,7 +1,10 @@
+import mimetypes
 import os
 import os.path
+from datetime import datetime, timezone
+from typing import Iterator, Optional
 from urllib.parse import urljoin, ParseResult
-from .base import StorageSettings, Storage
+from .base import StorageSettings, Storage, StoredObject
 
 
 class LocalStorage(Storage):
@@ -14,6 +17,9 @@ class LocalStorage(Storage):
     def accept(cls, scheme: str):
         return scheme == '' or scheme == 'file'
 
+    # stat() is a syscall; threads would only add overhead to batch lookups
+    concurrency = 1
+
     def __init__(self, url: ParseResult) -> None:
         """Initializes from URL components."""
         super().__init__(url)
@@ -30,12 +36,40 @@ class LocalStorage(Storage):
         with open(path, 'rb') as f:
             return f.read()
 
-    def write(self, path: str, data: bytes) -> int:
+    def stream(self, path: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        with open(self._on(path), 'rb') as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def locate(self, path: str) -> Optional[str]:
+        return self._on(path)
+
+    def write(self, path: str, data: bytes, content_type: Optional[str] = None) -> int:
         path = self._on(path)
         os.makedirs(os.path.dirname(path), exist_ok=True)
         with open(path, 'wb') as f:
             return f.write(data)
 
+    def stat(self, path: str) -> Optional[StoredObject]:
+        try:
+            st = os.stat(self._on(path))
+        except FileNotFoundError:
+            return None
+        return StoredObject(
+            path,
+            st.st_size,
+            mimetypes.guess_type(path)[0],
+            datetime.fromtimestamp(st.st_mtime, timezone.utc),
+            f'"{st.st_mtime_ns:x}-{st.st_size:x}"',
+        )
+
     def delete(self, path: str):
         os.remove(self._on(path))
 
@@ -1,14 +1,17 @@
 import logging
 from io import BytesIO
+from typing import Iterator, Optional
 from urllib.parse import ParseResult, parse_qs
-from datetime import timedelta
+from datetime import datetime, timedelta
 
-from .base import Storage
+from .base import Storage, StoredObject, UploadForm
 
 logger = logging.getLogger(__name__)
 
 try:
     from minio import Minio
+    from minio.datatypes import PostPolicy
+    from minio.deleteobjects import DeleteObject
     from minio.error import S3Error
 
     class MinioStorage(Storage):
@@ -50,14 +53,6 @@ try:
                 logger.error(f"Error ensuring bucket exists: {e}")
                 raise
 
-        def exists(self, path: str) -> bool:
-            """Check if object exists in Minio"""
-            try:
-                self.client.stat_object(self.bucket_name, path)
-                return True
-            except S3Error:
-                return False
-
         def read(self, path: str) -> bytes:
             """Read object from Minio"""
             try:
@@ -70,6 +65,17 @@ try:
                 logger.error(f"Error reading object {path}: {e}")
                 raise
 
+        def stream(self, path: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+            """Read a byte range of an object from Minio chunk by chunk"""
+            response = self.client.get_object(
+                self.bucket_name, path, offset=start, length=0 if end is None else end - start + 1,
+            )
+            try:
+                yield from response.stream(chunk_size)
+            finally:
+                response.close()
+                response.release_conn()
+
         def write(self, path: str, data: bytes, content_type: str = None):
             """Write object to Minio"""
             try:
@@ -86,6 +92,32 @@ try:
                 logger.error(f"Error writing object {path}: {e}")
                 raise
 
+        def stat(self, path: str) -> Optional[StoredObject]:
+            """Get object metadata from Minio (HEAD request)"""
+            try:
+                info = self.client.stat_object(self.bucket_name, path)
+            except S3Error as e:
+                if e.code in ("NoSuchKey", "NoSuchObject", "ResourceNotFound"):
+                    return None
+                raise
+            return StoredObject(path, info.size, info.content_type, info.last_modified, f'"{info.etag}"')
+
+        def presign_upload(self, path: str, content_type: str, max_size: int, expiration: int = 900) -> UploadForm:
+            """Generate a POST policy for uploading an object directly from a client"""
+            expires_at = datetime.utcnow() + timedelta(seconds=expiration)
+            policy = PostPolicy(self.bucket_name, expires_at)
+            policy.add_equals_condition("key", path)
+            policy.add_equals_condition("Content-Type", content_type)
+            policy.add_content_length_range_condition(1, max_size)
+
+            fields = self.client.presigned_post_policy(policy)
+            # The policy is not bound to a host, so clients may use the public endpoint
+            return UploadForm(
+                f"{self.get_public_url('').rstrip('/')}",
+                {"key": path, "Content-Type": content_type, **fields},
+                datetime.now() + timedelta(seconds=expiration),
+            )
+
         def delete(self, path: str):
             """Delete object from Minio"""
             try:
@@ -95,6 +127,18 @@ try:
                 logger.error(f"Error deleting object {path}: {e}")
                 raise
 
+        def delete_many(self, paths) -> list[str]:
+            """Delete objects from Minio with multi-object delete requests"""
+            # remove_objects() sends 1,000 keys per request and yields errors lazily
+            errors = self.client.remove_objects(
+                self.bucket_name, (DeleteObject(p) for p in dict.fromkeys(paths)),
+            )
+            failed = []
+            for error in errors:
+                logger.error(f"Error deleting object {error.name}: {error.message}")
+                failed.append(error.name)
+            return failed
+
         def urlize(self, path: str, expiration: int = None, **kwargs) -> str:
             """Generate URL for object access"""
             try:
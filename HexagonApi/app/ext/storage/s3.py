@@ -1,14 +1,17 @@
 import logging
+from datetime import datetime, timedelta
 from io import BytesIO
+from typing import Optional
 from urllib.parse import ParseResult, parse_qs
 
-from .base import Storage
+from .base import Storage, StoredObject, UploadForm
 
 logger = logging.getLogger(__name__)
 
 try:
     import boto3
     from botocore.client import Config
+    from botocore.exceptions import ClientError
 
     class S3Storage(Storage):
         @classmethod
@@ -37,32 +40,77 @@ try:
                 )
                 self.bucket = url.path.lstrip("/")
 
-        def exists(self, path):
-            contents = self.client.list_objects(
-                Bucket=self.bucket,
-            ).get("Contents", [])
-            return any([c["Key"] == path for c in contents])
-
         def read(self, path):
             buf = BytesIO()
             self.client.download_fileobj(self.bucket, path, buf)
             return buf.getvalue()
 
-        def write(self, path, data, public=False):
+        def stream(self, path, start=0, end=None, chunk_size=64 * 1024):
+            body = self.client.get_object(
+                Bucket=self.bucket, Key=path, Range=f"bytes={start}-{'' if end is None else end}",
+            )["Body"]
+            try:
+                yield from body.iter_chunks(chunk_size)
+            finally:
+                body.close()
+
+        def write(self, path, data, content_type=None, public=False):
             buf = BytesIO(data)
             extra_args = {}
             
             if path.startswith("profile_pictures/") or public:
                 extra_args['ACL'] = 'public-read'
+            if content_type:
+                extra_args['ContentType'] = content_type
                 
             self.client.upload_fileobj(buf, self.bucket, path, ExtraArgs=extra_args)
 
+        def stat(self, path) -> Optional[StoredObject]:
+            try:
+                head = self.client.head_object(Bucket=self.bucket, Key=path)
+            except ClientError as e:
+                if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                    return None
+                raise
+            return StoredObject(
+                path, head["ContentLength"], head.get("ContentType"), head.get("LastModified"), head.get("ETag"),
+            )
+
+        def presign_upload(self, path, content_type, max_size, expiration=900) -> UploadForm:
+            conditions = [
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+            ]
+            fields = {"Content-Type": content_type}
+            if path.startswith("profile_pictures/"):
+                conditions.append({"acl": "public-read"})
+                fields["acl"] = "public-read"
+
+            post = self.client.generate_presigned_post(
+                self.bucket, path, Fields=fields, Conditions=conditions, ExpiresIn=expiration,
+            )
+            return UploadForm(post["url"], post["fields"], datetime.now() + timedelta(seconds=expiration))
+
         def delete(self, path):
             self.client.delete_object(
                 Bucket=self.bucket,
                 Key=path,
             )
 
+        def delete_many(self, paths):
+            paths = list(dict.fromkeys(paths))
+            failed = []
+            # DeleteObjects accepts up to 1,000 keys per request
+            for i in range(0, len(paths), 1000):
+                response = self.client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": p} for p in paths[i:i + 1000]], "Quiet": True},
+                )
+                for error in response.get("Errors", []):
+                    logger.error(f"Error deleting object {error['Key']}: {error.get('Message')}")
+                    failed.append(error["Key"])
+            return failed
+
         def urlize(self, path, expiration=3600, public=None, **kwargs):
             if path.startswith("profile_pictures/"):
                 public = True
@@ -1,14 +1,12 @@
-import asyncio
 import logging
 import logging.config
 import os
-from typing import Optional, Coroutine, Awaitable
-from fastapi import FastAPI, Request, Response
+import traceback
+from typing import Optional
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import yaml
-from PIL import JpegImagePlugin
-from pillow_heif import register_heif_opener
 from .config import root_package, app_env, environment
 from .resources import configure
 
@@ -17,10 +15,6 @@ async def create_app(
     env_key: Optional[str] = None,
 ) -> FastAPI:
 
-    JpegImagePlugin._getmp = lambda x: None
-
-    register_heif_opener()
-
     # Environment
     if env_key:
         os.environ[app_env()] = env_key
@@ -76,6 +70,10 @@ async def create_app(
             allow_headers=["*"],
         )
 
+        if env.settings.compression.enabled:
+            from .api.shared.compression import CompressionMiddleware
+            app.add_middleware(CompressionMiddleware, settings=env.settings.compression)
+
         # Static
         if env.settings.static:
             app.mount(env.settings.static.path, StaticFiles(directory=env.settings.static.root))
@@ -84,17 +82,72 @@ async def create_app(
         resources, call_session = await configure(env.settings, logger)
 
         app.state.resources = resources
-
-        @app.middleware('http')
-        async def call(req: Request, call_next) -> Awaitable[Response]:
-            async def next(session):
-                return await call_next(req)
-            return await call_session(next)
+        app.add_event_handler("shutdown", resources.drain)
+
+        # Suggestions
+        if env.settings.suggest.enabled:
+            from .ext.search.base import SuggestionIndex
+            import app.service.search as ss
+
+            async def load_suggestions():
+                async def next(session):
+                    return (await ss.suggestion_entries(env.settings.suggest.news_limit)).get()
+                return await call_session(next)
+
+            resources.suggestions = SuggestionIndex(
+                load_suggestions,
+                logger,
+                channel=env.settings.suggest.channel,
+                debounce=env.settings.suggest.debounce,
+                refresh_interval=env.settings.suggest.refresh_interval,
+            )
+            await resources.suggestions.refresh()
+            resources.suggestions.start(resources.db)
+            app.add_event_handler("shutdown", resources.suggestions.close)
+
+        # Timing
+        timed = None
+        if env.settings.timing.enabled:
+            from .api.shared.timing import Timed
+            timed = Timed(env.settings.timing, logger)
+
+        # Profiling
+        profiler = None
+        if env.settings.profiling.active(env.settings.docs):
+            from .api.shared.profiling import RequestProfiler
+            profiler = app.state.profiler = RequestProfiler(env.settings.profiling, env.settings.docs, logger)
+
+        # Resource session of each request
+        from .api.shared.session import SessionMiddleware
+        app.add_middleware(SessionMiddleware, resources=resources, timed=timed, profiler=profiler)
+
+        # Metrics
+        if env.settings.metrics.active(env.settings.docs):
+            from .api.shared.metrics import MetricsMiddleware
+            from .ext.metrics.base import REGISTRY, SharedRegistry, watch_cache
+            app.add_middleware(MetricsMiddleware)
+            if resources.suggestions:
+                watch_cache("suggestions", lambda: resources.suggestions.index.cache_info()[:2])
+            app.state.metrics = REGISTRY
+            if env.settings.metrics.directory:
+                # Several worker processes: each scrape reports all of them
+                app.state.metrics = SharedRegistry(
+                    REGISTRY, env.settings.metrics.directory, env.settings.metrics.interval, logger
+                )
+                app.state.metrics.start()
+                app.add_event_handler("shutdown", app.state.metrics.close)
 
         # Routes
         from .api import routes
         routes.setup_api(app, env, logger)
 
+        if timed:
+            from .api.shared.timing import instrument_routes
+            instrument_routes(app)
+
+        # Last, once the background tasks and the suggestion listener are done
+        app.add_event_handler("shutdown", resources.db.dispose)
+
     except Exception as e:
         logger.error("Failed to configure resources.", exc_info=e)
         raise
@@ -102,21 +155,41 @@ async def create_app(
     return app
 
 
-def app():
-    loop = asyncio.get_running_loop()
-    if loop:
-        future = loop.create_future()
-        async def setup():
-            try:
-                future.set_result(await create_app())
-            except:
-                future.cancel()
-                raise
-        loop.create_task(setup())
-        async def app(scope, receive, send):
-            value = await future
-            return await value(scope, receive, send)
-    else:
-        app = asyncio.run(create_app())
-
-    return app
+class Application:
+    """
+    ASGI entry point configuring the application with `create_app` during the lifespan startup.
+
+    The server completes the setup (database, suggestion index, ...) before it accepts connections, and then
+    passes requests straight to the configured application. The server must run the lifespan protocol.
+    """
+    def __init__(self, env_key: Optional[str] = None) -> None:
+        self.env_key = env_key
+        #: Configured application, set once the startup completed.
+        self.app: Optional[FastAPI] = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if self.app is not None:
+            return await self.app(scope, receive, send)
+        if scope["type"] != "lifespan":
+            raise RuntimeError("The application is configured at the lifespan startup, which the server did not run.")
+
+        startup = await receive()
+        try:
+            self.app = await create_app(self.env_key)
+        except Exception:
+            await send({"type": "lifespan.startup.failed", "message": traceback.format_exc()})
+            return
+
+        async def replay():
+            nonlocal startup
+            if startup is not None:
+                message, startup = startup, None
+                return message
+            return await receive()
+
+        # The application runs its own startup and shutdown handlers
+        await self.app(scope, replay, send)
+
+
+def app() -> Application:
+    return Application()
@@ -1,5 +1,6 @@
-from . import db
-from typing import List, Optional, TYPE_CHECKING
+from . import db, loading
+import re
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
 from decimal import Decimal
 from dataclasses import dataclass, field
 from datetime import datetime, date
@@ -9,11 +10,107 @@ if TYPE_CHECKING:
     pass
 
 
+# ================================================================
+# Lazy relationships
+# ================================================================
+
+def _loaded(row: Any, name: str) -> Any:
+    """Value of attribute `name` if it is already loaded on `row`, else None.
+
+    Reads the instance state directly, so an unloaded relationship never
+    triggers lazy IO (which fails outside a greenlet under asyncio). With
+    strict loading (see `app.model.loading`) an unloaded relationship raises
+    instead, so data missing from a response shows up in development.
+    """
+    if row is None:
+        return None
+    values = inspect(row).dict
+    if name not in values and loading.strict:
+        raise loading.unloaded(row, name)
+    return values.get(name)
+
+
+class relation:
+    """Relationship converted from the source row on first access.
+
+    `target` names a composite class of this module whose `of` is applied to
+    the loaded ORM value (to each element when `many`). Unloaded relationships
+    read as None / []. The converted value is cached on the instance, so
+    composites built for list views never pay for collections they don't use.
+    Under strict loading, reading an unloaded relationship raises.
+    """
+    __slots__ = ('target', 'many', 'name')
+
+    def __init__(self, target: str, many: bool = False):
+        self.target = target
+        self.many = many
+        self.name = ''
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> Any:
+        if obj is None:
+            return self
+        cache = obj._related
+        if cache is None:
+            cache = obj._related = {}
+        try:
+            return cache[self.name]
+        except KeyError:
+            value = cache[self.name] = self.convert(obj._source)
+            return value
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        if obj._related is None:
+            obj._related = {}
+        obj._related[self.name] = value
+
+    def convert(self, row: Any) -> Any:
+        value = _loaded(row, self.name)
+        of = globals()[self.target].of
+        if self.many:
+            return [of(v) for v in value] if value else []
+        return of(value) if value is not None else None
+
+
+def _source_field() -> Any:
+    return field(default=None, repr=False, compare=False)
+
+
+def _related_field() -> Any:
+    return field(default=None, init=False, repr=False, compare=False)
+
+
 # ================================================================
 # User & Profile Entities
 # ================================================================
 
-@dataclass
+# profile_pictures/{user_id}/{upload id}.{ext}: uploaded through an upload session
+PROFILE_PICTURE_KEY = re.compile(r"profile_pictures/(?P<user_id>[^/]+)/(?P<upload_id>[0-9a-f]{32})\.(?P<ext>[a-z]+)")
+# profile_pictures/{user_id}/{upload id}_full.jpg: written by processing an upload, next to its thumbnail
+PROCESSED_PROFILE_PICTURE_KEY = re.compile(r"profile_pictures/(?P<user_id>[^/]+)/(?P<upload_id>[0-9a-f]{32})_full\.jpg")
+
+
+def profile_picture_variants(key: str) -> Optional[tuple[str, str]]:
+    """Keys of the processed picture and its thumbnail for an uploaded or processed profile picture"""
+    match = PROFILE_PICTURE_KEY.fullmatch(key or "") or PROCESSED_PROFILE_PICTURE_KEY.fullmatch(key or "")
+    if match is None:
+        return None
+    stem = f"profile_pictures/{match['user_id']}/{match['upload_id']}"
+    return f"{stem}_full.jpg", f"{stem}_thumb.jpg"
+
+
+@dataclass(slots=True)
+class DirectUpload:
+    """Presigned form to upload a file straight to the storage"""
+    key: str
+    url: str
+    fields: Dict[str, str]
+    expires_at: Optional[datetime] = None
+
+
+@dataclass(slots=True)
 class UserProfile:
     """User profile with additional methods"""
     id: str
@@ -26,23 +123,28 @@ class UserProfile:
     address: Optional[str] = None
     profile_picture: Optional[str] = None
     username: Optional[str] = None
+
+    @property
+    def profile_picture_thumbnail(self) -> Optional[str]:
+        """Thumbnail key, available once an uploaded picture has been processed"""
+        variants = profile_picture_variants(self.profile_picture)
+        return variants[1] if variants and self.profile_picture == variants[0] else None
     
     @classmethod
     def of(cls, profile: db.UserProfile) -> "UserProfile":
         """Create composite UserProfile from database UserProfile"""
         user_info = {}
-        if hasattr(profile, 'user') and profile.user:
+        username = None
+        user = _loaded(profile, 'user')
+        if user:
             user_info = {
-                'name': profile.user.full_name,
-                'email': profile.user.email,
-                'phone': profile.user.phone_number,
-                'login_method': profile.user.login_method
+                'name': user.full_name,
+                'email': user.email,
+                'phone': user.phone_number,
+                'login_method': user.login_method
             }
-        
-        username = None
-        if hasattr(profile, 'user') and profile.user:
-            username = profile.user.username
-        
+            username = user.username
+
         return cls(
             id=profile.id,
             user_id=profile.user_id,
@@ -54,7 +156,7 @@ class UserProfile:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentEnrollment:
     id: str
     user_id: str
@@ -73,9 +175,12 @@ class StudentEnrollment:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    user: Optional["User"] = None
-    course: Optional["Course"] = None
-    course_class: Optional["CourseClass"] = None
+    _source: Optional[db.StudentCourseEnrollment] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    user = relation("User")
+    course = relation("Course")
+    course_class = relation("CourseClass")
 
     @classmethod
     def of(cls, enrollment: db.StudentCourseEnrollment) -> "StudentEnrollment":
@@ -97,9 +202,7 @@ class StudentEnrollment:
             is_active=enrollment.is_active,
             created_at=enrollment.created_at,
             updated_at=enrollment.updated_at,
-            user=User.of(enrollment.user) if enrollment.user else None,
-            course=Course.of(enrollment.course) if enrollment.course else None,
-            course_class=CourseClass.of(enrollment.course_class) if enrollment.course_class else None
+            _source=enrollment
         )
 
     @property
@@ -137,7 +240,7 @@ class StudentEnrollment:
         return status_map.get(self.payment_status, self.payment_status)
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """User entity with enhanced functionality"""
     id: str
@@ -155,31 +258,16 @@ class User:
     last_login: Optional[datetime] = None
     firebase_id: Optional[str] = None
     login_method: Optional[str] = None
-    profile: Optional[UserProfile] = None
-    student_profile: Optional["Student"] = None
-    enrollments: List[StudentEnrollment] = field(default_factory=list)
+    _source: Optional[db.User] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    profile = relation("UserProfile")
+    student_profile = relation("Student")
+    enrollments = relation("StudentEnrollment", many=True)
 
     @classmethod
     def of(cls, user: db.User) -> "User":
         """Create composite User from database User"""
-        profile = None
-        if hasattr(user, 'profile') and user.profile:
-            profile = UserProfile.of(user.profile)
-        
-        student_profile = None
-        try:
-            if hasattr(user, 'student_profile') and user.student_profile:
-                student_profile = Student.of(user.student_profile)
-        except:
-            pass
-            
-        enrollments = []
-        try:
-            if hasattr(user, 'enrollments') and user.enrollments:
-                enrollments = [StudentEnrollment.of(e) for e in user.enrollments]
-        except:
-            pass
-        
         return cls(
             id=user.id,
             username=user.username,
@@ -196,9 +284,7 @@ class User:
             last_login=user.last_login,
             firebase_id=user.firebase_id,
             login_method=user.login_method,
-            profile=profile,
-            student_profile=student_profile,
-            enrollments=enrollments
+            _source=user
         )
 
     def get_active_enrollments(self) -> List[StudentEnrollment]:
@@ -224,7 +310,7 @@ class User:
 # Simple placeholder classes for other entities
 # ================================================================
 
-@dataclass
+@dataclass(slots=True)
 class CourseContentBlock:
     id: str
     course_class_id: str
@@ -251,7 +337,7 @@ class CourseContentBlock:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class CourseRoadmap:
     id: str
     course_id: str
@@ -261,7 +347,10 @@ class CourseRoadmap:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    content_blocks: List["RoadmapContentBlock"] = field(default_factory=list)
+    _source: Optional[db.CourseRoadmap] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    content_blocks = relation("RoadmapContentBlock", many=True)
 
     @classmethod
     def of(cls, roadmap: db.CourseRoadmap) -> "CourseRoadmap":
@@ -274,7 +363,7 @@ class CourseRoadmap:
             is_active=roadmap.is_active,
             created_at=roadmap.created_at,
             updated_at=roadmap.updated_at,
-            content_blocks=[RoadmapContentBlock.of(b) for b in roadmap.content_blocks] if roadmap.content_blocks else []
+            _source=roadmap
         )
 
     def get_active_content_blocks(self) -> List["RoadmapContentBlock"]:
@@ -282,7 +371,7 @@ class CourseRoadmap:
         return [block for block in self.content_blocks if block.is_active]
 
 
-@dataclass
+@dataclass(slots=True)
 class RoadmapContentBlock:
     id: str
     roadmap_id: str
@@ -311,7 +400,7 @@ class RoadmapContentBlock:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class OutstandingStudent:
     id: str
     course_id: str
@@ -343,14 +432,17 @@ class OutstandingStudent:
         return ", ".join(self.awards) if self.awards else ""
 
 
-@dataclass
+@dataclass(slots=True)
 class CourseAdditionalInfo:
     id: str
     course_id: str
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    content_blocks: List["CourseAdditionalContentBlock"] = field(default_factory=list)
+    _source: Optional[db.CourseAdditionalInfo] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    content_blocks = relation("CourseAdditionalContentBlock", many=True)
 
     @classmethod
     def of(cls, info: db.CourseAdditionalInfo) -> "CourseAdditionalInfo":
@@ -360,7 +452,7 @@ class CourseAdditionalInfo:
             is_active=info.is_active,
             created_at=info.created_at,
             updated_at=info.updated_at,
-            content_blocks=[CourseAdditionalContentBlock.of(b) for b in info.content_blocks] if info.content_blocks else []
+            _source=info
         )
 
     def get_active_content_blocks(self) -> List["CourseAdditionalContentBlock"]:
@@ -368,7 +460,7 @@ class CourseAdditionalInfo:
         return [block for block in self.content_blocks if block.is_active]
 
 
-@dataclass
+@dataclass(slots=True)
 class CourseAdditionalContentBlock:
     id: str
     additional_info_id: str
@@ -397,7 +489,7 @@ class CourseAdditionalContentBlock:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class CourseFile:
     """Course file with display methods"""
     id: str
@@ -476,7 +568,7 @@ class CourseFile:
         return False
 
 
-@dataclass
+@dataclass(slots=True)
 class CourseClass:
     """Course class with enrollment management"""
     id: str
@@ -493,8 +585,12 @@ class CourseClass:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    content_blocks: List[CourseContentBlock] = field(default_factory=list)
-    enrollments: List[StudentEnrollment] = field(default_factory=list)
+    occupied_seats: Optional[int] = None
+    _source: Optional[db.CourseClass] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    content_blocks = relation("CourseContentBlock", many=True)
+    enrollments = relation("StudentEnrollment", many=True)
 
     @classmethod
     def of(cls, course_class: db.CourseClass) -> "CourseClass":
@@ -514,20 +610,22 @@ class CourseClass:
             is_active=course_class.is_active,
             created_at=course_class.created_at,
             updated_at=course_class.updated_at,
-            content_blocks=[CourseContentBlock.of(b) for b in course_class.content_blocks] if course_class.content_blocks else [],
-            enrollments=[StudentEnrollment.of(e) for e in course_class.enrollments] if course_class.enrollments else []
+            _source=course_class
         )
 
     @property
     def current_students_count(self) -> int:
-        """Current number of enrolled students"""
+        """
+        Current number of students occupying a seat.
+
+        Uses `occupied_seats` when it was set by `app.service.course.attach_seat_counts`, and otherwise counts
+        the loaded enrollments.
+        """
+        if self.occupied_seats is not None:
+            return self.occupied_seats
         return len([
             enrollment for enrollment in self.enrollments
-            if enrollment.status in [
-                db.EnrollmentStatusEnum.PENDING.value, 
-                db.EnrollmentStatusEnum.ENROLLED.value, 
-                db.EnrollmentStatusEnum.STUDYING.value
-            ]
+            if enrollment.is_active and enrollment.status in db.OCCUPYING_STATUSES
         ])
 
     @property
@@ -545,7 +643,7 @@ class CourseClass:
         return self.is_open_for_enrollment and not self.is_full and self.is_active
 
 
-@dataclass
+@dataclass(slots=True)
 class Course:
     """Course entity with business logic"""
     id: str
@@ -558,12 +656,15 @@ class Course:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    category: Optional["CourseCategory"] = None
-    classes: List[CourseClass] = field(default_factory=list)
-    files: List[CourseFile] = field(default_factory=list)
-    outstanding_students: List[OutstandingStudent] = field(default_factory=list)
-    roadmap: Optional[CourseRoadmap] = None
-    additional_info: Optional[CourseAdditionalInfo] = None
+    _source: Optional[db.Course] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    category = relation("CourseCategory")
+    classes = relation("CourseClass", many=True)
+    files = relation("CourseFile", many=True)
+    outstanding_students = relation("OutstandingStudent", many=True)
+    roadmap = relation("CourseRoadmap")
+    additional_info = relation("CourseAdditionalInfo")
 
     @classmethod
     def of(cls, course: db.Course) -> "Course":
@@ -579,12 +680,7 @@ class Course:
             is_active=course.is_active,
             created_at=course.created_at,
             updated_at=course.updated_at,
-            category=CourseCategory.of(course.category) if course.category else None,
-            classes=[CourseClass.of(c) for c in course.classes] if course.classes else [],
-            files=[CourseFile.of(f) for f in course.files] if course.files else [],
-            outstanding_students=[OutstandingStudent.of(s) for s in course.outstanding_students] if course.outstanding_students else [],
-            roadmap=CourseRoadmap.of(course.roadmap) if course.roadmap else None,
-            additional_info=CourseAdditionalInfo.of(course.additional_info) if course.additional_info else None
+            _source=course
         )
 
     def get_total_classes_count(self) -> int:
@@ -611,7 +707,7 @@ class Course:
         return self.additional_info is not None and self.additional_info.is_active
 
 
-@dataclass
+@dataclass(slots=True)
 class CourseCategory:
     """Course category with enhanced functionality"""
     id: str
@@ -622,7 +718,10 @@ class CourseCategory:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    courses: List[Course] = field(default_factory=list)
+    _source: Optional[db.CourseCategory] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    courses = relation("Course", many=True)
 
     @classmethod
     def of(cls, category: db.CourseCategory) -> "CourseCategory":
@@ -636,7 +735,7 @@ class CourseCategory:
             is_active=category.is_active,
             created_at=category.created_at,
             updated_at=category.updated_at,
-            courses=[Course.of(c) for c in category.courses] if category.courses else []
+            _source=category
         )
 
     def get_active_courses_count(self) -> int:
@@ -648,7 +747,7 @@ class CourseCategory:
 # News Entities
 # ================================================================
 
-@dataclass
+@dataclass(slots=True)
 class NewsCategory:
     """News category with enhanced functionality"""
     id: str
@@ -661,8 +760,12 @@ class NewsCategory:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    course: Optional[Course] = None
-    news: List["News"] = field(default_factory=list)
+    published_news: Optional[int] = None
+    _source: Optional[db.NewsCategory] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    course = relation("Course")
+    news = relation("News", many=True)
 
     @classmethod
     def of(cls, category: db.NewsCategory) -> "NewsCategory":
@@ -678,12 +781,18 @@ class NewsCategory:
             is_active=category.is_active,
             created_at=category.created_at,
             updated_at=category.updated_at,
-            course=Course.of(category.course) if category.course else None,
-            news=[News.of(n) for n in category.news] if category.news else []
+            _source=category
         )
 
     def get_published_news_count(self) -> int:
-        """Count published news in this category"""
+        """
+        Count published news in this category.
+
+        Uses `published_news` when it was set by `app.service.news.attach_news_counts`, and otherwise counts
+        the loaded news.
+        """
+        if self.published_news is not None:
+            return self.published_news
         return len([news for news in self.news if news.is_published and news.is_active])
 
     @property
@@ -697,7 +806,7 @@ class NewsCategory:
         return type_map.get(self.category_type, self.category_type)
 
 
-@dataclass
+@dataclass(slots=True)
 class News:
     """News entity with business logic"""
     id: str
@@ -713,8 +822,11 @@ class News:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     is_active: bool = True
-    category: Optional[NewsCategory] = None
-    content_blocks: List["NewsContentBlock"] = field(default_factory=list)
+    _source: Optional[db.News] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    category = relation("NewsCategory")
+    content_blocks = relation("NewsContentBlock", many=True)
 
     @classmethod
     def of(cls, news: db.News) -> "News":
@@ -733,8 +845,7 @@ class News:
             created_at=news.created_at,
             updated_at=news.updated_at,
             is_active=news.is_active,
-            category=NewsCategory.of(news.category) if news.category else None,
-            content_blocks=[NewsContentBlock.of(b) for b in news.content_blocks] if news.content_blocks else []
+            _source=news
         )
 
     def get_active_content_blocks(self) -> List["NewsContentBlock"]:
@@ -751,10 +862,10 @@ class News:
         if not self.published_at:
             return False
         from datetime import timedelta
-        return self.published_at >= datetime.now() - timedelta(days=7)
+        return self.published_at >= datetime.now(self.published_at.tzinfo) - timedelta(days=7)
 
 
-@dataclass
+@dataclass(slots=True)
 class NewsContentBlock:
     """News content block"""
     id: str
@@ -767,7 +878,10 @@ class NewsContentBlock:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    news: Optional[News] = None
+    _source: Optional[db.NewsContentBlock] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    news = relation("News")
 
     @classmethod
     def of(cls, block: db.NewsContentBlock) -> "NewsContentBlock":
@@ -783,7 +897,7 @@ class NewsContentBlock:
             is_active=block.is_active,
             created_at=block.created_at,
             updated_at=block.updated_at,
-            news=News.of(block.news) if block.news else None
+            _source=block
         )
 
 
@@ -791,7 +905,7 @@ class NewsContentBlock:
 # Website Settings & Configuration Entities
 # ================================================================
 
-@dataclass
+@dataclass(slots=True)
 class SiteSettings:
     """Site settings with enhanced functionality"""
     id: str
@@ -835,7 +949,7 @@ class SiteSettings:
         return self.value
 
 
-@dataclass
+@dataclass(slots=True)
 class ContactInfo:
     """Contact information"""
     id: str
@@ -866,7 +980,7 @@ class ContactInfo:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class FAQ:
     """FAQ with enhanced functionality"""
     id: str
@@ -877,7 +991,10 @@ class FAQ:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    category: Optional[CourseCategory] = None
+    _source: Optional[db.FAQ] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    category = relation("CourseCategory")
 
     @classmethod
     def of(cls, faq: db.FAQ) -> "FAQ":
@@ -891,11 +1008,11 @@ class FAQ:
             is_active=faq.is_active,
             created_at=faq.created_at,
             updated_at=faq.updated_at,
-            category=CourseCategory.of(faq.category) if faq.category else None
+            _source=faq
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Banner:
     """Banner with enhanced functionality"""
     id: str
@@ -945,7 +1062,7 @@ class Banner:
         return True
 
 
-@dataclass
+@dataclass(slots=True)
 class ContactInquiry:
     """Contact inquiry with enhanced functionality"""
     id: str
@@ -961,8 +1078,11 @@ class ContactInquiry:
     is_active: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    course: Optional[Course] = None
-    course_class: Optional[CourseClass] = None
+    _source: Optional[db.ContactInquiry] = _source_field()
+    _related: Optional[Dict[str, Any]] = _related_field()
+
+    course = relation("Course")
+    course_class = relation("CourseClass")
 
     @classmethod
     def of(cls, inquiry: db.ContactInquiry) -> "ContactInquiry":
@@ -981,8 +1101,7 @@ class ContactInquiry:
             is_active=inquiry.is_active,
             created_at=inquiry.created_at,
             updated_at=inquiry.updated_at,
-            course=Course.of(inquiry.course) if inquiry.course else None,
-            course_class=CourseClass.of(inquiry.course_class) if inquiry.course_class else None
+            _source=inquiry
         )
 
     @property
@@ -1006,7 +1125,7 @@ class ContactInquiry:
         return type_map.get(self.inquiry_type, self.inquiry_type)
 
 
-@dataclass
+@dataclass(slots=True)
 class Student:
     """Student profile for officially enrolled students"""
     id: str
@@ -1040,7 +1159,7 @@ class Student:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentInquiry:
     """Student inquiry for consultation requests"""
     id: str
@@ -1079,4 +1198,21 @@ class StudentInquiry:
             "contacted": "Đã liên hệ", 
             "converted": "Đã chuyển đổi thành học sinh"
         }
-        return status_map.get(self.status, self.status)
\ No newline at end of file
+        return status_map.get(self.status, self.status)
+
+
+# ================================================================
+# Search Entities
+# ================================================================
+
+@dataclass(slots=True)
+class SearchHit:
+    """Course or news matched by full-text search"""
+    kind: str
+    id: str
+    title: str
+    slug: str
+    short_description: str
+    image_key: Optional[str] = None
+    published_at: Optional[datetime] = None
+    rank: float = 0.0
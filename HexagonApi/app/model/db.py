@@ -4,7 +4,7 @@ from typing import Optional, List
 from decimal import Decimal
 
 from sqlalchemy import Enum, ForeignKey, UniqueConstraint, Text, String, Integer, Boolean, DECIMAL, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.types import DateTime, Date
 import uuid
@@ -14,6 +14,20 @@ class Base(DeclarativeBase):
     pass
 
 
+def Choices(enum_class: type[enum.Enum]) -> Enum:
+    """
+    Column type of a Django `choices` field: the member's value in a plain varchar column, as the admin
+    writes it, rather than its name in a native PostgreSQL enum.
+    """
+    return Enum(
+        enum_class,
+        native_enum=False,
+        create_constraint=False,
+        length=20,
+        values_callable=lambda members: [member.value for member in members],
+    )
+
+
 # ================================================================
 # ENUMS
 # ================================================================
@@ -31,6 +45,14 @@ class EnrollmentStatusEnum(str, enum.Enum):
     DROPPED = "dropped"
 
 
+# Enrollment statuses holding a seat in a class (same as OCCUPYING_STATUSES in HexagonAdmin/course/models.py)
+OCCUPYING_STATUSES = (
+    EnrollmentStatusEnum.PENDING.value,
+    EnrollmentStatusEnum.ENROLLED.value,
+    EnrollmentStatusEnum.STUDYING.value,
+)
+
+
 class PaymentStatusEnum(str, enum.Enum):
     UNPAID = "unpaid"
     PARTIAL = "partial"
@@ -118,6 +140,8 @@ class Course(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # Maintained by database triggers (HexagonAdmin/course/search.py)
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, deferred=True)
 
     # Relationships
     category: Mapped["CourseCategory"] = relationship("CourseCategory", back_populates="courses")
@@ -138,10 +162,12 @@ class CourseClass(Base):
     image_key: Mapped[Optional[str]] = mapped_column(String(255))
     address: Mapped[str] = mapped_column(Text)
     schedule_description: Mapped[str] = mapped_column(Text)
-    learning_method: Mapped[LearningMethodEnum] = mapped_column(Enum(LearningMethodEnum), default=LearningMethodEnum.OFFLINE)
+    learning_method: Mapped[LearningMethodEnum] = mapped_column(Choices(LearningMethodEnum), default=LearningMethodEnum.OFFLINE)
     class_code: Mapped[str] = mapped_column(String(20), unique=True)
     is_open_for_enrollment: Mapped[bool] = mapped_column(Boolean, default=True)
     max_students: Mapped[int] = mapped_column(Integer, default=30)
+    # Seats held by occupying enrollments; taken by `reserve_seat`, recounted by the admin
+    reserved_seats: Mapped[int] = mapped_column(Integer, default=0)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -307,15 +333,15 @@ class StudentCourseEnrollment(Base):
     course_class_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("course_class.id"))
 
     enrollment_date: Mapped[date] = mapped_column(Date)
-    enrollment_method: Mapped[EnrollmentMethodEnum] = mapped_column(Enum(EnrollmentMethodEnum), default=EnrollmentMethodEnum.ADMIN)
+    enrollment_method: Mapped[EnrollmentMethodEnum] = mapped_column(Choices(EnrollmentMethodEnum), default=EnrollmentMethodEnum.ADMIN)
     start_date: Mapped[Optional[date]] = mapped_column(Date)
     end_date: Mapped[Optional[date]] = mapped_column(Date)
 
-    status: Mapped[EnrollmentStatusEnum] = mapped_column(Enum(EnrollmentStatusEnum), default=EnrollmentStatusEnum.PENDING)
+    status: Mapped[EnrollmentStatusEnum] = mapped_column(Choices(EnrollmentStatusEnum), default=EnrollmentStatusEnum.PENDING)
 
     tuition_fee: Mapped[Decimal] = mapped_column(DECIMAL(10, 0))
     paid_amount: Mapped[Decimal] = mapped_column(DECIMAL(10, 0), default=0)
-    payment_status: Mapped[PaymentStatusEnum] = mapped_column(Enum(PaymentStatusEnum), default=PaymentStatusEnum.UNPAID)
+    payment_status: Mapped[PaymentStatusEnum] = mapped_column(Choices(PaymentStatusEnum), default=PaymentStatusEnum.UNPAID)
 
     final_grade: Mapped[Optional[str]] = mapped_column(String(5))
     notes: Mapped[Optional[str]] = mapped_column(Text)
@@ -368,7 +394,7 @@ class NewsCategory(Base):
     slug: Mapped[str] = mapped_column(String(255), unique=True)
     description: Mapped[Optional[str]] = mapped_column(Text)
     course_id: Mapped[Optional[str]] = mapped_column(UUID(as_uuid=False), ForeignKey("course.id"))
-    category_type: Mapped[NewsCategoryTypeEnum] = mapped_column(Enum(NewsCategoryTypeEnum), default=NewsCategoryTypeEnum.GENERAL)
+    category_type: Mapped[NewsCategoryTypeEnum] = mapped_column(Choices(NewsCategoryTypeEnum), default=NewsCategoryTypeEnum.GENERAL)
     order: Mapped[int] = mapped_column(Integer, default=0)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -394,6 +420,8 @@ class News(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # Maintained by database triggers (HexagonAdmin/course/search.py)
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, deferred=True)
 
     # Relationships
     category: Mapped["NewsCategory"] = relationship("NewsCategory", back_populates="news")
@@ -93,6 +93,7 @@ class Errors(Errorneous, Enum):
     # account
     UNAUTHORIZED = dauto("Authentication failed.")
     NOT_SIGNED_UP = dauto("Sign up required.")
+    FORBIDDEN = dauto("Permission denied.")
 
     # request
     INVALID_REQUEST = dauto("Invalid request.")
@@ -0,0 +1,108 @@
+import logging
+import os
+import sys
+import traceback
+from typing import Any, Optional
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+
+
+#----------------------------------------------------------------
+# Strict loading
+#----------------------------------------------------------------
+#: Whether reading a relationship the query did not load raises instead of reading as None / []. Set by `enable()`.
+strict = False
+
+# Frames in this directory belong to the application
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RepeatedStatement(InvalidRequestError):
+    """
+    The same statement ran too many times in one session, usually a lazy load or query inside a loop (N+1).
+    """
+
+
+def unloaded(row: Any, name: str) -> InvalidRequestError:
+    return InvalidRequestError(
+        f"'{type(row).__name__}.{name}' is not loaded; load it in the query "
+        f"(selectinload / joinedload) or leave it out of the response."
+    )
+
+
+def call_site() -> Optional[traceback.FrameSummary]:
+    """
+    Innermost frame of the application code outside this module.
+
+    SQLAlchemy runs the sync part of an async call in a child greenlet, whose stack ends at the spawn; the
+    search continues in the suspended parent greenlets, back to the coroutine that awaited the statement.
+    """
+    current = greenlet.getcurrent()
+    frame = sys._getframe(1)
+    while True:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(_root) and filename != __file__:
+                return traceback.FrameSummary(filename, frame.f_lineno, frame.f_code.co_name)
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return None
+        frame = current.gr_frame
+
+
+def _raiseload(state: ORMExecuteState) -> None:
+    if state.is_select and not state.is_column_load and not state.is_relationship_load:
+        state.statement = state.statement.options(raiseload("*", sql_only=True))
+
+
+def enable(engine: AsyncEngine, repeated_statements: int, fail: bool, logger: logging.Logger) -> None:
+    """
+    Turns on the development checks of how data is loaded.
+
+    - Relationships not loaded by a query raise when accessed instead of loading lazily (`raiseload('*')`), and
+      the composites raise when converting them instead of reading them as None / [].
+    - A statement running `repeated_statements` times in one `ResourceSession` is reported as N+1 with the
+      line that executed it: logged as a warning, or raised as `RepeatedStatement` when `fail` is set.
+
+    Args:
+        engine: Engine whose statements are checked.
+        repeated_statements: Runs of one statement in a session that are reported; 0 disables the check.
+        fail: Whether a reported statement raises.
+        logger: Logger of the warnings.
+    """
+    global strict
+    strict = True
+    if not event.contains(Session, "do_orm_execute", _raiseload):
+        event.listen(Session, "do_orm_execute", _raiseload)
+
+    if not repeated_statements:
+        return
+
+    from app.resources import _context
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        session = _context.get(None)
+        if session is None or executemany:
+            return
+        counts = session.stats.repeats
+        if counts is None:
+            counts = session.stats.repeats = {}
+        runs = counts[statement] = counts.get(statement, 0) + 1
+        if runs != repeated_statements:
+            return
+
+        site = call_site()
+        where = "unknown"
+        if site is not None:
+            where = f"{os.path.relpath(site.filename, os.path.dirname(_root))}:{site.lineno} in {site.name}"
+        message = (
+            f"Statement ran {runs} times in session {session.id} (N+1) at {where}:\n  {' '.join(statement.split())}"
+        )
+        if fail:
+            raise RepeatedStatement(message)
+        logger.warning(message)
@@ -1,8 +1,10 @@
 import asyncio
 import logging
 import sys
+import time
 from contextvars import ContextVar, Token
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
 from types import ModuleType
 from typing import (
     TYPE_CHECKING,
@@ -18,13 +20,16 @@ from typing import (
 from uuid import uuid4
 
 from app.config import ApplicationSettings
+from app.ext.metrics.base import REGISTRY
 from app.ext.firebase.base import (
     FirebaseAdmin,
     FirebaseAuth,
     FirebaseAuthSettings,
 )
+from app.ext.search.base import SuggestionIndex
 from app.ext.storage.base import Storage
 from app.ext.email.base import GmailEmailService
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -49,6 +54,8 @@ class Resources:
     firebase: Union[FirebaseAuth, FirebaseAdmin]
     email: GmailEmailService
     logger: logging.Logger
+    suggestions: Optional[SuggestionIndex] = None
+    tasks: set[asyncio.Task] = field(default_factory=set, repr=False)
 
     def open(self) -> "ResourceSession":
         return ResourceSession(
@@ -58,8 +65,68 @@ class Resources:
             firebase=self.firebase,
             email=self.email,
             logger=self.logger,
+            suggestions=self.suggestions,
+            spawn=self.spawn,
         )
 
+    async def call(
+        self, next: Callable[["ResourceSession"], Awaitable[Any]]
+    ) -> Any:
+        session = self.open()
+        token = _context.set(session)
+        async with session:
+            try:
+                return await next(session)
+            except:
+                session.fail()
+                raise
+            finally:
+                _context.reset(token)
+
+    def spawn(self, next: Callable[["ResourceSession"], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Runs `next` with its own session in a background task of the running loop.
+
+        Exceptions are logged, not propagated.
+        """
+        async def run():
+            try:
+                await self.call(next)
+            except Exception as e:
+                self.logger.error("Background task failed.", exc_info=e)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def drain(self) -> None:
+        """
+        Waits until the background tasks finish.
+        """
+        while self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+@dataclass
+class QueryStats:
+    """
+    Statements executed on behalf of a `ResourceSession`, counted by the engine hooks of `instrument()`.
+    """
+    count: int = 0
+    time: float = 0.0
+    # (statement, seconds) of each query, recorded only once set to a list
+    statements: Optional[list[tuple[str, float]]] = None
+    limit: int = 100
+    # Runs of each statement, counted by the N+1 check of `app.model.loading`
+    repeats: Optional[dict[str, int]] = None
+
+    def add(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.time += elapsed
+        if self.statements is not None and len(self.statements) < self.limit:
+            self.statements.append((statement, elapsed))
+
 
 @dataclass
 class ResourceSession(Closeable):
@@ -69,6 +136,9 @@ class ResourceSession(Closeable):
     firebase: Union[FirebaseAuth, FirebaseAdmin]
     email: GmailEmailService
     logger: logging.Logger
+    suggestions: Optional[SuggestionIndex] = None
+    spawn: Optional[Callable[[Callable[["ResourceSession"], Awaitable[Any]]], asyncio.Task]] = None
+    stats: QueryStats = field(default_factory=QueryStats)
 
     @property
     def tx(self) -> AsyncSession:
@@ -78,12 +148,23 @@ class ResourceSession(Closeable):
 
     _status: bool = field(init=False)
 
+    _deferred: list[Callable[["ResourceSession"], Awaitable[Any]]] = field(init=False)
+
     def __post_init__(self):
         self._status = True
+        self._deferred = []
 
     def fail(self) -> None:
         self._status = False
 
+    def defer(self, next: Callable[["ResourceSession"], Awaitable[Any]]) -> None:
+        """
+        Runs `next` with a new session in the background once this session has been committed.
+
+        Nothing runs if this session fails.
+        """
+        self._deferred.append(next)
+
     async def close(self, exc: Optional[Exception]):
         status = self._status and exc is None
 
@@ -96,12 +177,17 @@ class ResourceSession(Closeable):
                     self.logger.debug(f"Rollback transaction: {self.id}")
                     await self.db.rollback()
         except Exception as e:
+            status = False
             self.logger.warning(
                 "Exception was thrown in closing transaction.", exc_info=e
             )
         finally:
             await self.db.close()
 
+        if status and self.spawn:
+            for next in self._deferred:
+                self.spawn(next)
+
     async def __aenter__(self) -> Self:
         return self
 
@@ -120,19 +206,60 @@ class ResourceSession(Closeable):
 _context = ContextVar[ResourceSession]("_context")
 
 
+def instrument(engine: AsyncEngine) -> None:
+    """
+    Adds the number and duration of the statements executed in a `ResourceSession` to its `stats`.
+
+    The hooks run in the greenlet of the awaiting task, so the session is the one in the context. Statements
+    outside any session (pool pre-ping, background listeners) are not counted.
+    """
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        session = _context.get(None)
+        if session is not None and started is not None:
+            session.stats.add(statement, time.perf_counter() - started)
+
+
+def watch_pool(engine: AsyncEngine) -> None:
+    """
+    Exports the connection counts of the engine's pool, read when scraped.
+    """
+    pool = engine.pool
+    REGISTRY.collected(
+        "hexagon_db_pool_size", "Connections the pool keeps open.", "gauge", (),
+        lambda: {(): pool.size()},
+    )
+    REGISTRY.collected(
+        "hexagon_db_pool_connections", "Connections of the pool, in use (including overflow) or idle.", "gauge",
+        ("state",),
+        lambda: {("in_use",): pool.checkedout(), ("idle",): pool.checkedin()},
+    )
+
+
 async def configure(
     settings: ApplicationSettings, logger: logging.Logger
 ) -> tuple[Resources, Callable]:
     engine = create_async_engine(
         settings.db.dsn,
+        pool_size=settings.db.pool_size,
+        max_overflow=settings.db.max_overflow,
         echo_pool=settings.db.echo_pool and "debug",
     )
     if settings.db.echo:
         engine.echo = True
-
-    import app.ext.storage.local
-    import app.ext.storage.s3
-    import app.ext.storage.minio
+    if settings.timing.enabled:
+        instrument(engine)
+    if settings.metrics.active(settings.docs):
+        watch_pool(engine)
+    if settings.strict.active(settings.env):
+        from app.model import loading
+        loading.enable(engine, settings.strict.repeated_statements, settings.strict.fail, logger)
+        logger.info("Strict loading enabled: unloaded relationships raise and N+1 statements are reported.")
 
     logger.info(f"Storage URL from settings: {settings.storage.url}")
     storage = Storage.of(settings.storage.url, public_url=settings.storage.public_url)
@@ -158,21 +285,7 @@ async def configure(
         logger=logger,
     )
 
-    async def call_session(
-        next: Callable[[ResourceSession], Awaitable[Any]]
-    ) -> Callable[[ResourceSession], Awaitable[Any]]:
-        session = resources.open()
-        token = _context.set(session)
-        async with session:
-            try:
-                return await next(session)
-            except:
-                session.fail()
-                raise
-            finally:
-                _context.reset(token)
-
-    return resources, call_session
+    return resources, resources.call
 
 
 class ContextualResources:
@@ -234,13 +347,37 @@ class ContextAccessor(Generic[T]):
     def __getattr__(self, name):
         return getattr(self.cxt.get(), name)
 
+    @classmethod
+    def of(cls, cxt: ContextVar[T], kind: type) -> "ContextAccessor[T]":
+        """
+        Creates an accessor with a property for each public attribute of `kind`.
+
+        Reading one of them is a property call; `__getattr__` only runs after the normal lookup has failed,
+        which costs more than the context variable lookup itself. Other names still go through `__getattr__`.
+
+        Args:
+            cxt: Context variable holding the value.
+            kind: Type of the value: a dataclass, whose fields are read like its other attributes.
+        Returns:
+            Accessor.
+        """
+        get = cxt.get
+
+        def reader(name: str) -> property:
+            read = attrgetter(name)
+            return property(lambda self: read(get()))
+
+        names = {f.name for f in fields(kind)} | set(dir(kind))
+        attributes = {name: reader(name) for name in names if not name.startswith("_")}
+        return type(f"{kind.__name__}Accessor", (cls,), attributes)(cxt)
+
 
 class Module(ModuleType):
     """
     Module accessor.
     """
 
-    accessor = ContextAccessor[ResourceSession](_context)
+    accessor = ContextAccessor.of(_context, ResourceSession)
 
     @property
     def context(self) -> ResourceSession:
@@ -0,0 +1,112 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    python -m app.serve
+
+Settings are read from the `SERVER__*` variables (see `ApplicationSettings.Server`). The workers and their
+database pools must fit in `DB__MAX_CONNECTIONS` (see `ApplicationSettings.worker_count`), or the server does
+not start.
+
+- The master imports the application before forking (`preload`), and every worker completes `create_app`
+  (database pool, suggestion index, ...) before it accepts connections; a worker failing to start stops the
+  server instead of being restarted in a loop.
+- Workers run uvloop and httptools.
+- SIGTERM stops gracefully: the workers stop accepting, finish the requests in progress, wait for the
+  background tasks and close the pool, within `graceful_timeout`.
+- A worker is replaced after `max_requests` (plus a random jitter) requests, bounding memory growth.
+- The workers share their metrics through a directory (`METRICS__DIRECTORY`, a temporary one by default),
+  emptied at startup, so a scrape of any worker reports the whole server.
+"""
+import gc
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+from app.config import ApplicationSettings, environment
+
+
+# Seconds of the graceful timeout kept for the lifespan shutdown after the requests in progress
+SHUTDOWN_MARGIN = 5
+
+
+class Worker(UvicornWorker):
+    """
+    Uvicorn worker configured by the `Server` settings.
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        settings = environment().settings.server
+        self.CONFIG_KWARGS = {
+            "loop": settings.loop,
+            "http": settings.http,
+            # The application is configured at the lifespan startup, which must not be skipped on error
+            "lifespan": "on",
+            "timeout_graceful_shutdown": max(settings.graceful_timeout - SHUTDOWN_MARGIN, 1),
+        }
+        super().__init__(*args, **kwargs)
+
+
+class Server(BaseApplication):
+    """
+    Gunicorn application serving `app.main.Application`.
+    """
+    def __init__(self, settings: ApplicationSettings.Server) -> None:
+        self.settings = settings
+        #: Metrics directory created for this server, removed when it exits.
+        self.metrics_directory: Optional[str] = None
+        super().__init__()
+
+    def load_config(self) -> None:
+        s = self.settings
+        options = {
+            "bind": f"{s.host}:{s.port}",
+            "workers": environment().settings.worker_count(),
+            "worker_class": "app.serve.Worker",
+            "preload_app": s.preload,
+            "max_requests": s.max_requests,
+            "max_requests_jitter": s.max_requests_jitter,
+            "graceful_timeout": s.graceful_timeout,
+            "timeout": s.timeout,
+            "keepalive": s.keepalive,
+            "backlog": s.backlog,
+            "errorlog": "-",
+            "proc_name": "hexagon-api",
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("on_starting", self.on_starting)
+        self.cfg.set("on_exit", self.on_exit)
+
+    def on_starting(self, arbiter: Any) -> None:
+        # The workers are forked with the settings of the master, directory included
+        settings = environment().settings
+        if not settings.metrics.active(settings.docs):
+            return
+        if settings.metrics.directory is None:
+            settings.metrics.directory = self.metrics_directory = tempfile.mkdtemp(prefix="hexagon-metrics-")
+        # Samples of an earlier run are not part of this one
+        for path in Path(settings.metrics.directory).glob("*.json"):
+            path.unlink()
+
+    def on_exit(self, arbiter: Any) -> None:
+        if self.metrics_directory:
+            shutil.rmtree(self.metrics_directory, ignore_errors=True)
+
+    def load(self) -> Any:
+        # With preload this runs in the master, so the workers are forked with every module imported
+        from app.main import Application
+        from app.api import routes  # noqa: F401
+
+        # Objects allocated so far live as long as the process; keeping the collector off them keeps the
+        # forked workers from copying the pages they are on
+        gc.freeze()
+        return Application()
+
+
+def main() -> None:
+    Server(environment().settings.server).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
+import asyncio
+from functools import lru_cache
 from typing import Optional
 
-import httpx
 from urllib.parse import urlparse
 from uuid import uuid4
 from app.config import environment
 from app.ext.storage.base import Storage
 from sqlalchemy import and_
 from sqlalchemy import (
+    bindparam,
     delete,
     func,
     insert,
@@ -147,18 +149,22 @@ async def login(login_id: str) -> Maybe[c.User]:
 
 @service
 async def get_user_profile(user: c.User) -> Maybe[c.UserProfile]:
-    profile = await r.tx.scalar(
-        select(m.UserProfile).where(m.UserProfile.user_id == user.id)
+    query = (
+        select(m.UserProfile)
+        .options(joinedload(m.UserProfile.user))
+        .where(m.UserProfile.user_id == user.id)
     )
+    profile = await r.tx.scalar(query)
     
     if profile is None:
-        profile = await r.tx.scalar(
-            insert(m.UserProfile).returning(m.UserProfile),
+        await r.tx.execute(
+            insert(m.UserProfile.__table__),
             dict(
                 id=str(uuid4()),
                 user_id=user.id,
             ),
         )
+        profile = await r.tx.scalar(query)
         await r.tx.commit()
     
     return c.UserProfile.of(profile)
@@ -265,29 +271,211 @@ async def update_user_profile(
     return c.UserProfile.of(profile_with_user)
 
 
+PICTURE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/heic": "heic",
+    "image/heif": "heif",
+}
+
+
 @service
-async def withdraw(user: c.User):
-    if user.profile and user.profile.profile_picture:
+async def start_profile_picture_upload(user: c.User, content_type: str, size: int) -> Maybe[c.DirectUpload]:
+    """
+    Issues a presigned form to upload a profile picture of `size` bytes straight to the storage.
+
+    The storage enforces the key, Content-Type and size; the picture is applied by `commit_profile_picture`.
+    """
+    settings = environment().settings.upload
+
+    if user.login_method != LoginMethod.PASSWORD.value:
+        return Errors.INVALID_REQUEST
+    if content_type not in settings.picture_types or content_type not in PICTURE_EXTENSIONS:
+        return Errors.INVALID_IMAGE_FORMAT
+    if not 0 < size <= settings.picture_max_size:
+        return Errors.INVALID_REQUEST
+
+    key = f"profile_pictures/{user.id}/{uuid4().hex}.{PICTURE_EXTENSIONS[content_type]}"
+    try:
+        form = await asyncio.to_thread(r.storage.presign_upload, key, content_type, size, settings.expiration)
+    except NotImplementedError:
+        r.logger.warning(f"{type(r.storage).__name__} does not support direct uploads.")
+        return Errors.IO_ERROR
+
+    return c.DirectUpload(key=key, url=form.url, fields=form.fields, expires_at=form.expires_at)
+
+
+@service
+async def commit_profile_picture(user: c.User, key: str) -> Maybe[c.UserProfile]:
+    """
+    Sets a picture uploaded with `start_profile_picture_upload` as the profile picture.
+
+    The picture is normalized (orientation, metadata, size) and thumbnailed in the background after commit,
+    and the previous picture is deleted.
+    """
+    settings = environment().settings.upload
+
+    match = c.PROFILE_PICTURE_KEY.fullmatch(key)
+    if match is None or match["user_id"] != user.id or user.login_method != LoginMethod.PASSWORD.value:
+        return Errors.INVALID_REQUEST
+
+    stored = await asyncio.to_thread(r.storage.stat, key)
+    if stored is None:
+        return Errors.DATA_NOT_FOUND
+    if stored.size > settings.picture_max_size or stored.content_type not in settings.picture_types:
+        await asyncio.to_thread(r.storage.delete, key)
+        return Errors.INVALID_IMAGE_FORMAT
+
+    profile = await r.tx.scalar(
+        select(m.UserProfile).where(m.UserProfile.user_id == user.id).with_for_update()
+    )
+    previous = profile.profile_picture if profile else None
+    # Committing the same upload again (or after it was processed) changes nothing
+    changed = previous not in (key, *c.profile_picture_variants(key))
+
+    if profile is None:
+        await r.tx.execute(
+            insert(m.UserProfile.__table__),
+            dict(id=str(uuid4()), user_id=user.id, profile_picture=key),
+        )
+    elif changed:
+        await r.tx.execute(
+            update(m.UserProfile).where(m.UserProfile.user_id == user.id).values(profile_picture=key)
+        )
+
+    profile = await r.tx.scalar(
+        select(m.UserProfile)
+        .options(joinedload(m.UserProfile.user))
+        .where(m.UserProfile.user_id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    await r.tx.commit()
+
+    if changed:
+        r.defer(lambda _: process_profile_picture(user.id, key))
+        if previous:
+            r.defer(lambda _: discard_profile_picture(previous))
+
+    return c.UserProfile.of(profile)
+
+
+@service
+async def process_profile_picture(user_id: str, key: str) -> Maybe[str]:
+    """
+    Replaces an uploaded profile picture with a normalized JPEG and writes its thumbnail.
+
+    Runs in the background; does nothing to the profile if the picture has been replaced meanwhile. A picture
+    that cannot be decoded is removed from the profile. When the processed files cannot be stored, the upload
+    stays the profile picture as it is, without a thumbnail, and the variants written so far are deleted.
+    """
+    # Pillow is loaded by the first picture rather than at startup
+    from app.ext.image.base import render_jpegs
+
+    settings = environment().settings.upload
+    picture_key, thumbnail_key = c.profile_picture_variants(key)
+
+    try:
+        data = await asyncio.to_thread(r.storage.read, key)
+        picture, thumbnail = await asyncio.to_thread(
+            render_jpegs, data, settings.picture_dimension, settings.thumbnail_dimension
+        )
+    except Exception as e:
+        r.logger.warning(f"Failed to process profile picture: {key}", exc_info=e)
+        await r.tx.execute(
+            update(m.UserProfile)
+            .where(m.UserProfile.user_id == user_id, m.UserProfile.profile_picture == key)
+            .values(profile_picture=None)
+        )
+        await r.tx.commit()
+        await asyncio.to_thread(r.storage.delete, key)
+        return Errors.INVALID_IMAGE_FORMAT
+
+    try:
+        await asyncio.to_thread(r.storage.write, thumbnail_key, thumbnail, "image/jpeg")
+        await asyncio.to_thread(r.storage.write, picture_key, picture, "image/jpeg")
+    except Exception as e:
+        r.logger.warning(f"Failed to store processed profile picture: {key}", exc_info=e)
         try:
-            picture_url = user.profile.profile_picture
-            if picture_url.startswith('http'):
-                storage_path = picture_url.split('/')[-1]
-                storage_path = f"profile_pictures/{storage_path}"
-            else:
-                storage_path = user.profile.profile_picture
-            
-            r.storage.delete(storage_path)
+            await asyncio.to_thread(r.storage.delete_many, [thumbnail_key, picture_key])
         except Exception as e:
-            r.logger.warning(f"Failed to delete profile picture", exc_info=e)
+            r.logger.warning(f"Failed to delete processed profile picture: {key}", exc_info=e)
+        return Errors.IO_ERROR
 
-    await r.tx.execute(
-        delete(m.UserProfile).where(m.UserProfile.user_id == user.id)
+    # The processed picture has its own key, so the thumbnail is only exposed once it has been written
+    replaced = await r.tx.execute(
+        update(m.UserProfile)
+        .where(m.UserProfile.user_id == user_id, m.UserProfile.profile_picture == key)
+        .values(profile_picture=picture_key)
     )
+    await r.tx.commit()
+    await asyncio.to_thread(r.storage.delete, key)
+    if replaced.rowcount == 0:
+        await discard_profile_picture(picture_key)
+
+    return picture_key
+
+
+@service
+async def discard_profile_picture(key: str) -> Maybe[bool]:
+    """Deletes a stored profile picture together with its processed variants"""
+    if key and key.startswith("http"):
+        # Pictures downloaded at signup are stored by their public URL (see `download_and_save_profile_picture`)
+        stored = f"profile_pictures/{key.rsplit('/', 1)[-1]}"
+        key = stored if r.storage.urlize(stored) == key else None
+    if not key:
+        return False
+
+    try:
+        failed = await asyncio.to_thread(r.storage.delete_many, [key, *(c.profile_picture_variants(key) or ())])
+    except Exception as e:
+        r.logger.debug(f"Failed to delete profile picture: {key}", exc_info=e)
+        return False
+    return not failed
+
+
+@lru_cache
+def withdraw_enrollments_statement():
+    """
+    Deletes the enrollments of the user bound as `user_id` and gives back the seats they held, in one statement.
+
+    The deleted rows are returned to an `UPDATE` decrementing `reserved_seats` of each class by its active
+    enrollments in `OCCUPYING_STATUSES`, the ones `reserve_seat` counted.
+    """
+    enrollment = m.StudentCourseEnrollment
+    deleted = (
+        delete(enrollment)
+        .where(enrollment.user_id == bindparam("user_id"))
+        .returning(enrollment.course_class_id, enrollment.status, enrollment.is_active)
+        .cte("deleted")
+    )
+    freed = (
+        select(deleted.c.course_class_id, func.count().label("seats"))
+        .where(deleted.c.is_active == True, deleted.c.status.in_(m.OCCUPYING_STATUSES))
+        .group_by(deleted.c.course_class_id)
+        .subquery("freed")
+    )
+    return (
+        update(m.CourseClass)
+        .where(m.CourseClass.id == freed.c.course_class_id)
+        .values(reserved_seats=func.greatest(m.CourseClass.reserved_seats - freed.c.seats, 0))
+        .add_cte(deleted)
+    )
+
+
+@service
+async def withdraw(user: c.User):
+    if user.profile and user.profile.profile_picture:
+        picture = user.profile.profile_picture
+        r.defer(lambda _: discard_profile_picture(picture))
 
     await r.tx.execute(
-        delete(m.StudentCourseEnrollment).where(m.StudentCourseEnrollment.user_id == user.id)
+        delete(m.UserProfile).where(m.UserProfile.user_id == user.id)
     )
 
+    await r.tx.execute(withdraw_enrollments_statement(), {"user_id": user.id})
+
     now = datetime.now()
     await r.tx.execute(
         update(m.User)
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy import select, and_, func
 from sqlalchemy.orm import selectinload, joinedload
 
@@ -7,6 +7,38 @@ import app.model.composite as c
 from .commons import service, Maybe, Errors, r
 
 
+def occupied_seats_query(class_ids: Iterable[str]):
+    """
+    Seats held per class: active enrollments in `OCCUPYING_STATUSES`, aggregated with one `GROUP BY`.
+    """
+    enrollment = m.StudentCourseEnrollment
+    return select(
+        enrollment.course_class_id,
+        func.count().label("occupied")
+    ).where(
+        enrollment.course_class_id.in_(list(class_ids)),
+        enrollment.is_active == True,
+        enrollment.status.in_(m.OCCUPYING_STATUSES)
+    ).group_by(enrollment.course_class_id)
+
+
+async def occupied_seats(class_ids: Iterable[str]) -> Dict[str, int]:
+    """Seats held per class ID; classes without enrollments are omitted"""
+    class_ids = list(class_ids)
+    if not class_ids:
+        return {}
+    result = await r.tx.execute(occupied_seats_query(class_ids))
+    return {class_id: occupied for class_id, occupied in result.all()}
+
+
+async def attach_seat_counts(classes: Iterable[c.CourseClass]) -> None:
+    """Sets `occupied_seats` on classes with a single aggregate query"""
+    classes = list(classes)
+    counts = await occupied_seats(cls.id for cls in classes)
+    for cls in classes:
+        cls.occupied_seats = counts.get(cls.id, 0)
+
+
 @service
 async def get_course_categories(active_only: bool = True) -> Maybe[List[c.CourseCategory]]:
     """Get all course categories"""
@@ -103,7 +135,9 @@ async def get_course_by_slug(slug: str) -> Maybe[c.Course]:
     if not course:
         return Errors.DATA_NOT_FOUND
     
-    return c.Course.of(course)
+    course = c.Course.of(course)
+    await attach_seat_counts(course.classes)
+    return course
 
 
 @service
@@ -129,7 +163,9 @@ async def get_course_by_id(course_id: str) -> Maybe[c.Course]:
     if not course:
         return Errors.DATA_NOT_FOUND
     
-    return c.Course.of(course)
+    course = c.Course.of(course)
+    await attach_seat_counts(course.classes)
+    return course
 
 
 @service
@@ -151,7 +187,9 @@ async def get_course_class_by_code(class_code: str) -> Maybe[c.CourseClass]:
     if not course_class:
         return Errors.DATA_NOT_FOUND
     
-    return c.CourseClass.of(course_class)
+    course_class = c.CourseClass.of(course_class)
+    await attach_seat_counts([course_class])
+    return course_class
 
 
 @service
@@ -180,4 +218,6 @@ async def get_course_classes(
     result = await r.tx.execute(query)
     classes = result.scalars().all()
     
-    return [c.CourseClass.of(cls) for cls in classes] 
\ No newline at end of file
+    classes = [c.CourseClass.of(cls) for cls in classes]
+    await attach_seat_counts(classes)
+    return classes
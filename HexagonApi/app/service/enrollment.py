@@ -1,8 +1,11 @@
+import uuid
+from functools import lru_cache
 from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
-from sqlalchemy import select, and_, func
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy import select, and_, func, insert, update, exists, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import InstrumentedAttribute, selectinload, joinedload
 
 import app.model.db as m
 import app.model.composite as c
@@ -95,66 +98,135 @@ async def check_existing_enrollment(user_id: str, course_class_id: str) -> Maybe
     return enrollment is not None
 
 
-@service
-async def enroll_by_class_code(
-    user: c.User, 
-    class_code: str,
-    tuition_fee: Decimal
-) -> Maybe[c.StudentEnrollment]:
-    """Enroll user in a class using class code"""
-    class_query = select(m.CourseClass).options(
-        joinedload(m.CourseClass.course)
-    ).where(
-        and_(
-            m.CourseClass.class_code == class_code,
+@lru_cache
+def reserve_seat_statement(class_key: InstrumentedAttribute):
+    """
+    Takes a seat of an open class and inserts the pending enrollment in one statement.
+
+    The conditional `UPDATE` locks the class row, so concurrent reservations queue on it and each sees the
+    counter left by the previous one; once the class is full, or the user is already enrolled, nothing is
+    written and no enrollment ID is returned. Built once per column identifying the class; the values of
+    the new enrollment are bound as `new_<column>` when executed (see `reserve_seat`).
+
+    Args:
+        class_key: `CourseClass` column matched against the `class_key` parameter.
+    """
+    enrollment = m.StudentCourseEnrollment
+    seat = (
+        update(m.CourseClass)
+        .where(
+            class_key == bindparam("class_key"),
             m.CourseClass.is_active == True,
-            m.CourseClass.is_open_for_enrollment == True
+            m.CourseClass.is_open_for_enrollment == True,
+            m.CourseClass.reserved_seats < m.CourseClass.max_students,
+            ~exists().where(
+                enrollment.user_id == bindparam("new_user_id"),
+                enrollment.course_class_id == m.CourseClass.id
+            )
         )
+        .values(reserved_seats=m.CourseClass.reserved_seats + 1)
+        .returning(m.CourseClass.id, m.CourseClass.course_id)
+        .cte("seat")
     )
-    
-    class_result = await r.tx.execute(class_query)
-    course_class = class_result.scalar_one_or_none()
-    
-    if not course_class:
-        return Errors.DATA_NOT_FOUND
-    
-    existing_check = await check_existing_enrollment(user.id, course_class.id)
-    if existing_check.get():
-        return Errors.INVALID_REQUEST 
-    
-    enrolled_count_query = select(func.count(m.StudentCourseEnrollment.id)).where(
-        and_(
-            m.StudentCourseEnrollment.course_class_id == course_class.id,
-            m.StudentCourseEnrollment.is_active == True
+
+    # The table rather than the entity: executed with parameters, an ORM insert would be a bulk insert
+    table = m.StudentCourseEnrollment.__table__
+    columns = [
+        "id", "user_id", "enrollment_date", "enrollment_method", "status", "tuition_fee", "paid_amount",
+        "payment_status", "final_grade", "notes", "is_active", "created_at", "updated_at",
+    ]
+    return (
+        insert(table)
+        .add_cte(seat)
+        .from_select(
+            ["course_id", "course_class_id", *columns],
+            select(
+                seat.c.course_id,
+                seat.c.id,
+                *(bindparam(f"new_{name}", type_=table.c[name].type) for name in columns)
+            )
         )
+        .returning(table.c.id)
     )
-    count_result = await r.tx.execute(enrolled_count_query)
-    current_count = count_result.scalar()
-    
-    if current_count >= course_class.max_students:
-        return Errors.INVALID_REQUEST 
-    
-    enrollment = m.StudentCourseEnrollment(
-        user_id=user.id,
-        course_id=course_class.course_id,
-        course_class_id=course_class.id,
-        enrollment_date=date.today(),
-        enrollment_method=m.EnrollmentMethodEnum.CLASS_CODE,
-        status=m.EnrollmentStatusEnum.PENDING,
-        tuition_fee=tuition_fee,
-        paid_amount=Decimal(0),
-        payment_status=m.PaymentStatusEnum.UNPAID,
-        is_active=True,
-        created_at=datetime.now(),
-        updated_at=datetime.now()
-    )
-    
-    r.tx.add(enrollment)
+
+
+async def reserve_seat(
+    user_id: str,
+    class_key: InstrumentedAttribute,
+    class_value: str,
+    enrollment_method: m.EnrollmentMethodEnum,
+    tuition_fee: Decimal,
+    notes: Optional[str] = None
+) -> Optional[str]:
+    """
+    Reserves a seat for the user in the class whose `class_key` column equals `class_value`.
+
+    An enrollment of the same user committed concurrently fails the statement on the unique constraint;
+    it runs in a savepoint, so only the statement is rolled back, which also gives the seat back, and the
+    rest of the transaction is kept.
+
+    Returns:
+        ID of the new enrollment, or None when the class is missing, closed or full, or the user already
+        has an enrollment in it.
+    """
+    now = datetime.now()
+    values = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "enrollment_date": date.today(),
+        "enrollment_method": enrollment_method,
+        "status": m.EnrollmentStatusEnum.PENDING,
+        "tuition_fee": tuition_fee,
+        "paid_amount": Decimal(0),
+        "payment_status": m.PaymentStatusEnum.UNPAID,
+        "final_grade": "",
+        "notes": notes or "",
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now,
+    }
+    try:
+        async with r.tx.begin_nested():
+            result = await r.tx.execute(
+                reserve_seat_statement(class_key),
+                {"class_key": class_value, **{f"new_{name}": value for name, value in values.items()}}
+            )
+    except IntegrityError:
+        return None
+    return result.scalar_one_or_none()
+
+
+async def enroll(
+    user: c.User,
+    class_key: InstrumentedAttribute,
+    class_value: str,
+    enrollment_method: m.EnrollmentMethodEnum,
+    tuition_fee: Decimal,
+    notes: Optional[str] = None
+) -> Maybe[c.StudentEnrollment]:
+    enrollment_id = await reserve_seat(user.id, class_key, class_value, enrollment_method, tuition_fee, notes)
+
+    if enrollment_id is None:
+        class_query = select(m.CourseClass.id).where(
+            and_(
+                class_key == class_value,
+                m.CourseClass.is_active == True,
+                m.CourseClass.is_open_for_enrollment == True
+            )
+        )
+        if (await r.tx.execute(class_query)).scalar_one_or_none() is None:
+            return Errors.DATA_NOT_FOUND
+        return Errors.INVALID_REQUEST
+
+    query = select(m.StudentCourseEnrollment).options(
+        joinedload(m.StudentCourseEnrollment.user),
+        joinedload(m.StudentCourseEnrollment.course),
+        joinedload(m.StudentCourseEnrollment.course_class)
+    ).where(m.StudentCourseEnrollment.id == enrollment_id)
+
+    enrollment = (await r.tx.execute(query)).scalar_one()
     await r.tx.commit()
-    await r.tx.refresh(enrollment)
-    
-    await r.tx.refresh(enrollment, ['user', 'course', 'course_class'])
-    
+
     enrollment_composite = c.StudentEnrollment.of(enrollment)
     
     try:
@@ -165,6 +237,22 @@ async def enroll_by_class_code(
     return enrollment_composite
 
 
+@service
+async def enroll_by_class_code(
+    user: c.User, 
+    class_code: str,
+    tuition_fee: Decimal
+) -> Maybe[c.StudentEnrollment]:
+    """Enroll user in a class using class code"""
+    return await enroll(
+        user,
+        m.CourseClass.class_code,
+        class_code,
+        m.EnrollmentMethodEnum.CLASS_CODE,
+        tuition_fee
+    )
+
+
 @service
 async def submit_online_enrollment(
     user: c.User,
@@ -173,65 +261,11 @@ async def submit_online_enrollment(
     notes: Optional[str] = None
 ) -> Maybe[c.StudentEnrollment]:
     """Submit online enrollment form"""
-    class_query = select(m.CourseClass).options(
-        joinedload(m.CourseClass.course)
-    ).where(
-        and_(
-            m.CourseClass.id == course_class_id,
-            m.CourseClass.is_active == True,
-            m.CourseClass.is_open_for_enrollment == True
-        )
+    return await enroll(
+        user,
+        m.CourseClass.id,
+        course_class_id,
+        m.EnrollmentMethodEnum.ONLINE_FORM,
+        tuition_fee,
+        notes
     )
-    
-    class_result = await r.tx.execute(class_query)
-    course_class = class_result.scalar_one_or_none()
-    
-    if not course_class:
-        return Errors.DATA_NOT_FOUND
-    
-    existing_check = await check_existing_enrollment(user.id, course_class.id)
-    if existing_check.get():
-        return Errors.INVALID_REQUEST
-    
-    enrolled_count_query = select(func.count(m.StudentCourseEnrollment.id)).where(
-        and_(
-            m.StudentCourseEnrollment.course_class_id == course_class.id,
-            m.StudentCourseEnrollment.is_active == True
-        )
-    )
-    count_result = await r.tx.execute(enrolled_count_query)
-    current_count = count_result.scalar()
-    
-    if current_count >= course_class.max_students:
-        return Errors.INVALID_REQUEST
-    
-    enrollment = m.StudentCourseEnrollment(
-        user_id=user.id,
-        course_id=course_class.course_id,
-        course_class_id=course_class.id,
-        enrollment_date=date.today(),
-        enrollment_method=m.EnrollmentMethodEnum.ONLINE_FORM,
-        status=m.EnrollmentStatusEnum.PENDING,
-        tuition_fee=tuition_fee,
-        paid_amount=Decimal(0),
-        payment_status=m.PaymentStatusEnum.UNPAID,
-        notes=notes,
-        is_active=True,
-        created_at=datetime.now(),
-        updated_at=datetime.now()
-    )
-    
-    r.tx.add(enrollment)
-    await r.tx.commit()
-    await r.tx.refresh(enrollment)
-    
-    await r.tx.refresh(enrollment, ['user', 'course', 'course_class'])
-    
-    enrollment_composite = c.StudentEnrollment.of(enrollment)
-    
-    try:
-        await send_enrollment_notifications(enrollment_composite)
-    except Exception as e:
-        print(f"Failed to send enrollment emails: {e}")
-    
-    return enrollment_composite 
\ No newline at end of file
@@ -1,9 +1,11 @@
+import asyncio
 from typing import List, Optional
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, and_
 from sqlalchemy.orm import joinedload, selectinload
 
 import app.model.db as m
 import app.model.composite as c
+from app.ext.storage.base import StoredObject
 from .commons import service, Maybe, Errors, r
 
 
@@ -53,6 +55,19 @@ async def get_file_by_id(
     return c.CourseFile.of(file)
 
 
+async def _can_download(file: c.CourseFile, user: Optional[c.User]) -> bool:
+    if user and file.permission_level == "enrolled":
+        user_query = select(m.User).options(
+            selectinload(m.User.enrollments)
+        ).where(m.User.id == user.id)
+        user_result = await r.tx.execute(user_query)
+        user_with_enrollments = user_result.scalar_one_or_none()
+        if user_with_enrollments:
+            user = c.User.of(user_with_enrollments)
+    
+    return file.can_download(user)
+
+
 @service
 async def download_file(
     file_id: str,
@@ -65,22 +80,13 @@ async def download_file(
     
     file = file_result.get()
     
-    if user and file.permission_level == "enrolled":
-        user_query = select(m.User).options(
-            selectinload(m.User.enrollments)
-        ).where(m.User.id == user.id)
-        user_result = await r.tx.execute(user_query)
-        user_with_enrollments = user_result.scalar_one_or_none()
-        if user_with_enrollments:
-            user = c.User.of(user_with_enrollments)
-    
-    if not file.can_download(user):
+    if not await _can_download(file, user):
         return Errors.FORBIDDEN
     
     try:
         download_url = r.storage.urlize(file.file_key)
     except Exception:
-        return Errors.INTERNAL_ERROR
+        return Errors.IO_ERROR
     
     file_db = await r.tx.get(m.CourseFile, file_id)
     if file_db:
@@ -90,6 +96,46 @@ async def download_file(
     return (file, download_url)
 
 
+@service
+async def open_file(
+    file_id: str,
+    user: Optional[c.User] = None
+) -> Maybe[tuple[c.CourseFile, StoredObject]]:
+    """Check the download permission of a file and get the metadata of its stored content"""
+    file = await r.tx.scalar(
+        select(m.CourseFile).where(
+            and_(
+                m.CourseFile.id == file_id,
+                m.CourseFile.is_active == True
+            )
+        )
+    )
+    if not file:
+        return Errors.DATA_NOT_FOUND
+    
+    file = c.CourseFile.of(file)
+    if not await _can_download(file, user):
+        return Errors.FORBIDDEN
+    
+    stored = await asyncio.to_thread(r.storage.stat, file.file_key)
+    if stored is None:
+        return Errors.DATA_NOT_FOUND
+    
+    return (file, stored)
+
+
+@service
+async def count_download(file_id: str) -> Maybe[bool]:
+    """Increment the download count of a file"""
+    await r.tx.execute(
+        update(m.CourseFile)
+        .where(m.CourseFile.id == file_id)
+        .values(download_count=m.CourseFile.download_count + 1)
+    )
+    await r.tx.commit()
+    return True
+
+
 @service
 async def get_downloadable_files(
     course_id: str,
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy import select, and_, func, desc
 from sqlalchemy.orm import selectinload, joinedload
 
@@ -7,6 +7,29 @@ import app.model.composite as c
 from .commons import service, Maybe, Errors, r
 
 
+async def published_news_counts(category_ids: Iterable[str]) -> Dict[str, int]:
+    """Published news per category ID, aggregated with one `GROUP BY`; empty categories are omitted"""
+    category_ids = list(set(category_ids))
+    if not category_ids:
+        return {}
+    result = await r.tx.execute(
+        select(m.News.category_id, func.count()).where(
+            m.News.category_id.in_(category_ids),
+            m.News.is_published == True,
+            m.News.is_active == True
+        ).group_by(m.News.category_id)
+    )
+    return {category_id: count for category_id, count in result.all()}
+
+
+async def attach_news_counts(categories: Iterable[Optional[c.NewsCategory]]) -> None:
+    """Sets `published_news` on categories with a single aggregate query"""
+    categories = [category for category in categories if category is not None]
+    counts = await published_news_counts(category.id for category in categories)
+    for category in categories:
+        category.published_news = counts.get(category.id, 0)
+
+
 @service
 async def get_news_categories(
     category_type: Optional[str] = None,
@@ -15,8 +38,7 @@ async def get_news_categories(
 ) -> Maybe[List[c.NewsCategory]]:
     """Get news categories"""
     query = select(m.NewsCategory).options(
-        joinedload(m.NewsCategory.course),
-        selectinload(m.NewsCategory.news)
+        joinedload(m.NewsCategory.course)
     )
     
     if active_only:
@@ -31,16 +53,16 @@ async def get_news_categories(
     query = query.order_by(m.NewsCategory.order, m.NewsCategory.name)
     
     result = await r.tx.execute(query)
-    categories = result.scalars().all()
-    return [c.NewsCategory.of(cat) for cat in categories]
+    categories = [c.NewsCategory.of(cat) for cat in result.scalars().all()]
+    await attach_news_counts(categories)
+    return categories
 
 
 @service
 async def get_news_category_by_slug(slug: str) -> Maybe[c.NewsCategory]:
     """Get news category by slug"""
     query = select(m.NewsCategory).options(
-        joinedload(m.NewsCategory.course),
-        selectinload(m.NewsCategory.news)
+        joinedload(m.NewsCategory.course)
     ).where(
         and_(
             m.NewsCategory.slug == slug,
@@ -54,7 +76,9 @@ async def get_news_category_by_slug(slug: str) -> Maybe[c.NewsCategory]:
     if not category:
         return Errors.DATA_NOT_FOUND
     
-    return c.NewsCategory.of(category)
+    category = c.NewsCategory.of(category)
+    await attach_news_counts([category])
+    return category
 
 
 @service
@@ -119,7 +143,9 @@ async def get_news_list(
     result = await r.tx.execute(query)
     news_list = result.scalars().all()
     
-    return ([c.News.of(news) for news in news_list], total)
+    news_list = [c.News.of(news) for news in news_list]
+    await attach_news_counts(news.category for news in news_list)
+    return (news_list, total)
 
 
 @service
@@ -142,7 +168,9 @@ async def get_news_by_slug(slug: str) -> Maybe[c.News]:
     if not news:
         return Errors.DATA_NOT_FOUND
     
-    return c.News.of(news)
+    news = c.News.of(news)
+    await attach_news_counts([news.category])
+    return news
 
 
 @service
@@ -165,7 +193,9 @@ async def get_news_by_id(news_id: str) -> Maybe[c.News]:
     if not news:
         return Errors.DATA_NOT_FOUND
     
-    return c.News.of(news)
+    news = c.News.of(news)
+    await attach_news_counts([news.category])
+    return news
 
 
 @service
@@ -182,30 +212,55 @@ async def get_recent_news(limit: int = 5) -> Maybe[List[c.News]]:
     ).order_by(desc(m.News.published_at)).limit(limit)
     
     result = await r.tx.execute(query)
-    news_list = result.scalars().all()
-    
-    return [c.News.of(news) for news in news_list]
+    news_list = [c.News.of(news) for news in result.scalars().all()]
+    await attach_news_counts(news.category for news in news_list)
+    return news_list
 
 
-@service
-async def get_featured_news(category_type: str, limit: int = 3) -> Maybe[List[c.News]]:
-    """Get featured news by category type"""
-    query = select(m.News).options(
-        joinedload(m.News.category),
-        selectinload(m.News.content_blocks)
+async def featured_news(category_types: List[str], limit: int) -> Dict[str, List[c.News]]:
+    """Latest published news of each category type, ranked per type within one query"""
+    ranked = select(
+        m.News.id,
+        func.row_number().over(
+            partition_by=m.NewsCategory.category_type,
+            order_by=desc(m.News.published_at)
+        ).label("rank")
     ).join(m.NewsCategory).where(
         and_(
             m.News.is_published == True,
             m.News.is_active == True,
-            m.NewsCategory.category_type == category_type,
+            m.NewsCategory.category_type.in_(category_types),
             m.NewsCategory.is_active == True
         )
-    ).order_by(desc(m.News.published_at)).limit(limit)
-    
+    ).subquery()
+
+    query = select(m.News).options(
+        joinedload(m.News.category),
+        selectinload(m.News.content_blocks)
+    ).join(ranked, ranked.c.id == m.News.id).where(
+        ranked.c.rank <= limit
+    ).order_by(desc(m.News.published_at))
+
     result = await r.tx.execute(query)
-    news_list = result.scalars().all()
-    
-    return [c.News.of(news) for news in news_list]
+    news_list = [c.News.of(news) for news in result.scalars().all()]
+    await attach_news_counts(news.category for news in news_list)
+
+    featured = {category_type: [] for category_type in category_types}
+    for news in news_list:
+        featured[news.category.category_type].append(news)
+    return featured
+
+
+@service
+async def get_featured_news(category_type: str, limit: int = 3) -> Maybe[List[c.News]]:
+    """Get featured news by category type"""
+    return (await featured_news([category_type], limit))[category_type]
+
+
+@service
+async def get_featured_news_by_types(category_types: List[str], limit: int = 3) -> Maybe[Dict[str, List[c.News]]]:
+    """Get featured news of several category types at once"""
+    return await featured_news(category_types, limit)
 
 
 @service
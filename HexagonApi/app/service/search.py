@@ -0,0 +1,168 @@
+from typing import List, Optional
+from sqlalchemy import select, func, literal, null, union_all, desc, Float
+
+import app.model.db as m
+import app.model.composite as c
+from app.ext.search.base import Suggestion
+from .commons import service, Maybe, Errors, r
+
+
+SEARCH_KINDS = ("course", "news")
+
+
+def search_query(text: str):
+    """
+    Full-text query over the accent-folded search vectors.
+
+    `hexagon_fold()` is the same folding the triggers apply to indexed text, and
+    `websearch_to_tsquery` accepts quoted phrases, `or` and `-term`.
+    """
+    return func.websearch_to_tsquery("simple", func.hexagon_fold(text))
+
+
+@service
+async def search(
+    text: str,
+    kind: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 20
+) -> Maybe[tuple[List[c.SearchHit], bool]]:
+    """
+    Search active courses and published news, best matches first.
+
+    Each kind only passes its best `page * per_page + 1` matches to the merge, in the order of the merge so
+    pages agree, which is a top-N sort rather than a full one. Nothing is counted: whether more results follow
+    is told by the one extra row.
+
+    Returns:
+        Hits of the page, and whether there are more.
+    """
+    text = text.strip()
+    if not text or (kind and kind not in SEARCH_KINDS):
+        return Errors.INVALID_REQUEST
+
+    query = search_query(text)
+    candidates = page * per_page + 1
+    selects = []
+
+    if kind in (None, "course"):
+        selects.append(
+            select(
+                literal("course").label("kind"),
+                m.Course.id.label("id"),
+                m.Course.title.label("title"),
+                m.Course.slug.label("slug"),
+                m.Course.short_description.label("short_description"),
+                m.Course.image_key.label("image_key"),
+                null().cast(m.News.published_at.type).label("published_at"),
+                func.ts_rank_cd(m.Course.search_vector, query).cast(Float).label("rank"),
+            ).where(
+                m.Course.is_active == True,
+                m.Course.search_vector.op("@@")(query)
+            ).order_by(desc("rank"), m.Course.id).limit(candidates)
+        )
+
+    if kind in (None, "news"):
+        selects.append(
+            select(
+                literal("news").label("kind"),
+                m.News.id.label("id"),
+                m.News.title.label("title"),
+                m.News.slug.label("slug"),
+                m.News.short_description.label("short_description"),
+                m.News.image_key.label("image_key"),
+                m.News.published_at.label("published_at"),
+                func.ts_rank_cd(m.News.search_vector, query).cast(Float).label("rank"),
+            ).where(
+                m.News.is_active == True,
+                m.News.is_published == True,
+                m.News.search_vector.op("@@")(query)
+            ).order_by(desc("rank"), m.News.published_at.desc().nulls_last(), m.News.id).limit(candidates)
+        )
+
+    hits = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery("hits")
+
+    result = await r.tx.execute(
+        select(hits)
+        .order_by(desc(hits.c.rank), hits.c.published_at.desc().nulls_last(), hits.c.id)
+        .offset((page - 1) * per_page)
+        .limit(per_page + 1)
+    )
+    rows = result.all()
+
+    return ([c.SearchHit(**row._mapping) for row in rows[:per_page]], len(rows) > per_page)
+
+
+@service
+async def suggestion_entries(news_limit: int = 5000) -> Maybe[List[Suggestion]]:
+    """
+    Entries of the search-as-you-type index: active courses, course categories and class codes ranked by
+    active enrollments, and the `news_limit` most recent published news ranked by views.
+    """
+    enrolled = (
+        select(
+            m.StudentCourseEnrollment.course_class_id.label("course_class_id"),
+            func.count().label("students")
+        )
+        .where(m.StudentCourseEnrollment.is_active == True)
+        .group_by(m.StudentCourseEnrollment.course_class_id)
+        .subquery("enrolled")
+    )
+    students = func.coalesce(enrolled.c.students, 0)
+
+    classes = (await r.tx.execute(
+        select(
+            m.CourseClass.id,
+            m.CourseClass.class_code,
+            m.Course.id.label("course_id"),
+            m.Course.title,
+            m.Course.slug,
+            m.Course.category_id,
+            students.label("students")
+        )
+        .join(m.Course, m.Course.id == m.CourseClass.course_id)
+        .outerjoin(enrolled, enrolled.c.course_class_id == m.CourseClass.id)
+        .where(m.Course.is_active == True, m.CourseClass.is_active == True)
+    )).all()
+
+    course_students: dict[str, int] = {}
+    category_students: dict[str, int] = {}
+    entries = []
+    for row in classes:
+        course_students[row.course_id] = course_students.get(row.course_id, 0) + row.students
+        category_students[row.category_id] = category_students.get(row.category_id, 0) + row.students
+        if row.class_code:
+            entries.append(Suggestion(
+                kind="class", id=row.id, label=row.class_code, slug=row.slug,
+                popularity=row.students, detail=row.title
+            ))
+
+    courses = (await r.tx.execute(
+        select(m.Course.id, m.Course.title, m.Course.slug).where(m.Course.is_active == True)
+    )).all()
+    entries.extend(
+        Suggestion(kind="course", id=row.id, label=row.title, slug=row.slug, popularity=course_students.get(row.id, 0))
+        for row in courses
+    )
+
+    categories = (await r.tx.execute(
+        select(m.CourseCategory.id, m.CourseCategory.name, m.CourseCategory.slug)
+        .where(m.CourseCategory.is_active == True)
+    )).all()
+    entries.extend(
+        Suggestion(kind="category", id=row.id, label=row.name, slug=row.slug, popularity=category_students.get(row.id, 0))
+        for row in categories
+    )
+
+    news = (await r.tx.execute(
+        select(m.News.id, m.News.title, m.News.slug, m.News.view_count)
+        .where(m.News.is_active == True, m.News.is_published == True)
+        .order_by(m.News.published_at.desc().nulls_last())
+        .limit(news_limit)
+    )).all()
+    entries.extend(
+        Suggestion(kind="news", id=row.id, label=row.title, slug=row.slug, popularity=row.view_count or 0)
+        for row in news
+    )
+
+    return entries
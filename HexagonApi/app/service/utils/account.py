@@ -1,9 +1,10 @@
-import httpx
 from app.resources import context as r
 
 
 async def download_and_save_profile_picture(picture_url: str, user_id: str) -> str:
     """Download and save profile picture from URL"""
+    import httpx
+
     try:
         async with httpx.AsyncClient() as client:
             response = await client.get(picture_url)
@@ -0,0 +1,6 @@
+"""
+Micro and load benchmarks for the API.
+
+Each module is runnable on its own, e.g. `python -m bench.composite`, from the
+HexagonApi directory.
+"""
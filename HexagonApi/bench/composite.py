@@ -0,0 +1,148 @@
+"""
+Memory / CPU cost of converting ORM courses into composites.
+
+Builds detached `app.model.db.Course` graphs (category, classes with content
+blocks and enrollments, files, outstanding students, roadmap and additional
+info) and measures converting them the way the list endpoint does (composite +
+`vr.CourseSummary`) and the way the detail endpoint does (every relationship
+materialized, `vr.Course`).
+
+    python -m bench.composite --courses 1000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from decimal import Decimal
+from typing import Callable, List
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+import app.api.view.responses as vr
+import app.model.composite as c
+import app.model.db as m
+
+
+def build_courses(count: int) -> List[m.Course]:
+    """Course graphs shaped like the detail query's eager loads.
+
+    Relationships are set as committed (loaded) values, the way a loader
+    populates them, so no back-references get loaded along the way.
+    """
+    categories = [
+        m.CourseCategory(id=f"cat-{i}", name=f"Category {i}", slug=f"category-{i}", order=i, is_active=True)
+        for i in range(10)
+    ]
+    courses = []
+    for i in range(count):
+        course = m.Course(
+            id=f"course-{i}", category_id=categories[i % 10].id, title=f"Course {i}",
+            slug=f"course-{i}", short_description="Lorem ipsum " * 8, image_key=f"courses/{i}.jpg",
+            order=i, is_active=True,
+        )
+        set_committed_value(course, "category", categories[i % 10])
+        classes, files, students = [], [], []
+        for j in range(4):
+            course_class = m.CourseClass(
+                id=f"class-{i}-{j}", course_id=course.id, title=f"Class {j}", short_description="Class",
+                address="Hà Nội", schedule_description="T2, T4", class_code=f"C{i}-{j}",
+                is_open_for_enrollment=True, max_students=30, is_active=True,
+            )
+            set_committed_value(course_class, "content_blocks", [
+                m.CourseContentBlock(
+                    id=f"block-{i}-{j}-{k}", course_class_id=course_class.id, title=f"Block {k}",
+                    descriptions=["a", "b", "c"], order=k, is_active=True,
+                )
+                for k in range(3)
+            ])
+            set_committed_value(course_class, "enrollments", [
+                m.StudentCourseEnrollment(
+                    id=f"enr-{i}-{j}-{k}", user_id=f"user-{k}", course_id=course.id, course_class_id=course_class.id,
+                    status=m.EnrollmentStatusEnum.ENROLLED, tuition_fee=Decimal("1000"), paid_amount=Decimal("0"),
+                    is_active=True,
+                )
+                for k in range(10)
+            ])
+            classes.append(course_class)
+        for j in range(3):
+            files.append(m.CourseFile(
+                id=f"file-{i}-{j}", course_id=course.id, name=f"File {j}", file_key=f"files/{i}-{j}.pdf",
+                file_size=1024 * j, is_downloadable=True, permission_level="public", download_count=0, is_active=True,
+            ))
+        for j in range(5):
+            students.append(m.OutstandingStudent(
+                id=f"os-{i}-{j}", course_id=course.id, name=f"Student {j}", awards=["Gold"],
+                current_education="THPT", is_active=True,
+            ))
+        roadmap = m.CourseRoadmap(
+            id=f"rm-{i}", course_id=course.id, short_description="Roadmap", slogan="", is_active=True,
+        )
+        set_committed_value(roadmap, "content_blocks", [
+            m.RoadmapContentBlock(
+                id=f"rmb-{i}-{j}", roadmap_id=roadmap.id, title=f"Step {j}", descriptions=["x"],
+                order=j, is_active=True,
+            )
+            for j in range(4)
+        ])
+        additional_info = m.CourseAdditionalInfo(id=f"ai-{i}", course_id=course.id, is_active=True)
+        set_committed_value(additional_info, "content_blocks", [
+            m.CourseAdditionalContentBlock(
+                id=f"aib-{i}-{j}", additional_info_id=additional_info.id, title=f"Info {j}",
+                descriptions=["y"], order=j, is_active=True,
+            )
+            for j in range(3)
+        ])
+        set_committed_value(course, "classes", classes)
+        set_committed_value(course, "files", files)
+        set_committed_value(course, "outstanding_students", students)
+        set_committed_value(course, "roadmap", roadmap)
+        set_committed_value(course, "additional_info", additional_info)
+        courses.append(course)
+    return courses
+
+
+def listing(courses: List[m.Course]) -> list:
+    return [vr.CourseSummary.of(c.Course.of(course)) for course in courses]
+
+
+def detail(courses: List[m.Course]) -> list:
+    return [vr.Course.of(c.Course.of(course)) for course in courses]
+
+
+def composites_only(courses: List[m.Course]) -> list:
+    return [c.Course.of(course) for course in courses]
+
+
+def measure(name: str, fn: Callable[[List[m.Course]], list], courses: List[m.Course], repeat: int) -> dict:
+    fn(courses)  # warm up lazily-built pydantic validators
+    gc.collect()
+    tracemalloc.start()
+    result = fn(courses)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(courses)
+        best = min(best, time.perf_counter() - started)
+    return {"name": name, "ms": best * 1000, "retained_kib": current / 1024, "peak_kib": peak / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    courses = build_courses(args.courses)
+    print(f"{'case':<12}{'best ms':>10}{'retained KiB':>15}{'peak KiB':>12}")
+    for name, fn in (("composite", composites_only), ("listing", listing), ("detail", detail)):
+        row = measure(name, fn, courses, args.repeat)
+        print(f"{row['name']:<12}{row['ms']:>10.1f}{row['retained_kib']:>15.0f}{row['peak_kib']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
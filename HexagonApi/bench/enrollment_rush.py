@@ -0,0 +1,130 @@
+"""
+Opening-day rush: concurrent seat reservations for one class.
+
+Creates a class with `--seats` seats and `--users` users, fires `--requests` reservations at once (users
+take turns, so fewer users than requests also exercises the duplicate enrollment backoff), then checks
+that exactly the available seats were taken. Everything created is deleted afterwards. Needs the database
+settings of the application (`DB__DSN`, ...).
+
+    python -m bench.enrollment_rush --requests 1000 --seats 30
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import delete, func, select
+
+import app.model.db as m
+from app.config import environment
+from app.resources import configure
+from app.service.enrollment import reserve_seat
+
+
+def fixtures(seats: int, users: int, tag: str) -> tuple[list, m.CourseClass, list[m.User]]:
+    now = datetime.now()
+    category = m.CourseCategory(
+        id=str(uuid.uuid4()), name=f"Rush {tag}", slug=f"rush-{tag}", description="",
+        created_at=now, updated_at=now
+    )
+    course = m.Course(
+        id=str(uuid.uuid4()), category_id=category.id, title=f"Rush {tag}", slug=f"rush-{tag}",
+        short_description="", image_key="", created_at=now, updated_at=now
+    )
+    course_class = m.CourseClass(
+        id=str(uuid.uuid4()), course_id=course.id, title="Rush", short_description="", image_key="",
+        address="", schedule_description="", class_code=f"R{tag}", max_students=seats, reserved_seats=0,
+        created_at=now, updated_at=now
+    )
+    students = [
+        m.User(
+            id=str(uuid.uuid4()), username=f"rush-{tag}-{i}", email=f"rush-{tag}-{i}@example.com",
+            date_joined=now
+        )
+        for i in range(users)
+    ]
+    return [category, course, course_class], course_class, students
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--seats", type=int, default=30)
+    parser.add_argument("--users", type=int, help="Distinct users, defaults to one per request")
+    args = parser.parse_args()
+    users = args.users or args.requests
+
+    logger = logging.getLogger("bench")
+    resources, call_session = await configure(environment().settings, logger)
+    tag = uuid.uuid4().hex[:8]
+    rows, course_class, students = fixtures(args.seats, users, tag)
+
+    async def setup(session):
+        session.db.add_all(rows + students)
+
+    async def connect(session):
+        await session.tx.execute(select(1))
+
+    await call_session(setup)
+    # Open the pool's connections before timing
+    await asyncio.gather(*(call_session(connect) for _ in range(resources.db.pool.size())))
+
+    timings: list[float] = []
+
+    async def request(user: m.User):
+        started = time.perf_counter()
+        enrollment_id = await call_session(lambda _: reserve_seat(
+            user.id, m.CourseClass.id, course_class.id, m.EnrollmentMethodEnum.CLASS_CODE, Decimal(0)
+        ))
+        timings.append((time.perf_counter() - started) * 1000)
+        return enrollment_id
+
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(request(students[i % users]) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+        async def check(session):
+            enrolled = (await session.db.execute(
+                select(func.count()).where(m.StudentCourseEnrollment.course_class_id == course_class.id)
+            )).scalar()
+            reserved = (await session.db.execute(
+                select(m.CourseClass.reserved_seats).where(m.CourseClass.id == course_class.id)
+            )).scalar()
+            return enrolled, reserved
+
+        enrolled, reserved = await call_session(check)
+    finally:
+        async def cleanup(session):
+            await session.db.execute(
+                delete(m.StudentCourseEnrollment).where(m.StudentCourseEnrollment.course_class_id == course_class.id)
+            )
+            for model, row in reversed(list(zip((m.CourseCategory, m.Course, m.CourseClass), rows))):
+                await session.db.execute(delete(model).where(model.id == row.id))
+            await session.db.execute(delete(m.User).where(m.User.id.in_([student.id for student in students])))
+
+        await call_session(cleanup)
+        await resources.db.dispose()
+
+    timings.sort()
+    accepted = sum(1 for result in results if result is not None)
+    expected = min(args.seats, users)
+    print(
+        f"requests {args.requests}  users {users}  seats {args.seats}  "
+        f"accepted {accepted}  enrolled {enrolled}  reserved_seats {reserved}"
+    )
+    print(
+        f"wall {elapsed * 1000:.0f} ms  {args.requests / elapsed:.0f} req/s  "
+        f"p50 {statistics.median(timings):.1f} ms  p95 {timings[int(len(timings) * 0.95)]:.1f} ms  "
+        f"p99 {timings[int(len(timings) * 0.99)]:.1f} ms"
+    )
+    if not accepted == enrolled == reserved == expected:
+        raise SystemExit(f"expected {expected} enrollments and reserved seats")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
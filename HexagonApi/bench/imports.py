@@ -0,0 +1,139 @@
+"""
+Import-time report of the application, parsed from `python -X importtime`.
+
+Imports `--module` (by default the ASGI entry point and the routes, which
+`create_app` loads before serving) in fresh interpreters `--runs` times and
+reports, per top-level package, the median time spent executing its own
+modules (self time, so the packages add up to the total), together with the
+wall time of the whole process. Packages that should only be
+loaded on demand are listed as loaded or not; one showing up means something
+imports it eagerly again.
+
+Worker start time is what a rolling restart or a scale-out waits for, so the
+report can be saved and compared like the load test:
+
+    python -m bench.imports --output imports.json
+    python -m bench.imports --baseline imports.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Optional
+
+from bench.load import git_revision
+
+
+# Loaded only when the configuration selects them or on first use
+DEFERRED = ("boto3", "botocore", "minio", "PIL", "pillow_heif", "firebase_admin", "google", "requests", "cachecontrol")
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def parse(stderr: str) -> list[tuple[int, str, int, int]]:
+    """
+    Entries of an `-X importtime` log as (depth, module, self µs, cumulative µs).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            entries.append(((len(indent) - 1) // 2, name, int(own), int(cumulative)))
+    return entries
+
+
+def measure(modules: list[str]) -> dict[str, Any]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+
+    packages: dict[str, int] = defaultdict(int)
+    loaded = set()
+    for _, name, own, _ in parse(result.stderr):
+        packages[name.split(".")[0]] += own
+        loaded.add(name)
+    return {"wall_us": int(wall * 1e6), "packages": dict(packages), "modules": loaded}
+
+
+def summarize(runs: list[dict[str, Any]], top: int) -> dict[str, Any]:
+    names = {name for run in runs for name in run["packages"]}
+    packages = {name: statistics.median(run["packages"].get(name, 0) for run in runs) for name in names}
+    ordered = sorted(packages.items(), key=lambda item: -item[1])
+    modules = runs[0]["modules"]
+    return {
+        "wall_ms": round(statistics.median(run["wall_us"] for run in runs) / 1000, 1),
+        "import_ms": round(statistics.median(sum(run["packages"].values()) for run in runs) / 1000, 1),
+        "modules": len(modules),
+        "packages": {name: round(us / 1000, 2) for name, us in ordered[:top]},
+        "deferred": {name: any(m == name or m.startswith(f"{name}.") for m in modules) for name in DEFERRED},
+    }
+
+
+def print_report(report: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    def delta(key: str, value: float, before: Optional[dict]) -> str:
+        if not before or key not in before or not before[key]:
+            return ""
+        return f"  {(value - before[key]) / before[key] * 100:+6.1f}%"
+
+    print(f"{'process wall time':<28} {report['wall_ms']:>9.1f} ms" + delta("wall_ms", report["wall_ms"], baseline))
+    print(f"{'imports':<28} {report['import_ms']:>9.1f} ms" + delta("import_ms", report["import_ms"], baseline))
+    print(f"{'modules':<28} {report['modules']:>9}")
+    print()
+    print(f"{'package (self time)':<28} {'ms':>9}")
+    before = baseline["packages"] if baseline else None
+    for name, ms in report["packages"].items():
+        print(f"{name:<28} {ms:>9.2f}" + delta(name, ms, before))
+    print()
+    print("deferred packages loaded: " + (", ".join(n for n, loaded in report["deferred"].items() if loaded) or "none"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--module", action="append", help="Module to import, repeatable (default: app.main and app.api.routes)"
+    )
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=25, help="Packages to list")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    args = parser.parse_args()
+    args.module = args.module or ["app.main", "app.api.routes"]
+
+    # The first run also fills the bytecode cache
+    measure(args.module)
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        **summarize([measure(args.module) for _ in range(args.runs)], args.top),
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+End-to-end load test of the API against a seeded local stack.
+
+Boots the application with `app.main.create_app` in this process, with
+`LocalStorage` in a temporary directory and stubs for Firebase (the bearer
+token is the user's `firebase_id`) and SMTP (messages are rendered, not sent).
+Seeds categories, courses, classes, news and users under a random tag, drives
+a weighted traffic mix with `--concurrency` virtual users for `--duration`
+seconds, then deletes everything it created. Only the database settings of the
+application (`DB__DSN`, ...) are needed.
+
+Latency is measured by an in-process ASGI client, so it includes routing,
+middleware, services and serialization but no network or HTTP parsing.
+
+    python -m bench.load --duration 30 --concurrency 32 --output load.json
+    python -m bench.load --duration 30 --baseline load.json
+
+With `--strict` the loading checks of `app.model.loading` run and fail the
+request on an unloaded relationship or an N+1 statement, so every error in the
+report is a loading regression; the latencies of such a run are not
+representative. Without it the checks are off, whatever `ENV` says.
+
+    python -m bench.load --strict --duration 10
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Optional
+
+import httpx
+from sqlalchemy import delete, select
+
+import app.model.db as m
+from app.ext.email.base import GmailEmailService
+from app.ext.firebase.base import FirebaseAuth
+
+
+#----------------------------------------------------------------
+# Stubs
+#----------------------------------------------------------------
+class StubAuth(FirebaseAuth):
+    """Accepts any bearer token as the `sub` claim, without fetching Google's keys."""
+
+    def __init__(self) -> None:
+        pass
+
+    def verify(self, token: str) -> dict[str, Any]:
+        return {"sub": token, "firebase": {"sign_in_provider": "password"}}
+
+
+class NullSMTP:
+    """SMTP connection that counts messages instead of sending them."""
+    sent = 0
+
+    def __enter__(self) -> "NullSMTP":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def send_message(self, msg, to_addrs=None) -> dict:
+        NullSMTP.sent += 1
+        return {}
+
+
+class StubEmail(GmailEmailService):
+    def _create_smtp_connection(self):
+        return NullSMTP()
+
+
+#----------------------------------------------------------------
+# Data
+#----------------------------------------------------------------
+@dataclass
+class Dataset:
+    tag: str
+    rows: list = field(default_factory=list)
+    course_slugs: list[str] = field(default_factory=list)
+    class_codes: list[str] = field(default_factory=list)
+    news_slugs: list[str] = field(default_factory=list)
+    tokens: list[str] = field(default_factory=list)
+
+    def sizes(self) -> dict[str, int]:
+        return dict(Counter(type(row).__tablename__ for row in self.rows))
+
+
+def seed(courses: int, news: int, users: int, rng: random.Random) -> Dataset:
+    tag = uuid.uuid4().hex[:8]
+    data = Dataset(tag)
+    now = datetime.now()
+
+    def add(model, **values):
+        row = model(id=str(uuid.uuid4()), created_at=now, updated_at=now, is_active=True, **values)
+        data.rows.append(row)
+        return row
+
+    categories = [
+        add(m.CourseCategory, name=f"Load {tag} {i}", slug=f"load-{tag}-{i}", description="", order=i)
+        for i in range(max(courses // 10, 1))
+    ]
+    for i in range(courses):
+        slug = f"load-{tag}-course-{i}"
+        course = add(
+            m.Course, category_id=categories[i % len(categories)].id, title=f"Khóa học {tag} {i}", slug=slug,
+            short_description="Mô tả ngắn " * 10, image_key=f"public/courses/{tag}/{i}.jpg", order=i,
+        )
+        data.course_slugs.append(slug)
+        for j in range(3):
+            code = f"L{tag}{i}-{j}"
+            add(
+                m.CourseClass, course_id=course.id, title=f"Lớp {j}", short_description="Lớp học",
+                image_key="", address="Hà Nội", schedule_description="T2, T4, T6", learning_method="offline",
+                class_code=code, is_open_for_enrollment=True, max_students=1_000_000, reserved_seats=0,
+            )
+            data.class_codes.append(code)
+
+    news_categories = [
+        add(
+            m.NewsCategory, name=f"Load {tag} {kind.value}", slug=f"load-{tag}-{kind.value}", description="",
+            category_type=kind,
+        )
+        for kind in m.NewsCategoryTypeEnum
+    ]
+    for i in range(news):
+        slug = f"load-{tag}-news-{i}"
+        add(
+            m.News, category_id=news_categories[i % len(news_categories)].id, title=f"Bản tin {tag} {i}",
+            slug=slug, short_description="Nội dung tóm tắt " * 8, image_key="", is_published=True,
+            published_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)), view_count=0,
+        )
+        data.news_slugs.append(slug)
+
+    for i in range(users):
+        token = f"load-{tag}-{i}"
+        data.rows.append(m.User(
+            id=str(uuid.uuid4()), username=token, email=f"{token}@example.com", full_name=f"Học viên {i}",
+            is_active=True, is_staff=False, is_superuser=False, date_joined=now, firebase_id=token,
+            login_method="password",
+        ))
+        data.tokens.append(token)
+    return data
+
+
+async def seed_site(session, data: Dataset) -> None:
+    """Adds the contact info and admin email the homepage and enrollments require, unless present."""
+    now = datetime.now()
+    rows = []
+    if (await session.db.execute(select(m.ContactInfo.id).where(m.ContactInfo.is_active == True))).first() is None:
+        rows.append(m.ContactInfo(
+            id=str(uuid.uuid4()), address="Hà Nội", phone="0900000000", email="contact@example.com",
+            maps_url="", facebook_url="", working_hours="8:00 - 17:00", is_active=True, created_at=now, updated_at=now,
+        ))
+    setting = select(m.SiteSettings.id).where(m.SiteSettings.key == "admin_notification_email")
+    if (await session.db.execute(setting)).first() is None:
+        rows.append(m.SiteSettings(
+            id=str(uuid.uuid4()), key="admin_notification_email", value="admin@example.com", description="",
+            data_type="text", is_active=True, created_at=now, updated_at=now,
+        ))
+    data.rows += rows
+    session.db.add_all(rows)
+
+
+async def cleanup(call_session: Callable, data: Dataset) -> None:
+    async def run(session):
+        ids = lambda model: [row.id for row in data.rows if isinstance(row, model)]
+        await session.db.execute(
+            delete(m.StudentCourseEnrollment).where(m.StudentCourseEnrollment.user_id.in_(ids(m.User)))
+        )
+        for model in (
+            m.News, m.NewsCategory, m.CourseClass, m.Course, m.CourseCategory, m.User, m.ContactInfo, m.SiteSettings
+        ):
+            await session.db.execute(delete(model).where(model.id.in_(ids(model))))
+
+    await call_session(run)
+
+
+#----------------------------------------------------------------
+# Traffic
+#----------------------------------------------------------------
+@dataclass
+class Scenario:
+    name: str
+    weight: int
+    request: Callable[[httpx.AsyncClient, random.Random], Any]
+
+
+def scenarios(data: Dataset, rng: random.Random) -> list[Scenario]:
+    # Each user enrolls in a class at most once, so every enrollment succeeds
+    pairs = [(token, code) for token in data.tokens for code in data.class_codes]
+    rng.shuffle(pairs)
+    unused = iter(pairs)
+
+    def auth(token: str) -> dict[str, str]:
+        return {"Authorization": f"Bearer {token}"}
+
+    def enroll(client: httpx.AsyncClient, rng: random.Random):
+        token, code = next(unused)
+        return client.post(
+            "/enrollments/enroll-by-code", json={"class_code": code, "tuition_fee": "1500000"}, headers=auth(token)
+        )
+
+    return [
+        Scenario("GET /homepage/data", 30, lambda client, rng: client.get("/homepage/data")),
+        Scenario("GET /courses", 10, lambda client, rng: client.get("/courses", params={"page": rng.randint(1, 3)})),
+        Scenario("GET /courses/{slug}", 25, lambda client, rng: client.get(f"/courses/{rng.choice(data.course_slugs)}")),
+        Scenario("GET /news", 15, lambda client, rng: client.get("/news", params={"page": rng.randint(1, 5)})),
+        Scenario("GET /news/{slug}", 10, lambda client, rng: client.get(f"/news/{rng.choice(data.news_slugs)}")),
+        Scenario("GET /enrollments", 6, lambda client, rng: client.get("/enrollments", headers=auth(rng.choice(data.tokens)))),
+        Scenario("POST /enrollments/enroll-by-code", 4, enroll),
+    ]
+
+
+@dataclass
+class Samples:
+    timings: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    mix: list[Scenario],
+    concurrency: int,
+    duration: float,
+    seed: int,
+    record: bool = True,
+) -> tuple[dict[str, Samples], float]:
+    samples = {scenario.name: Samples() for scenario in mix}
+    weights = [scenario.weight for scenario in mix]
+    deadline = time.perf_counter() + duration
+
+    async def user(index: int):
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(mix, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, rng)
+            except StopIteration:
+                continue
+            except Exception:
+                status = "exception"
+            else:
+                status = response.status_code
+            elapsed = (time.perf_counter() - started) * 1000
+            if record:
+                s = samples[scenario.name]
+                s.timings.append(elapsed)
+                s.statuses[status] += 1
+                if status == "exception" or status >= 500:
+                    s.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+#----------------------------------------------------------------
+# Report
+#----------------------------------------------------------------
+def percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(math.ceil(q * len(ordered)) - 1, 0))]
+
+
+def summarize(timings: list[float], statuses: Counter, errors: int, elapsed: float) -> dict[str, Any]:
+    ordered = sorted(timings)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        "rps": round(len(ordered) / elapsed, 1),
+        "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p95_ms": round(percentile(ordered, 0.95), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    header = f"{'endpoint':<36} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header + ("  Δp50     Δp95" if baseline else ""))
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for name, s in rows:
+        line = (
+            f"{name:<36} {s['requests']:>7} {s['errors']:>5} {s['rps']:>8.1f} "
+            f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f}"
+        )
+        before = baseline and (baseline["total"] if name == "total" else baseline["endpoints"].get(name))
+        if before:
+            line += "  " + "  ".join(
+                f"{(s[key] - before[key]) / before[key] * 100:+6.1f}%" if before[key] else "     - "
+                for key in ("p50_ms", "p95_ms")
+            )
+        print(line)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before measuring")
+    parser.add_argument("--concurrency", type=int, default=32, help="Virtual users")
+    parser.add_argument("--courses", type=int, default=60)
+    parser.add_argument("--news", type=int, default=300)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    parser.add_argument("--strict", action="store_true", help="Fail requests loading data lazily or N+1")
+    args = parser.parse_args()
+
+    storage = tempfile.TemporaryDirectory(prefix="hexagon-load-")
+    os.environ["STORAGE__URL"] = f"file://{storage.name}"
+    os.environ.setdefault("FIREBASE__KIND", "auth")
+    os.environ.setdefault("FIREBASE__PROJECT_ID", "load-test")
+    os.environ.setdefault("EMAIL__HOST", "localhost")
+    os.environ.setdefault("NAME", "hexagon-api")
+    os.environ.setdefault("VERSION", "load")
+    os.environ["STRICT__ENABLED"] = os.environ["STRICT__FAIL"] = "true" if args.strict else "false"
+
+    from app.config import root_package
+    from app.main import create_app
+
+    app = await create_app()
+    # Per-request debug logging would dominate the measurements
+    logging.getLogger(root_package().lower()).setLevel(logging.WARNING)
+    resources = app.state.resources
+    resources.firebase = StubAuth()
+    resources.email = StubEmail(resources.email.settings)
+
+    rng = random.Random(args.seed)
+    data = seed(args.courses, args.news, args.users, rng)
+
+    async def insert(session):
+        session.db.add_all(data.rows)
+        await seed_site(session, data)
+        # Fail here rather than in the logged commit of the closing session
+        await session.db.flush()
+
+    await resources.call(insert)
+    try:
+        mix = scenarios(data, rng)
+        async with httpx.AsyncClient(app=app, base_url="http://load") as client:
+            if args.warmup:
+                await drive(client, mix, args.concurrency, args.warmup, args.seed + 1, record=False)
+            samples, elapsed = await drive(client, mix, args.concurrency, args.duration, args.seed)
+        await resources.drain()
+    finally:
+        await cleanup(resources.call, data)
+        await resources.db.dispose()
+        storage.cleanup()
+
+    every = Samples()
+    for s in samples.values():
+        every.timings += s.timings
+        every.statuses.update(s.statuses)
+        every.errors += s.errors
+
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "args": vars(args),
+            "dataset": data.sizes(),
+            "emails": NullSMTP.sent,
+            "elapsed_s": round(elapsed, 2),
+        },
+        "endpoints": {name: summarize(s.timings, s.statuses, s.errors, elapsed) for name, s in samples.items()},
+        "total": summarize(every.timings, every.statuses, every.errors, elapsed),
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
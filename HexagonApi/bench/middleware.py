@@ -0,0 +1,168 @@
+"""
+Microbenchmark of the per-request overhead of the middleware stack.
+
+Calls the ASGI application from `create_app` directly, with no server, client or
+HTTP parsing, `--requests` times on a trivial route (`--path`, `/health` by
+default) from `--concurrency` loops, and reports the requests per second and
+the mean time per request (median of `--runs`). With the route doing nothing,
+the numbers are those of the middleware: resource session, timing, metrics,
+compression, CORS, routing and serialization. Also times reading an attribute
+of the resource session through `app.resources.context` (`r.tx`, `r.storage`).
+
+No database connection is made; the suggestion index is disabled.
+
+    python -m bench.middleware --output middleware.json
+    python -m bench.middleware --baseline middleware.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import tempfile
+import time
+import timeit
+from datetime import datetime
+from typing import Any, Optional
+
+from bench.load import git_revision
+
+
+async def run_requests(app, path: str, requests: int, concurrency: int) -> float:
+    """
+    Seconds taken by `requests` GET requests to `path`, `concurrency` at a time.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip, br")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    request = {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"{path} answered {message['status']}")
+
+    async def loop(count: int):
+        for _ in range(count):
+            received = False
+
+            async def receive():
+                nonlocal received
+                if received:
+                    # Like an open connection: nothing more until the client disconnects
+                    await asyncio.Future()
+                received = True
+                return request
+
+            await app(dict(scope), receive, send)
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(loop(n) for n in shares))
+    return time.perf_counter() - started
+
+
+def time_accessor(resources, number: int) -> dict[str, float]:
+    """
+    Nanoseconds per attribute read through the context accessor, and directly on the session.
+    """
+    from app.resources import _context, context as r
+
+    session = resources.open()
+    token = _context.set(session)
+    try:
+        through = min(timeit.repeat(lambda: r.storage, number=number, repeat=5)) / number
+        direct = min(timeit.repeat(lambda: session.storage, number=number, repeat=5)) / number
+    finally:
+        _context.reset(token)
+    return {"accessor_ns": round(through * 1e9, 1), "direct_ns": round(direct * 1e9, 1)}
+
+
+def print_report(report: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    def delta(key: str) -> str:
+        if not baseline or not baseline.get(key):
+            return ""
+        return f"  {(report[key] - baseline[key]) / baseline[key] * 100:+6.1f}%"
+
+    print(f"{'requests per second':<28} {report['rps']:>10.0f}" + delta("rps"))
+    print(f"{'µs per request':<28} {report['request_us']:>10.1f}" + delta("request_us"))
+    print(f"{'ns per r.<attribute>':<28} {report['accessor_ns']:>10.1f}" + delta("accessor_ns"))
+    print(f"{'ns per session.<attribute>':<28} {report['direct_ns']:>10.1f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/health", help="Route to request")
+    parser.add_argument("--requests", type=int, default=20000, help="Requests per run")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    args = parser.parse_args()
+
+    storage = tempfile.TemporaryDirectory(prefix="hexagon-middleware-")
+    os.environ["STORAGE__URL"] = f"file://{storage.name}"
+    os.environ.setdefault("DB__DSN", "postgresql+asyncpg://bench@localhost/bench")
+    os.environ.setdefault("FIREBASE__KIND", "auth")
+    os.environ.setdefault("FIREBASE__PROJECT_ID", "bench")
+    os.environ.setdefault("EMAIL__HOST", "localhost")
+    os.environ.setdefault("TZ__TIMEZONE", "UTC")
+    os.environ.setdefault("NAME", "hexagon-api")
+    os.environ.setdefault("VERSION", "bench")
+    os.environ["SUGGEST__ENABLED"] = os.environ["STRICT__ENABLED"] = "false"
+    # Configured like a deployment: the documentation credentials turn the metrics on
+    os.environ.setdefault("ENV", "stg")
+
+    from app.config import root_package
+    from app.main import create_app
+
+    app = await create_app()
+    # Per-request debug logging would dominate the measurements
+    logging.getLogger(root_package().lower()).setLevel(logging.WARNING)
+
+    try:
+        await run_requests(app, args.path, min(args.requests, 1000), args.concurrency)
+        runs = [await run_requests(app, args.path, args.requests, args.concurrency) for _ in range(args.runs)]
+        accessor = time_accessor(app.state.resources, 200_000)
+    finally:
+        await app.state.resources.db.dispose()
+        storage.cleanup()
+
+    elapsed = statistics.median(runs)
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        "rps": round(args.requests / elapsed, 1),
+        "request_us": round(elapsed / args.requests * 1e6, 1),
+        **accessor,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
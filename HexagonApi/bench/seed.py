@@ -0,0 +1,550 @@
+"""
+Synthetic data at production-like volumes, for load tests and query plans.
+
+Generates categories, courses with classes, content blocks and roadmaps, news
+with content blocks, users with profiles, enrollments and the image objects
+their `image_key`s point to. Rows are streamed into the tables of
+`app.model.db` with binary `COPY` in one transaction. Table triggers are off
+while loading; afterwards the search vectors are rebuilt in one pass and the
+suggestion channel is notified once.
+
+Popularity follows a Zipf law: a few classes take most enrollments and a few
+news categories most articles. Per-row counts (classes, blocks, enrollments
+per user) are Poisson or geometric around the given means. The same `--seed`
+produces the same data.
+
+Generated rows are marked by a `seed-` slug, username or class code prefix, so
+`--drop` removes them (and the images) again. Needs the database and storage
+settings of the application (`DB__DSN`, `STORAGE__URL`, ...).
+
+    python -m bench.seed --scale 0.01            # 10 courses, 2k news, 5k users, 20k enrollments
+    python -m bench.seed                         # 1k courses, 200k news, 500k users, 2M enrollments
+    python -m bench.seed --drop
+"""
+import argparse
+import asyncio
+import bisect
+import io
+import itertools
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import app.model.db as m
+from app.config import environment
+from app.ext.storage.base import Storage
+
+
+MARK = "seed-"
+CLASS_CODE_MARK = "SEED"
+IMAGE_PREFIX = "public/seed"
+
+# Tables whose triggers maintain search vectors or announce suggestion changes
+TRIGGERED = (m.CourseCategory, m.Course, m.CourseClass, m.CourseContentBlock, m.News, m.NewsContentBlock)
+
+WORDS = (
+    "toán tư duy tiếng anh ngữ văn vật lý hóa học sinh học lập trình luyện thi học sinh giỏi "
+    "kỳ thi tuyển sinh lớp chuyên ôn tập nâng cao cơ bản kết quả giải thưởng olympic sự kiện "
+    "hội thảo phụ huynh lịch khai giảng ưu đãi học bổng trải nghiệm thực hành phương pháp "
+    "hiệu quả chương trình mới mùa hè cuối tuần buổi tối trực tuyến trung tâm hexagon"
+).split()
+FAMILY_NAMES = "Nguyễn Trần Lê Phạm Hoàng Huỳnh Phan Vũ Võ Đặng Bùi Đỗ Hồ Ngô Dương Lý".split()
+GIVEN_NAMES = "An Bình Chi Dũng Giang Hà Hải Hạnh Hoa Hùng Khánh Lan Linh Long Mai Minh Nam Ngọc Phương Quân Sơn Thảo Trang Tuấn Vy".split()
+ADDRESSES = ("Cầu Giấy, Hà Nội", "Đống Đa, Hà Nội", "Hai Bà Trưng, Hà Nội", "Thanh Xuân, Hà Nội", "Long Biên, Hà Nội")
+SCHEDULES = ("T2, T4, T6 - 18:00", "T3, T5, T7 - 18:00", "T7, CN - 8:00", "T7, CN - 14:00")
+TUITION_FEES = tuple(Decimal(fee) for fee in (1_500_000, 2_000_000, 3_000_000, 4_500_000, 6_000_000))
+
+# (status, weight); statuses in m.OCCUPYING_STATUSES hold a seat
+STATUSES = (
+    (m.EnrollmentStatusEnum.COMPLETED, 45),
+    (m.EnrollmentStatusEnum.STUDYING, 20),
+    (m.EnrollmentStatusEnum.ENROLLED, 15),
+    (m.EnrollmentStatusEnum.PENDING, 10),
+    (m.EnrollmentStatusEnum.DROPPED, 10),
+)
+METHODS = ((m.EnrollmentMethodEnum.ADMIN, 50), (m.EnrollmentMethodEnum.CLASS_CODE, 30), (m.EnrollmentMethodEnum.ONLINE_FORM, 20))
+LOGIN_METHODS = (("password", 50), ("google", 40), ("facebook", 7), ("github", 3))
+
+
+#----------------------------------------------------------------
+# Distributions
+#----------------------------------------------------------------
+class Generator:
+    def __init__(self, seed: int, now: datetime) -> None:
+        self.rng = random.Random(seed)
+        self.now = now
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def poisson(self, mean: float) -> int:
+        # Knuth's method; means here are small
+        limit, k, p = math.exp(-mean), 0, self.rng.random()
+        while p > limit:
+            k += 1
+            p *= self.rng.random()
+        return k
+
+    def geometric(self, mean: float) -> int:
+        """Number of failures before a success, with the given mean (>= 0)."""
+        if mean <= 0:
+            return 0
+        return int(math.log(1.0 - self.rng.random()) / math.log(mean / (mean + 1)))
+
+    def zipf(self, n: int, s: float) -> list[float]:
+        """Cumulative Zipf weights for `n` items in random popularity order."""
+        weights = [1 / (rank + 1) ** s for rank in range(n)]
+        self.rng.shuffle(weights)
+        return list(itertools.accumulate(weights))
+
+    def pick(self, cumulative: list[float]) -> int:
+        return bisect.bisect(cumulative, self.rng.random() * cumulative[-1])
+
+    def weighted(self, options: tuple) -> Callable[..., list]:
+        """`k -> values` sampler for ((value, weight), ...)."""
+        values, weights = zip(*options)
+        cumulative = list(itertools.accumulate(weights))
+        return lambda k=1: self.rng.choices(values, cum_weights=cumulative, k=k)
+
+    def text(self, low: int, high: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def title(self) -> str:
+        return self.text(3, 8).capitalize()
+
+    def name(self) -> str:
+        return f"{self.rng.choice(FAMILY_NAMES)} {self.rng.choice(GIVEN_NAMES)} {self.rng.choice(GIVEN_NAMES)}"
+
+    def ago(self, days: float) -> datetime:
+        return self.now - timedelta(seconds=self.rng.random() * days * 86400)
+
+    def descriptions(self) -> str:
+        return json.dumps([self.text(8, 20) for _ in range(self.rng.randint(1, 4))], ensure_ascii=False)
+
+
+#----------------------------------------------------------------
+# Rows
+#----------------------------------------------------------------
+class Table:
+    """Rows for one model, as tuples in the order of `columns`."""
+
+    def __init__(self, model, columns: str) -> None:
+        self.name = model.__table__.name
+        # Validate against the model so a renamed column fails before loading
+        self.columns = tuple(model.__table__.c[column].name for column in columns.split())
+
+
+class Dataset:
+    def __init__(self, args: argparse.Namespace, images: list[str]) -> None:
+        self.args = args
+        self.g = Generator(args.seed, datetime.now(timezone.utc))
+        self.images = images
+        self.category_ids: list[uuid.UUID] = []
+        self.course_ids: list[uuid.UUID] = []
+        self.class_ids: list[uuid.UUID] = []
+        self.class_courses: list[int] = []  # course index of each class
+        self.roadmap_ids: list[uuid.UUID] = []
+        self.news_category_ids: list[uuid.UUID] = []
+        self.news_ids: list[uuid.UUID] = []
+        self.user_ids: list[uuid.UUID] = []
+
+    def image(self, probability: float = 1.0) -> str:
+        if not self.images or self.g.rng.random() >= probability:
+            return ""
+        return self.g.rng.choice(self.images)
+
+    def stamps(self, days: float) -> tuple[datetime, datetime]:
+        created = self.g.ago(days)
+        return created, min(created + timedelta(days=self.g.rng.random() * 30), self.g.now)
+
+    def course_categories(self) -> Iterator[tuple]:
+        g = self.g
+        for i in range(self.args.course_categories):
+            created, updated = self.stamps(1000)
+            self.category_ids.append(g.uuid())
+            yield (self.category_ids[-1], f"Danh mục {g.title()}"[:100], f"{MARK}cc{i}", g.text(10, 30), i, True, created, updated)
+
+    def courses(self) -> Iterator[tuple]:
+        g = self.g
+        categories = self.category_ids
+        popularity = g.zipf(len(categories), self.args.zipf)
+        for i in range(self.args.courses):
+            created, updated = self.stamps(1000)
+            course_id = g.uuid()
+            self.course_ids.append(course_id)
+            yield (
+                course_id, categories[g.pick(popularity)], g.title(), f"{MARK}c{i}", g.text(20, 60),
+                self.image(), i, g.rng.random() > 0.05, created, updated,
+            )
+
+    def course_classes(self) -> Iterator[tuple]:
+        g = self.g
+        n = 0
+        for course, course_id in enumerate(self.course_ids):
+            for j in range(max(g.poisson(self.args.classes_per_course), 1)):
+                created, updated = self.stamps(700)
+                self.class_ids.append(g.uuid())
+                self.class_courses.append(course)
+                # Reserved seats are counted from the enrollments once they are loaded
+                yield (
+                    self.class_ids[-1], course_id, f"Lớp {j + 1} - {g.text(2, 4)}", g.text(10, 30), self.image(0.5),
+                    g.rng.choice(ADDRESSES), g.rng.choice(SCHEDULES),
+                    g.rng.choice((m.LearningMethodEnum.OFFLINE, m.LearningMethodEnum.ONLINE)).value,
+                    f"{CLASS_CODE_MARK}{n}", g.rng.random() > 0.2, g.rng.choice((20, 30, 40)), 0,
+                    g.rng.random() > 0.05, created, updated,
+                )
+                n += 1
+
+    def blocks(self, parents: list[uuid.UUID], mean: float, general: bool) -> Iterator[tuple]:
+        g = self.g
+        for parent in parents:
+            for order in range(g.poisson(mean)):
+                created, updated = self.stamps(700)
+                row = (g.uuid(), parent, g.title(), self.image(0.3), g.descriptions())
+                yield row + ((g.text(20, 60),) if general else ()) + (order, True, created, updated)
+
+    def roadmaps(self) -> Iterator[tuple]:
+        g = self.g
+        for course_id in self.course_ids:
+            if g.rng.random() < self.args.roadmap_ratio:
+                created, updated = self.stamps(700)
+                self.roadmap_ids.append(g.uuid())
+                yield (self.roadmap_ids[-1], course_id, g.text(20, 40), self.image(), g.title()[:200], True, created, updated)
+
+    def news_categories(self) -> Iterator[tuple]:
+        g = self.g
+        kinds = list(m.NewsCategoryTypeEnum)
+        for i in range(self.args.news_categories):
+            created, updated = self.stamps(1000)
+            course_id = g.rng.choice(self.course_ids) if self.course_ids and g.rng.random() < 0.3 else None
+            self.news_category_ids.append(g.uuid())
+            yield (
+                self.news_category_ids[-1], f"Chuyên mục {g.title()}"[:100], f"{MARK}nc{i}", g.text(5, 15), course_id,
+                kinds[i % len(kinds)].value, i, True, created, updated,
+            )
+
+    def news(self) -> Iterator[tuple]:
+        g = self.g
+        categories = self.news_category_ids
+        popularity = g.zipf(len(categories), self.args.zipf)
+        for i in range(self.args.news):
+            created, updated = self.stamps(1000)
+            published = g.rng.random() < self.args.published
+            self.news_ids.append(g.uuid())
+            yield (
+                self.news_ids[-1], categories[g.pick(popularity)], g.title(), f"{MARK}n{i}", g.text(20, 50),
+                self.image(0.9), published, created if published else None,
+                # Views fall off with rank roughly like a power law
+                int(g.rng.paretovariate(1.2) * 50) if published else 0,
+                g.rng.random() > 0.02, created, updated,
+            )
+
+    def users(self) -> Iterator[tuple]:
+        g = self.g
+        login = g.weighted(LOGIN_METHODS)
+        for i in range(self.args.users):
+            joined = g.ago(1500)
+            name = g.name()
+            self.user_ids.append(g.uuid())
+            yield (
+                self.user_ids[-1], f"{MARK}u{i}", f"{MARK}u{i}@example.com", name, f"09{g.rng.randrange(10**8):08d}",
+                g.rng.random() > 0.01, False, False, joined, g.ago(30) if g.rng.random() < 0.6 else None,
+                f"{MARK}u{i}", login()[0],
+            )
+
+    def profiles(self) -> Iterator[tuple]:
+        g = self.g
+        for user_id in self.user_ids:
+            yield (g.uuid(), user_id, g.text(0, 20), g.rng.choice(ADDRESSES), self.image(0.3))
+
+    def enrollments(self) -> Iterator[tuple]:
+        g = self.g
+        classes, users = len(self.class_ids), len(self.user_ids)
+        if not classes or not users:
+            return
+        popularity = g.zipf(classes, self.args.zipf)
+        status = g.weighted(STATUSES)
+        method = g.weighted(METHODS)
+
+        # Most users take a few classes, some many; no user enrolls in a class twice
+        per_user = [min(g.geometric(self.args.enrollments / users), classes) for _ in range(users)]
+        missing = self.args.enrollments - sum(per_user)
+        while missing:
+            user = g.rng.randrange(users)
+            step = 1 if missing > 0 else -1
+            if 0 <= per_user[user] + step <= classes:
+                per_user[user] += step
+                missing -= step
+
+        for user, k in enumerate(per_user):
+            if k > classes // 4:
+                taken = g.rng.sample(range(classes), k)
+            else:
+                taken = set()
+                while len(taken) < k:
+                    taken.add(g.pick(popularity))
+            for cls in taken:
+                created, updated = self.stamps(700)
+                state = status()[0]
+                fee = g.rng.choice(TUITION_FEES)
+                paid = fee if state == m.EnrollmentStatusEnum.COMPLETED else g.rng.choice((Decimal(0), fee / 2, fee))
+                payment = (
+                    m.PaymentStatusEnum.PAID if paid == fee else
+                    m.PaymentStatusEnum.UNPAID if not paid else m.PaymentStatusEnum.PARTIAL
+                )
+                yield (
+                    g.uuid(), self.user_ids[user], self.course_ids[self.class_courses[cls]], self.class_ids[cls],
+                    created.date(), method()[0].value, created.date(), None, state.value, fee, paid, payment.value,
+                    "", "", True, created, updated,
+                )
+
+
+TABLES = {
+    "course_category": Table(m.CourseCategory, "id name slug description order is_active created_at updated_at"),
+    "course": Table(
+        m.Course, "id category_id title slug short_description image_key order is_active created_at updated_at"
+    ),
+    "course_class": Table(
+        m.CourseClass,
+        "id course_id title short_description image_key address schedule_description learning_method class_code "
+        "is_open_for_enrollment max_students reserved_seats is_active created_at updated_at",
+    ),
+    "course_content_block": Table(
+        m.CourseContentBlock, "id course_class_id title image_key descriptions order is_active created_at updated_at"
+    ),
+    "course_roadmap": Table(
+        m.CourseRoadmap, "id course_id short_description image_key slogan is_active created_at updated_at"
+    ),
+    "roadmap_content_block": Table(
+        m.RoadmapContentBlock,
+        "id roadmap_id title image_key descriptions general_description order is_active created_at updated_at",
+    ),
+    "news_category": Table(
+        m.NewsCategory, "id name slug description course_id category_type order is_active created_at updated_at"
+    ),
+    "news": Table(
+        m.News,
+        "id category_id title slug short_description image_key is_published published_at view_count is_active "
+        "created_at updated_at",
+    ),
+    "news_content_block": Table(
+        m.NewsContentBlock,
+        "id news_id title image_key descriptions general_description order is_active created_at updated_at",
+    ),
+    "user": Table(
+        m.User,
+        "id username email full_name phone_number is_active is_staff is_superuser date_joined last_login "
+        "firebase_id login_method",
+    ),
+    "user_profile": Table(m.UserProfile, "id user_id bio address profile_picture"),
+    "student_course_enrollment": Table(
+        m.StudentCourseEnrollment,
+        "id user_id course_id course_class_id enrollment_date enrollment_method start_date end_date status "
+        "tuition_fee paid_amount payment_status final_grade notes is_active created_at updated_at",
+    ),
+}
+
+
+#----------------------------------------------------------------
+# Images
+#----------------------------------------------------------------
+def render_image(index: int, rng: random.Random) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (640, 360), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(640), rng.randrange(360)
+        draw.ellipse((x, y, x + rng.randrange(40, 200), y + rng.randrange(40, 200)), fill=tuple(rng.randrange(256) for _ in range(3)))
+    draw.text((16, 16), f"seed {index}", fill=(255, 255, 255))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def image_keys(count: int) -> list[str]:
+    return [f"{IMAGE_PREFIX}/{i}.jpg" for i in range(count)]
+
+
+def upload_images(storage: Storage, count: int, seed: int) -> list[str]:
+    keys = image_keys(count)
+    missing = [key for key, found in storage.exists_many(keys).items() if not found]
+
+    def upload(key: str):
+        index = int(key.rsplit("/", 1)[1].split(".")[0])
+        storage.write(key, render_image(index, random.Random(seed * 100_003 + index)), "image/jpeg")
+
+    with ThreadPoolExecutor(max_workers=storage.concurrency) as executor:
+        list(executor.map(upload, missing))
+    return keys
+
+
+#----------------------------------------------------------------
+# Load
+#----------------------------------------------------------------
+async def copy(connection, table: str, rows: Iterable[tuple]) -> int:
+    started = time.perf_counter()
+    count = 0
+
+    def counted():
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    await connection.copy_records_to_table(table, records=counted(), columns=TABLES[table].columns)
+    elapsed = time.perf_counter() - started
+    print(f"{table:<28} {count:>10,} rows  {elapsed:7.1f} s  {count / max(elapsed, 1e-9):>10,.0f} rows/s")
+    return count
+
+
+async def set_triggers(connection, enabled: bool) -> None:
+    action = "ENABLE" if enabled else "DISABLE"
+    for model in TRIGGERED:
+        await connection.execute(f'ALTER TABLE "{model.__table__.name}" {action} TRIGGER USER')
+
+
+async def count_seats(connection) -> None:
+    """Sets `reserved_seats` of the generated classes to their occupying enrollments."""
+    started = time.perf_counter()
+    await connection.execute(
+        f"""
+        UPDATE course_class AS cls
+        SET reserved_seats = seats.n, max_students = greatest(cls.max_students, seats.n)
+        FROM (
+            SELECT course_class_id, count(*) AS n FROM student_course_enrollment
+            WHERE status = any($1::text[]) GROUP BY course_class_id
+        ) AS seats
+        WHERE cls.id = seats.course_class_id AND cls.class_code LIKE '{CLASS_CODE_MARK}%'
+        """,
+        list(m.OCCUPYING_STATUSES),
+    )
+    print(f"{'reserved seats':<28} {'':>15}  {time.perf_counter() - started:7.1f} s")
+
+
+async def rebuild_search(connection, channel: str) -> None:
+    """Lets the search triggers index the loaded rows and announces the change once."""
+    started = time.perf_counter()
+    # Updating only the vector runs the BEFORE trigger and is not announced per row
+    await connection.execute("UPDATE course SET search_vector = NULL WHERE search_vector IS NULL")
+    await connection.execute("UPDATE news SET search_vector = NULL WHERE search_vector IS NULL")
+    await notify(connection, channel)
+    print(f"{'search vectors':<28} {'':>15}  {time.perf_counter() - started:7.1f} s")
+
+
+async def notify(connection, channel: str) -> None:
+    for table in ("course", "course_category", "course_class", "news"):
+        await connection.execute("SELECT pg_notify($1, $2)", channel, table)
+
+
+async def load(connection, data: Dataset, channel: str) -> None:
+    async with connection.transaction():
+        # Check the (deferred) foreign keys per table; pending checks would block re-enabling the triggers
+        await connection.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        await set_triggers(connection, False)
+        await copy(connection, "course_category", data.course_categories())
+        await copy(connection, "course", data.courses())
+        await copy(connection, "course_class", data.course_classes())
+        await copy(connection, "course_content_block", data.blocks(data.class_ids, data.args.blocks, general=False))
+        await copy(connection, "course_roadmap", data.roadmaps())
+        await copy(connection, "roadmap_content_block", data.blocks(data.roadmap_ids, data.args.blocks, general=True))
+        await copy(connection, "news_category", data.news_categories())
+        await copy(connection, "news", data.news())
+        await copy(connection, "news_content_block", data.blocks(data.news_ids, data.args.blocks, general=True))
+        await copy(connection, "user", data.users())
+        await copy(connection, "user_profile", data.profiles())
+        await copy(connection, "student_course_enrollment", data.enrollments())
+        await count_seats(connection)
+        await set_triggers(connection, True)
+        await rebuild_search(connection, channel)
+
+    started = time.perf_counter()
+    for table in TABLES:
+        await connection.execute(f'ANALYZE "{table}"')
+    print(f"{'analyze':<28} {'':>15}  {time.perf_counter() - started:7.1f} s")
+
+
+async def drop(connection, channel: str) -> None:
+    """Deletes the rows of earlier runs, children first."""
+    users = f"SELECT id FROM \"user\" WHERE username LIKE '{MARK}%'"
+    courses = f"SELECT id FROM course WHERE slug LIKE '{MARK}%'"
+    classes = f"SELECT id FROM course_class WHERE class_code LIKE '{CLASS_CODE_MARK}%'"
+    news = f"SELECT id FROM news WHERE slug LIKE '{MARK}%'"
+    statements = {
+        "student_course_enrollment": f"user_id IN ({users}) OR course_class_id IN ({classes})",
+        "user_profile": f"user_id IN ({users})",
+        "user": f"username LIKE '{MARK}%'",
+        "news_content_block": f"news_id IN ({news})",
+        "news": f"slug LIKE '{MARK}%'",
+        "news_category": f"slug LIKE '{MARK}%'",
+        "roadmap_content_block": f"roadmap_id IN (SELECT id FROM course_roadmap WHERE course_id IN ({courses}))",
+        "course_roadmap": f"course_id IN ({courses})",
+        "course_content_block": f"course_class_id IN ({classes})",
+        "course_class": f"class_code LIKE '{CLASS_CODE_MARK}%'",
+        "course": f"slug LIKE '{MARK}%'",
+        "course_category": f"slug LIKE '{MARK}%'",
+    }
+    async with connection.transaction():
+        await connection.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        await set_triggers(connection, False)
+        for table, condition in statements.items():
+            started = time.perf_counter()
+            status = await connection.execute(f'DELETE FROM "{table}" WHERE {condition}')
+            print(f"{table:<28} {int(status.split()[-1]):>10,} rows  {time.perf_counter() - started:7.1f} s deleted")
+        await set_triggers(connection, True)
+        await notify(connection, channel)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for every count below")
+    parser.add_argument("--course-categories", type=int, default=20)
+    parser.add_argument("--courses", type=int, default=1_000)
+    parser.add_argument("--classes-per-course", type=float, default=4, help="Mean, Poisson distributed")
+    parser.add_argument("--blocks", type=float, default=3, help="Mean content blocks per class, roadmap and news")
+    parser.add_argument("--roadmap-ratio", type=float, default=0.8, help="Share of courses with a roadmap")
+    parser.add_argument("--news-categories", type=int, default=30)
+    parser.add_argument("--news", type=int, default=200_000)
+    parser.add_argument("--published", type=float, default=0.9, help="Share of published news")
+    parser.add_argument("--users", type=int, default=500_000)
+    parser.add_argument("--enrollments", type=int, default=2_000_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Popularity skew of classes and categories")
+    parser.add_argument("--images", type=int, default=200, help="Distinct image objects to upload")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--drop", action="store_true", help="Delete generated data instead")
+    args = parser.parse_args()
+    for name in ("courses", "news", "users", "enrollments"):
+        setattr(args, name, max(round(getattr(args, name) * args.scale), 1))
+
+    logging.getLogger("bench").setLevel(logging.WARNING)
+    settings = environment().settings
+    storage = Storage.of(settings.storage.url)
+    engine = create_async_engine(settings.db.dsn)
+    started = time.perf_counter()
+    try:
+        async with engine.connect() as conn:
+            connection = (await conn.get_raw_connection()).driver_connection
+            if args.drop:
+                await drop(connection, settings.suggest.channel)
+                failed = storage.delete_many(image_keys(args.images))
+                print(f"images {args.images - len(failed)} deleted, {len(failed)} failed")
+            else:
+                images = await asyncio.to_thread(upload_images, storage, args.images, args.seed)
+                print(f"{'images':<28} {len(images):>10,} objects")
+                await load(connection, Dataset(args, images), settings.suggest.channel)
+    finally:
+        await engine.dispose()
+    print(f"done in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Response serialization cost of the high-volume routes.
+
+Compares FastAPI's default path (response-model validation, serialization and
+`JSONResponse` rendering) with `ViewResponse` for the view objects returned by
+`GET /courses` (a page of `per_page` courses) and `GET /homepage/data`.
+
+    python -m bench.serialization --per-page 100
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import app.api.view.responses as vr
+import app.model.composite as c
+from app.api.shared.responses import ViewResponse
+from bench.composite import build_courses
+
+
+def course_list(per_page: int) -> vr.CourseListResponse:
+    courses = [c.Course.of(course) for course in build_courses(per_page)]
+    return vr.CourseListResponse(
+        items=[vr.CourseSummary.of(course) for course in courses],
+        total=per_page * 10,
+        page=1,
+        per_page=per_page,
+        total_pages=10,
+        has_next=True,
+        has_prev=False,
+    )
+
+
+def homepage_data() -> vr.HomepageData:
+    now = datetime.now()
+    courses = [c.Course.of(course) for course in build_courses(6)]
+    category = c.NewsCategory(id="news-cat", name="Tin tức", slug="tin-tuc")
+    news = []
+    for i in range(18):
+        item = c.News(
+            id=f"news-{i}", category_id=category.id, title=f"Tin tức {i}", slug=f"tin-tuc-{i}",
+            short_description="Nội dung ngắn " * 10, image_key=f"news/{i}.jpg", is_published=True,
+            view_count=i * 10, published_at=now - timedelta(days=i),
+        )
+        item.category = category
+        news.append(item)
+    banners = [
+        c.Banner(id=f"banner-{i}", title=f"Banner {i}", image=f"banners/{i}.jpg", link="/courses", order=i)
+        for i in range(5)
+    ]
+    students = [s for course in courses for s in course.get_featured_outstanding_students()][:9]
+    return vr.HomepageData.of(
+        courses=courses,
+        students=students,
+        exam_results=news[:6],
+        events=news[6:12],
+        news=news[12:],
+        categories=list({course.category.id: course.category for course in courses}.values()),
+        roadmaps=[course.roadmap for course in courses if course.has_roadmap()][:3],
+        hero_banners=banners[:3],
+        sidebar_banners=banners[3:],
+        contact=c.ContactInfo(id="contact", address="Hà Nội", phone="0123456789", email="info@example.com"),
+    )
+
+
+def default_path(tp: Any) -> Callable[[Any], Awaitable[bytes]]:
+    field = create_response_field(name=f"Response_{tp.__name__}", type_=tp)
+
+    async def render(view: Any) -> bytes:
+        content = await serialize_response(field=field, response_content=view)
+        return JSONResponse(content).body
+    return render
+
+
+def fast_path(tp: Any) -> Callable[[Any], Awaitable[bytes]]:
+    async def render(view: Any) -> bytes:
+        return ViewResponse(view).body
+    return render
+
+
+async def measure(render: Callable[[Any], Awaitable[bytes]], view: Any, repeat: int) -> tuple[float, int]:
+    body = await render(view)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await render(view)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, len(body)
+
+
+async def run(per_page: int, repeat: int) -> None:
+    cases = [
+        ("/courses", vr.CourseListResponse, course_list(per_page)),
+        ("/homepage/data", vr.HomepageData, homepage_data()),
+    ]
+    print(f"{'route':<16}{'path':<10}{'best ms':>10}{'bytes':>10}")
+    for route, tp, view in cases:
+        bodies = []
+        for name, path in (("default", default_path), ("view", fast_path)):
+            ms, size = await measure(path(tp), view, repeat)
+            bodies.append(await path(tp)(view))
+            print(f"{route:<16}{name:<10}{ms:>10.3f}{size:>10}")
+        if bodies[0] != bodies[1]:
+            print(f"{route:<16}WARNING: bodies differ")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--per-page", type=int, default=100, help="Courses on the /courses page")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.per_page, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+HTTP load test of the server modes: throughput and latency over real sockets.
+
+Seeds the dataset of `bench.load`, then for each `--mode` starts the server in
+a subprocess on `--port`, waits for `/health`, drives the public part of the
+`bench.load` traffic mix from `--clients` processes with `--concurrency`
+connections in total, and stops the server with SIGTERM. The time until the
+server answers and until it exits are reported too.
+
+Modes:
+
+    reload   uvicorn app.main:app --factory --reload   (the previous Dockerfile)
+    single   uvicorn app.main:app --factory
+    serve    python -m app.serve                        (SERVER__* settings apply)
+
+The clients run on the same machine, so on few cores they take CPU from the
+workers; compare modes within one run.
+
+    python -m bench.serve --duration 30 --concurrency 64 --output serve.json
+    SERVER__WORKERS=4 python -m bench.serve --mode serve --baseline serve.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Optional
+
+import httpx
+
+from bench.load import Samples, cleanup, drive, git_revision, scenarios, seed, seed_site, summarize
+
+
+COMMANDS = {
+    "reload": ["-m", "uvicorn", "app.main:app", "--factory", "--reload"],
+    "single": ["-m", "uvicorn", "app.main:app", "--factory"],
+    "serve": ["-m", "app.serve"],
+}
+
+# Scenarios without a bearer token; the server verifies tokens with Firebase
+PUBLIC = ("GET /homepage/data", "GET /courses", "GET /courses/{slug}", "GET /news", "GET /news/{slug}")
+
+
+def start(mode: str, port: int, log) -> subprocess.Popen:
+    args = [sys.executable, *COMMANDS[mode]]
+    env = {**os.environ, "PYTHONPATH": os.getcwd(), "SERVER__PORT": str(port)}
+    if mode != "serve":
+        args += ["--host", "127.0.0.1", "--port", str(port)]
+    return subprocess.Popen(args, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def wait_ready(server: subprocess.Popen, url: str, timeout: float = 120) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with {server.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Server not ready")
+
+
+def stop(server: subprocess.Popen, timeout: float = 60) -> float:
+    started = time.perf_counter()
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+    # The reloader and gunicorn leave their children in the session
+    try:
+        os.killpg(server.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    return time.perf_counter() - started
+
+
+def client(url: str, slugs: dict[str, list[str]], concurrency: int, duration: float, seed: int, record: bool):
+    """
+    Traffic of one client process; returns the samples by scenario and the elapsed seconds.
+    """
+    data = SimpleNamespace(tokens=[], class_codes=[], **slugs)
+    mix = [s for s in scenarios(data, random.Random(seed)) if s.name in PUBLIC]
+
+    async def run():
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as c:
+            return await drive(c, mix, concurrency, duration, seed, record)
+
+    return asyncio.run(run())
+
+
+def load(url: str, slugs: dict, args: argparse.Namespace, duration: float, seed: int, record: bool):
+    shares = [args.concurrency // args.clients + (i < args.concurrency % args.clients) for i in range(args.clients)]
+    jobs = [(url, slugs, n, duration, seed * 100 + i, record) for i, n in enumerate(shares) if n]
+    with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+        results = pool.starmap(client, jobs)
+
+    samples: dict[str, Samples] = {}
+    for part, _ in results:
+        for name, s in part.items():
+            total = samples.setdefault(name, Samples())
+            total.timings += s.timings
+            total.statuses.update(s.statuses)
+            total.errors += s.errors
+    return samples, max(elapsed for _, elapsed in results)
+
+
+def measure(mode: str, slugs: dict, args: argparse.Namespace) -> dict[str, Any]:
+    url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryFile("w+") as log:
+        started = time.perf_counter()
+        server = start(mode, args.port, log)
+        try:
+            wait_ready(server, url)
+            ready = time.perf_counter() - started
+            if args.warmup:
+                load(url, slugs, args, args.warmup, args.seed + 1, record=False)
+            samples, elapsed = load(url, slugs, args, args.duration, args.seed, record=True)
+        except Exception:
+            stop(server)
+            log.seek(0)
+            print(log.read()[-4000:], file=sys.stderr)
+            raise
+        stopped = stop(server)
+
+    every = Samples()
+    for s in samples.values():
+        every.timings += s.timings
+        every.statuses.update(s.statuses)
+        every.errors += s.errors
+    return {
+        "ready_s": round(ready, 2),
+        "stop_s": round(stopped, 2),
+        "endpoints": {name: summarize(s.timings, s.statuses, s.errors, elapsed) for name, s in samples.items()},
+        "total": summarize(every.timings, every.statuses, every.errors, elapsed),
+    }
+
+
+def print_report(report: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    header = f"{'mode':<10} {'ready':>7} {'stop':>6} {'req':>8} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header + ("     Δrps    Δp95" if baseline else ""))
+    for mode, m in report["modes"].items():
+        t = m["total"]
+        line = (
+            f"{mode:<10} {m['ready_s']:>6.1f}s {m['stop_s']:>5.1f}s {t['requests']:>8} {t['errors']:>5} "
+            f"{t['rps']:>8.1f} {t['p50_ms']:>8.2f} {t['p95_ms']:>8.2f} {t['p99_ms']:>8.2f}"
+        )
+        before = baseline and baseline["modes"].get(mode)
+        if before:
+            b = before["total"]
+            line += "  " + "  ".join(
+                f"{(t[key] - b[key]) / b[key] * 100:+6.1f}%" if b[key] else "     - " for key in ("rps", "p95_ms")
+            )
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--mode", action="append", choices=list(COMMANDS), help="Server mode, repeatable (default: all)"
+    )
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per mode")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before measuring")
+    parser.add_argument("--concurrency", type=int, default=64, help="Connections in total")
+    parser.add_argument("--clients", type=int, default=2, help="Client processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--courses", type=int, default=60)
+    parser.add_argument("--news", type=int, default=300)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    args = parser.parse_args()
+    args.mode = args.mode or list(COMMANDS)
+
+    storage = tempfile.TemporaryDirectory(prefix="hexagon-serve-")
+    os.environ["STORAGE__URL"] = f"file://{storage.name}"
+    os.environ.setdefault("FIREBASE__KIND", "auth")
+    os.environ.setdefault("FIREBASE__PROJECT_ID", "load-test")
+    os.environ.setdefault("EMAIL__HOST", "localhost")
+    os.environ.setdefault("NAME", "hexagon-api")
+    os.environ.setdefault("VERSION", "load")
+    os.environ["STRICT__ENABLED"] = "false"
+
+    from app.config import environment
+    from app.resources import configure
+
+    async def with_resources(next):
+        resources, call = await configure(environment().settings, logging.getLogger("bench"))
+        try:
+            return await next(call)
+        finally:
+            await resources.db.dispose()
+
+    data = seed(args.courses, args.news, args.users, random.Random(args.seed))
+
+    async def insert(session):
+        session.db.add_all(data.rows)
+        await seed_site(session, data)
+        await session.db.flush()
+
+    asyncio.run(with_resources(lambda call: call(insert)))
+    try:
+        slugs = {"course_slugs": data.course_slugs, "news_slugs": data.news_slugs}
+        modes = {mode: measure(mode, slugs, args) for mode in args.mode}
+    finally:
+        asyncio.run(with_resources(lambda call: cleanup(call, data)))
+        storage.cleanup()
+
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "workers": environment().settings.worker_count(),
+            "args": vars(args),
+            "dataset": data.sizes(),
+        },
+        "modes": modes,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
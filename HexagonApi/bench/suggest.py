@@ -0,0 +1,79 @@
+"""
+Build time and per-keystroke lookup latency of the suggestion index.
+
+Indexes synthetic course, category, class and news titles and replays typing
+of a set of queries one character at a time.
+
+    python -m bench.suggest --courses 2000 --news 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.ext.search.base import PrefixIndex, Suggestion
+
+WORDS = [
+    "Luyện", "thi", "Toán", "Ngữ", "văn", "Tiếng", "Anh", "Vật", "lý", "Hóa", "học", "Sinh", "lớp", "nâng", "cao",
+    "cơ", "bản", "ôn", "tập", "học", "kỳ", "đề", "kiểm", "tra", "chuyên", "đại", "tuyển", "sinh", "thông", "báo",
+    "lịch", "kết", "quả", "sự", "kiện", "khai", "giảng", "hè", "trực", "tuyến", "IELTS", "SAT", "Olympic",
+]
+QUERIES = ["luyen thi toan", "Tiếng Anh", "hoa hoc lop 12", "thông báo lịch", "ielts", "HX2024"]
+
+
+def title(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + f" {rng.randint(1, 12)}"
+
+
+def entries(courses: int, news: int, seed: int) -> list[Suggestion]:
+    rng = random.Random(seed)
+    found = [
+        Suggestion(kind="category", id=f"cat-{i}", label=title(rng, 2), slug=f"cat-{i}", popularity=rng.randint(0, 5000))
+        for i in range(courses // 50 + 1)
+    ]
+    for i in range(courses):
+        found.append(Suggestion(
+            kind="course", id=f"course-{i}", label=title(rng, 5), slug=f"course-{i}",
+            popularity=int(rng.paretovariate(1.2) * 10)
+        ))
+        for j in range(3):
+            found.append(Suggestion(
+                kind="class", id=f"class-{i}-{j}", label=f"HX{2020 + j}{i:05d}", slug=f"course-{i}",
+                popularity=rng.randint(0, 30)
+            ))
+    found.extend(
+        Suggestion(kind="news", id=f"news-{i}", label=title(rng, 10), slug=f"news-{i}",
+                   popularity=int(rng.paretovariate(1.1) * 100))
+        for i in range(news)
+    )
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--news", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    suggestions = entries(args.courses, args.news, args.seed)
+    started = time.perf_counter()
+    index = PrefixIndex(suggestions)
+    print(f"entries {len(index)}  keys {len(index.keys)}  build {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    for run in ("cold", "cached"):
+        timings = []
+        for query in QUERIES:
+            for end in range(1, len(query) + 1):
+                started = time.perf_counter()
+                index.lookup(query[:end], args.limit)
+                timings.append((time.perf_counter() - started) * 1_000_000)
+        timings.sort()
+        p50 = statistics.median(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{run:<8}lookups {len(timings)}  p50 {p50:.1f} us  p99 {p99:.1f} us  max {timings[-1]:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+`CompressionMiddleware` marks every compressible response with `Vary: Accept-Encoding`, compressed or not.
+"""
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app.api.shared.compression import CompressionMiddleware
+from app.config import ApplicationSettings
+
+BODY = {"text": "a" * 4096}
+
+
+def get(path: str, accept_encoding: str) -> httpx.Response:
+    app = Starlette(routes=[
+        Route("/large", lambda _: JSONResponse(BODY)),
+        Route("/small", lambda _: JSONResponse({"text": "a"})),
+        Route("/varied", lambda _: JSONResponse(BODY, headers={"Vary": "Origin, accept-encoding"})),
+        Route("/image", lambda _: Response(b"a" * 4096, media_type="image/png")),
+    ])
+    app.add_middleware(CompressionMiddleware, settings=ApplicationSettings.Compression())
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers={"Accept-Encoding": accept_encoding})
+    return asyncio.run(request())
+
+
+@pytest.mark.parametrize("path, accept_encoding, encoding", [
+    ("/large", "gzip", "gzip"),
+    ("/large", "identity", None),
+    ("/large", "gzip;q=0, br;q=0", None),
+    ("/small", "gzip", None),
+])
+def test_compressible_responses_vary_on_accept_encoding(path, accept_encoding, encoding):
+    response = get(path, accept_encoding)
+
+    assert response.headers.get("content-encoding") == encoding
+    assert response.headers.get_list("vary") == ["Accept-Encoding"]
+    assert response.json()["text"].startswith("a")
+
+
+def test_existing_vary_is_kept_without_duplicates():
+    assert get("/varied", "identity").headers.get_list("vary") == ["Origin, accept-encoding"]
+
+
+def test_other_content_types_do_not_vary():
+    assert "vary" not in get("/image", "gzip").headers
@@ -0,0 +1,17 @@
+"""
+Seat occupancy filters the enrollment status column as stored, so PostgreSQL can use it as is.
+"""
+from sqlalchemy.dialects import postgresql
+
+import app.model.db as m
+from app.service.course import occupied_seats_query
+
+
+def test_occupied_seats_compares_status_directly():
+    sql = str(occupied_seats_query(["c1"]).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+
+    assert "lower(" not in sql
+    assert "student_course_enrollment.status IN ('pending', 'enrolled', 'studying')" in sql
+    assert m.OCCUPYING_STATUSES == ("pending", "enrolled", "studying")
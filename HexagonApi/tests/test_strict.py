@@ -0,0 +1,79 @@
+"""
+The seeded routes of `bench.load` under strict loading: no relationship read without being loaded, no N+1.
+
+Runs against the database of `DB__DSN`, where it seeds a small dataset under a random tag and deletes it
+afterwards; skipped without one.
+
+    DB__DSN=postgresql+asyncpg://... python -m pytest tests/test_strict.py
+"""
+import os
+import random
+import tempfile
+
+import httpx
+import pytest
+
+from bench.load import StubAuth, StubEmail, cleanup, scenarios, seed, seed_site
+
+pytestmark = pytest.mark.skipif(not os.environ.get("DB__DSN"), reason="needs a database (DB__DSN)")
+
+
+@pytest.fixture
+def strict_env(monkeypatch):
+    from app.config import environment, settings
+
+    storage = tempfile.TemporaryDirectory(prefix="hexagon-test-")
+    for name, value in {
+        "FIREBASE__KIND": "auth",
+        "FIREBASE__PROJECT_ID": "test",
+        "EMAIL__HOST": "localhost",
+        "TZ__TIMEZONE": "UTC",
+        "NAME": "hexagon-api",
+        "VERSION": "test",
+    }.items():
+        monkeypatch.setenv(name, os.environ.get(name, value))
+    monkeypatch.setenv("STORAGE__URL", f"file://{storage.name}")
+    monkeypatch.setenv("SUGGEST__ENABLED", "false")
+    # Strict by default in the test environment, failing the request instead of logging
+    monkeypatch.setenv("ENV", "test")
+    monkeypatch.delenv("STRICT__ENABLED", raising=False)
+    monkeypatch.setenv("STRICT__FAIL", "true")
+    environment.cache_clear()
+    settings.cache_clear()
+    yield
+    environment.cache_clear()
+    settings.cache_clear()
+    storage.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_seeded_routes_load_strictly(strict_env):
+    from app.main import create_app
+    from app.model import loading
+
+    app = await create_app()
+    assert loading.strict
+
+    resources = app.state.resources
+    resources.firebase = StubAuth()
+    resources.email = StubEmail(resources.email.settings)
+
+    rng = random.Random(1)
+    data = seed(courses=4, news=8, users=4, rng=rng)
+
+    async def insert(session):
+        session.db.add_all(data.rows)
+        await seed_site(session, data)
+        await session.db.flush()
+
+    await resources.call(insert)
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            for scenario in scenarios(data, rng):
+                for _ in range(2):
+                    response = await scenario.request(client, rng)
+                    assert response.is_success, f"{scenario.name}: {response.status_code} {response.text}"
+        await resources.drain()
+    finally:
+        await cleanup(resources.call, data)
+        await resources.db.dispose()